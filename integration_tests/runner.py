@@ -105,22 +105,12 @@ def get_tflmc_outputs(model_exe_path, input_tensor, tfl_outputs):
     return xformer_outputs
 
 def get_xformed_model(model: bytes, temp_dirname) -> bytes:
-    # write input model to temporary file
-    input_file = pathlib.Path(temp_dirname) / "input.tflite"
-    print(input_file)
-    with open(input_file, "wb") as fd:
-        fd.write(model)
-    # create another temp file for output model
-    output_file = pathlib.Path(temp_dirname) / "model.tflite"
-
-    xformer.convert(input_file, output_file, {
-    "xcore-thread-count": 5,
-})
-
-    # read output model content
-    with open(output_file, "rb") as fd:
-        bits = fd.read()
-    return bits
+    result = xformer.convert_bytes(model, xcore_thread_count=5)
+
+    # tflmc model sources, compiled by get_tflmc_model_exe
+    (pathlib.Path(temp_dirname) / "model.tflite.cpp").write_text(result.source)
+    (pathlib.Path(temp_dirname) / "model.tflite.h").write_text(result.header)
+    return result.model
 
 
 # Run the model on Larq/TFLite interpreter and compare the output with xformed model on XCore TFLM
@@ -1,18 +1,62 @@
 import subprocess
+import tempfile
 import typing
 from pathlib import Path
-from typing import Union, List, Optional
+from typing import Any, NamedTuple, Tuple, Union, List, Optional
 from .flash import generate_flash
+from .cache import ConversionCache, CACHE_DIR_ENV, FLASH_IMAGE_OPTION, SOURCE_SUFFIXES
+import os
 import re
+import shutil
 
 __compilation_output = ""
 __arena_size = 0
 
-def convert(
+# tmpfs used for the temporary files of convert_bytes when available
+SHM_DIR = "/dev/shm"
+
+
+class ConversionResult(NamedTuple):
+    model: bytes
+    params: bytes
+    arena_size: int
+    report: str
+    # tflmc source and header of the model
+    source: str = ""
+    header: str = ""
+
+
+def _xcore_opt(
     filename: Union[str, Path],
     outfile: Union[str, Path],
     params: Optional[typing.Dict[str, Optional[str]]],
-) -> int:
+    cache: Union[bool, ConversionCache, None],
+) -> Tuple[str, int]:
+    """Run xcore-opt, or reuse a cached conversion, and return its output and arena size."""
+    if cache is None:
+        cache = CACHE_DIR_ENV in os.environ
+    if cache is True:
+        cache = ConversionCache()
+    flash_image = (params or {}).get(FLASH_IMAGE_OPTION)
+
+    cache_key = None
+    if cache:
+        cache_key = cache.key(Path(filename).read_bytes(), params)
+        entry = cache.get(cache_key)
+        if entry is not None:
+            try:
+                shutil.copyfile(entry.model_path, outfile)
+                for suffix in SOURCE_SUFFIXES:
+                    source_path = Path(str(entry.model_path) + suffix)
+                    if source_path.exists():
+                        shutil.copyfile(source_path, str(outfile) + suffix)
+                if flash_image and entry.params_path is not None:
+                    shutil.copyfile(entry.params_path, flash_image)
+                return entry.compilation_output, entry.arena_size
+            except OSError:
+                # Evicted by another process, convert the model again
+                pass
+
     args: List[str] = ["xcore-opt", "-o", str(outfile)]
 
     if params is not None:
@@ -32,12 +76,75 @@ def convert(
         [arg for arg in args], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, check=True
     )
 
+    compilation_output = process_call.stdout.decode("utf-8")
+    size_str = re.sub('((.|\n|\r)*)Tensor arena size :', '', compilation_output)
+    arena_size = int(size_str.strip())
+
+    if cache:
+        cache.put(cache_key, outfile, flash_image, compilation_output, arena_size)
+
+    return compilation_output, arena_size
+
+
+def convert(
+    filename: Union[str, Path],
+    outfile: Union[str, Path],
+    params: Optional[typing.Dict[str, Optional[str]]],
+    cache: Union[bool, ConversionCache, None] = None,
+) -> int:
+    """Convert a model with xcore-opt.
+
+    cache selects the ConversionCache to reuse earlier conversions from: True for the
+    default cache, False for none, and None (the default) to use the cache directory
+    named by the XFORMER_CACHE_DIR environment variable, if it is set.
+    The report and arena size of the last conversion are kept for tensor_arena_size and
+    print_optimization_report, use convert_bytes to convert from several threads.
+    """
     global __compilation_output, __arena_size
-    __compilation_output = process_call.stdout.decode("utf-8")
-    size_str = re.sub('((.|\n|\r)*)Tensor arena size :', '', __compilation_output)
-    __arena_size = int(size_str.strip())
+    __compilation_output, __arena_size = _xcore_opt(filename, outfile, params, cache)
+    return 0
+
+
+def convert_bytes(
+    model: bytes, cache: Union[bool, ConversionCache, None] = None, **options: Any
+) -> ConversionResult:
+    """Convert a model held in memory with xcore-opt.
+
+    Options are passed to xcore-opt with underscores replaced by dashes, e.g.
+    xcore_thread_count=5 for --xcore-thread-count=5. True or None pass a flag without a
+    value and False omits it. xcore_flash_image_file=True writes the parameters to a
+    flash image, returned as the params of the result.
+    The temporary files are written to /dev/shm when available and every call returns
+    its own result, so conversions can run from many threads at once.
+    """
+    params: typing.Dict[str, Optional[str]] = {}
+    for key, val in options.items():
+        if val is False:
+            continue
+        params[key.replace("_", "-")] = None if val is True else val
+
+    temp_root = SHM_DIR if os.access(SHM_DIR, os.W_OK) else None
+    with tempfile.TemporaryDirectory(dir=temp_root) as temp_dirname:
+        input_file = Path(temp_dirname) / "input.tflite"
+        output_file = Path(temp_dirname) / "model.tflite"
+        params_file = Path(temp_dirname) / "model.params"
+        input_file.write_bytes(model)
+        if FLASH_IMAGE_OPTION in params:
+            params[FLASH_IMAGE_OPTION] = str(params_file)
+
+        report, arena_size = _xcore_opt(input_file, output_file, params, cache)
+
+        source_file = Path(str(output_file) + ".cpp")
+        header_file = Path(str(output_file) + ".h")
+        return ConversionResult(
+            model=output_file.read_bytes(),
+            params=params_file.read_bytes() if params_file.exists() else b"",
+            arena_size=arena_size,
+            report=report,
+            source=source_file.read_text() if source_file.exists() else "",
+            header=header_file.read_text() if header_file.exists() else "",
+        )
 
-    return process_call.returncode
 
 def tensor_arena_size() -> int:
     return __arena_size
@@ -0,0 +1,198 @@
+import functools
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Union
+
+# Directory of the cache used by convert when the environment variable is set
+CACHE_DIR_ENV = "XFORMER_CACHE_DIR"
+DEFAULT_MAX_SIZE = 2 * 1024 ** 3
+
+# Option naming the flash image written by xcore-opt, its path does not affect the output
+FLASH_IMAGE_OPTION = "xcore-flash-image-file"
+
+_MODEL_FILE = "model.tflite"
+_PARAMS_FILE = "params"
+_REPORT_FILE = "report.json"
+# Suffixes of the tflmc sources xcore-opt writes next to the output model
+SOURCE_SUFFIXES = (".cpp", ".h")
+
+
+class CacheEntry(NamedTuple):
+    model_path: Path
+    params_path: Optional[Path]
+    compilation_output: str
+    arena_size: int
+
+
+def xcore_opt_stat() -> str:
+    """Size and modification time of the xcore-opt on the path, part of every cache key.
+
+    A rebuilt xcore-opt usually reports the same version, its size or modification time
+    tells the conversions of the new binary apart from those of the old one.
+    """
+    path = shutil.which("xcore-opt")
+    if path is None:
+        return "unknown"
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return "unknown"
+    return "%d:%d" % (stat.st_size, stat.st_mtime_ns)
+
+
+def xcore_opt_version() -> str:
+    """Version of the xcore-opt on the path, part of every cache key."""
+    return _xcore_opt_version(xcore_opt_stat())
+
+
+@functools.lru_cache(maxsize=None)
+def _xcore_opt_version(stat: str) -> str:
+    """Version of the xcore-opt on the path, run once per binary."""
+    try:
+        process_call = subprocess.run(
+            ["xcore-opt", "--version"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return process_call.stdout.decode("utf-8").strip()
+
+
+class ConversionCache:
+    """On-disk cache of xcore-opt conversions, addressed by the hash of their inputs.
+
+    Entries are written to a temporary directory and renamed into place, so concurrent
+    processes never see partial entries and the first of several racing writers wins.
+    The least recently used entries are evicted when the cache exceeds max_size bytes.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, Path]] = None,
+        max_size: int = DEFAULT_MAX_SIZE,
+    ) -> None:
+        if directory is None:
+            directory = os.environ.get(CACHE_DIR_ENV) or (
+                Path.home() / ".cache" / "xmos_ai_tools" / "xformer"
+            )
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def key(
+        self, model: bytes, params: Optional[Dict[str, Optional[str]]] = None
+    ) -> str:
+        options = {}
+        for option, value in (params or {}).items():
+            if option == FLASH_IMAGE_OPTION:
+                value = ""
+            options[str(option)] = "" if value is None else str(value)
+        digest = hashlib.sha256()
+        stat = xcore_opt_stat()
+        digest.update(_xcore_opt_version(stat).encode("utf-8"))
+        digest.update(stat.encode("utf-8"))
+        digest.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+        digest.update(model)
+        return digest.hexdigest()
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(entry_dir / _REPORT_FILE) as report_fd:
+                report = json.load(report_fd)
+            # Mark the entry as recently used
+            os.utime(entry_dir)
+        except (OSError, ValueError):
+            return None
+        params_path = entry_dir / _PARAMS_FILE
+        return CacheEntry(
+            entry_dir / _MODEL_FILE,
+            params_path if report["has_params"] else None,
+            report["compilation_output"],
+            report["arena_size"],
+        )
+
+    def put(
+        self,
+        key: str,
+        model_path: Union[str, Path],
+        params_path: Optional[Union[str, Path]],
+        compilation_output: str,
+        arena_size: int,
+    ) -> None:
+        entry_dir = self._entry_dir(key)
+        if entry_dir.exists():
+            return
+        entry_dir.parent.mkdir(parents=True, exist_ok=True)
+
+        temp_dir = Path(tempfile.mkdtemp(prefix=".tmp-", dir=entry_dir.parent))
+        try:
+            shutil.copyfile(model_path, temp_dir / _MODEL_FILE)
+            for suffix in SOURCE_SUFFIXES:
+                source_path = Path(str(model_path) + suffix)
+                if source_path.exists():
+                    shutil.copyfile(source_path, temp_dir / (_MODEL_FILE + suffix))
+            has_params = params_path is not None and Path(params_path).exists()
+            if has_params:
+                shutil.copyfile(params_path, temp_dir / _PARAMS_FILE)
+            # The report is written last, an entry without one is never read
+            with open(temp_dir / _REPORT_FILE, "w") as report_fd:
+                json.dump(
+                    {
+                        "compilation_output": compilation_output,
+                        "arena_size": arena_size,
+                        "has_params": has_params,
+                    },
+                    report_fd,
+                )
+            os.replace(temp_dir, entry_dir)
+        except OSError:
+            # Another process stored the same entry first
+            pass
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        self.evict()
+
+    def size(self) -> int:
+        return sum(f.stat().st_size for f in self.directory.rglob("*") if f.is_file())
+
+    def evict(self) -> None:
+        entries = []
+        total = 0
+        for entry_dir in self.directory.glob("*/*"):
+            if entry_dir.name.startswith(".tmp-"):
+                continue
+            try:
+                size = sum(f.stat().st_size for f in entry_dir.iterdir())
+                entries.append((entry_dir.stat().st_mtime, size, entry_dir))
+            except OSError:
+                # Evicted by another process
+                continue
+            total += size
+
+        for _, size, entry_dir in sorted(entries):
+            if total <= self.max_size:
+                break
+            # Rename first so readers never see a partially deleted entry
+            doomed = entry_dir.parent / (".tmp-evict-" + entry_dir.name)
+            try:
+                os.replace(entry_dir, doomed)
+            except OSError:
+                continue
+            shutil.rmtree(doomed, ignore_errors=True)
+            total -= size
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.directory.mkdir(parents=True, exist_ok=True)
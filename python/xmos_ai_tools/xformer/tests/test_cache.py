@@ -0,0 +1,186 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+from xmos_ai_tools import xformer
+from xmos_ai_tools.xformer.cache import FLASH_IMAGE_OPTION, ConversionCache
+
+# Stands in for xcore-opt: copies the model, writes the tflmc sources and the flash
+# image, reports an arena size and counts its runs
+FAKE_XCORE_OPT = """#!{python}
+import sys
+from pathlib import Path
+
+args = sys.argv[1:]
+if args == ["--version"]:
+    print("fake xcore-opt 1.0")
+    sys.exit(0)
+out = Path(args[args.index("-o") + 1])
+out.write_bytes(Path(args[-1]).read_bytes()[::-1])
+Path(str(out) + ".cpp").write_text("source")
+Path(str(out) + ".h").write_text("header")
+for arg in args:
+    if arg.startswith("--{flash_image}="):
+        Path(arg.split("=", 1)[1]).write_bytes(b"params")
+runs = Path(__file__).with_name("runs")
+runs.write_text(str(int(runs.read_text()) + 1) if runs.exists() else "1")
+print("Tensor arena size : 4321")
+"""
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ConversionCache(tmp_path / "cache")
+
+
+@pytest.fixture
+def xcore_opt(tmp_path, monkeypatch):
+    """! A fake xcore-opt on the path, returns a function reading its number of runs."""
+    if sys.platform == "win32":
+        pytest.skip("the fake xcore-opt is a script")
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "xcore-opt"
+    script.write_text(
+        FAKE_XCORE_OPT.format(python=sys.executable, flash_image=FLASH_IMAGE_OPTION)
+    )
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir) + os.pathsep + os.environ["PATH"])
+    runs = bin_dir / "runs"
+    return lambda: int(runs.read_text()) if runs.exists() else 0
+
+
+def _put(cache, tmp_path, key, model=b"model", params=None):
+    model_path = tmp_path / "out.tflite"
+    model_path.write_bytes(model)
+    Path(str(model_path) + ".cpp").write_text("source")
+    params_path = None
+    if params is not None:
+        params_path = tmp_path / "out.params"
+        params_path.write_bytes(params)
+    cache.put(key, model_path, params_path, "report", 1234)
+
+
+def test_key(cache):
+    key = cache.key(b"model", {"a": None, "b": "1"})
+
+    assert key == cache.key(b"model", {"b": "1", "a": ""})
+    assert key != cache.key(b"other model", {"a": None, "b": "1"})
+    assert key != cache.key(b"model", {"a": None, "b": "2"})
+    assert key != cache.key(b"model", {"a": None})
+    # The path of the flash image does not change the conversion
+    assert cache.key(b"model", {FLASH_IMAGE_OPTION: "x.params"}) == cache.key(
+        b"model", {FLASH_IMAGE_OPTION: "y.params"}
+    )
+
+
+def test_put_get(cache, tmp_path):
+    key = cache.key(b"model")
+    assert cache.get(key) is None
+
+    _put(cache, tmp_path, key, params=b"params")
+    entry = cache.get(key)
+
+    assert entry.model_path.read_bytes() == b"model"
+    assert Path(str(entry.model_path) + ".cpp").read_text() == "source"
+    assert not Path(str(entry.model_path) + ".h").exists()
+    assert entry.params_path.read_bytes() == b"params"
+    assert entry.compilation_output == "report"
+    assert entry.arena_size == 1234
+
+
+def test_put_keeps_first_entry(cache, tmp_path):
+    key = cache.key(b"model")
+    _put(cache, tmp_path, key)
+    _put(cache, tmp_path, key, model=b"second")
+
+    entry = cache.get(key)
+    assert entry.model_path.read_bytes() == b"model"
+    assert entry.params_path is None
+    # No temporary directories are left behind
+    assert [p.name for p in cache.directory.glob("*/*")] == [key]
+
+
+def test_evict_least_recently_used(cache, tmp_path):
+    keys = [cache.key(bytes([i])) for i in range(3)]
+    for i, key in enumerate(keys):
+        _put(cache, tmp_path, key, model=bytes(1000))
+        os.utime(cache.get(key).model_path.parent, (i, i))
+    # Reading the oldest entry makes it the most recently used
+    cache.get(keys[0])
+
+    cache.max_size = cache.size() - 1
+    cache.evict()
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[2]) is not None
+
+
+def test_clear(cache, tmp_path):
+    key = cache.key(b"model")
+    _put(cache, tmp_path, key)
+    cache.clear()
+
+    assert cache.get(key) is None
+    assert cache.size() == 0
+
+
+def test_convert_bytes_cached(cache, xcore_opt):
+    result = xformer.convert_bytes(b"model", cache=cache, xcore_flash_image_file=True)
+    assert xcore_opt() == 1
+
+    cached = xformer.convert_bytes(b"model", cache=cache, xcore_flash_image_file=True)
+    assert xcore_opt() == 1
+    assert cached == result
+    assert result.model == b"ledom"
+    assert result.params == b"params"
+    assert (result.source, result.header) == ("source", "header")
+    assert result.arena_size == 4321
+
+    xformer.convert_bytes(b"other model", cache=cache)
+    assert xcore_opt() == 2
+
+
+def test_convert_after_eviction(cache, xcore_opt, tmp_path):
+    xformer.convert_bytes(b"model", cache=cache)
+    # An entry evicted between the lookup and the copy is converted again
+    cache.get(cache.key(b"model", {})).model_path.unlink()
+
+    model_path = tmp_path / "model.tflite"
+    model_path.write_bytes(b"model")
+    outfile = tmp_path / "out.tflite"
+    xformer.convert(model_path, outfile, {}, cache)
+    assert xcore_opt() == 2
+    assert outfile.read_bytes() == b"ledom"
+
+
+def test_no_cache(xcore_opt, monkeypatch):
+    monkeypatch.delenv("XFORMER_CACHE_DIR", raising=False)
+    xformer.convert_bytes(b"model")
+    xformer.convert_bytes(b"model")
+
+    assert xcore_opt() == 2
+
+
+def test_rebuilt_xcore_opt(cache, xcore_opt):
+    script = Path(shutil.which("xcore-opt"))
+    xformer.convert_bytes(b"model", cache=cache)
+    key = cache.key(b"model", {})
+
+    # A rebuild reporting the same version, of another size
+    script.write_text(script.read_text() + "\n")
+    assert cache.key(b"model", {}) != key
+    xformer.convert_bytes(b"model", cache=cache)
+    assert xcore_opt() == 2
+
+    # The same size, modified again
+    key = cache.key(b"model", {})
+    stat = script.stat()
+    os.utime(script, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert cache.key(b"model", {}) != key
@@ -1,2 +1,27 @@
-from .host.host_interpreter import xcore_tflm_host_interpreter
-from .device.device_interpreter import xcore_tflm_usb_interpreter
+import importlib
+from typing import Any, List
+
+# Interpreter classes and the submodules defining them, imported on first access so
+# that importing this package does not load the host library or the device support
+_LAZY_ATTRIBUTES = {
+    "xcore_tflm_host_interpreter": ".host.host_interpreter",
+    "xcore_tflm_usb_interpreter": ".device.device_interpreter",
+    "xcore_tflm_host_interpreter_pool": ".host.host_interpreter_pool",
+    "xcore_tflm_async_interpreter": ".base.async_interpreter",
+    "xcore_tflm_usb_interpreter_pool": ".device.device_interpreter_pool",
+    "xcore_tflm_emulated_interpreter": ".device.emulator",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,114 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Sequence, Union
+
+from numpy import ndarray
+
+from xmos_ai_tools.xinterpreters.base.base_interpreter import (
+    xcore_tflm_base_interpreter,
+)
+
+
+class xcore_tflm_async_interpreter:
+    """! asyncio front end for the host and device interpreters.
+    The blocking interpreter calls run on a single worker thread owned by this object, so
+    they do not stall the event loop. Calls are queued on that thread and run one at a time in
+    the order they were awaited, serialising access to the interpreter and its device.
+    """
+
+    def __init__(self, interpreter: xcore_tflm_base_interpreter) -> None:
+        """! Async interpreter initializer.
+        @param interpreter  The host or device interpreter to wrap.
+        """
+        self.interpreter = interpreter
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="xcore_tflm_async"
+        )
+
+    async def __aenter__(self) -> "xcore_tflm_async_interpreter":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback) -> None:
+        """! Exit calls close function to delete interpreter"""
+        await self.close()
+
+    async def _run(self, function: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """! Run a blocking call on the interpreter's worker thread.
+        @param function  The function to call.
+        @return  The result of the call.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(function, *args, **kwargs)
+        )
+
+    async def set_model(self, *args: Any, **kwargs: Any) -> None:
+        """! Adds a model to the interpreter, see xcore_tflm_base_interpreter.set_model."""
+        await self._run(self.interpreter.set_model, *args, **kwargs)
+
+    async def set_tensor(self, tensor_index: int, value: ndarray, model_index: int = 0) -> None:
+        """! Write the input tensor of a model.
+        @param tensor_index  The index of input tensor to target.
+        @param value  The blob of data to set the tensor to.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        """
+        await self._run(self.interpreter.set_tensor, tensor_index, value, model_index)
+
+    async def invoke(self, model_index: int = 0) -> None:
+        """! Invoke the model and start inference of the current state of the tensors.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        """
+        await self._run(self.interpreter.invoke, model_index)
+
+    async def get_tensor(
+        self, tensor_index: int = 0, model_index: int = 0, out: ndarray = None
+    ) -> ndarray:
+        """! Read data from the output tensor of a model.
+        @param tensor_index  The index of output tensor to target.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        @param out  Array of correct size to write into (optional).
+        @return  The data that was stored in the output tensor.
+        """
+        return await self._run(
+            self.interpreter.get_tensor, tensor_index, model_index, out=out
+        )
+
+    async def get_input_tensor(self, input_index: int = 0, model_index: int = 0) -> Any:
+        """! Read the data in the input tensor of a model.
+        @param input_index  The index of input tensor to target.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        @return The data that was stored in the input tensor.
+        """
+        return await self._run(self.interpreter.get_input_tensor, input_index, model_index)
+
+    async def run(
+        self, inputs: Union[ndarray, Sequence[ndarray]], model_index: int = 0
+    ) -> Union[ndarray, List[ndarray]]:
+        """! Set the inputs, invoke and read the outputs as a single queued call.
+        @param inputs  An array for single input models, or a sequence with one array per input.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        @return  The output array, or a list of output arrays for models with multiple outputs.
+        """
+        return await self._run(self.interpreter.run, inputs, model_index)
+
+    async def call(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        """! Call any other interpreter method on the worker thread.
+        @param name  Name of the interpreter method, e.g. "reset" or "read_times".
+        @return  The result of the call.
+        """
+        return await self._run(getattr(self.interpreter, name), *args, **kwargs)
+
+    async def close(self, model_index: int = 0) -> None:
+        """! Delete the interpreter and stop the worker thread.
+        @params model_index Defines which interpreter to target in systems with multiple.
+        """
+        await self._run(self.interpreter.close, model_index)
+        self._executor.shutdown(wait=False)
@@ -1,8 +1,10 @@
 # Copyright 2022 XMOS LIMITED. This Software is subject to the terms of the
 # XMOS Public License: Version 1
+import mmap
+import os
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Union, Type, Optional, Any, List, Tuple, Dict
+from typing import Union, Type, Optional, Any, List, Tuple, Dict, Sequence
 
 from numpy import ndarray
 from tflite import opcode2name
@@ -10,10 +12,186 @@ from tflite.Model import Model
 from tflite.TensorType import TensorType
 import numpy as np
 
+from xmos_ai_tools.xinterpreters.base.memory_plan import MemoryPlanEntry, plan_memory
+from xmos_ai_tools.xinterpreters.base.quantization import TensorQuantizer
+
 class XTFLMInterpreterStatus(Enum):
     OK = 0
     ERROR = 1
 
+# Numpy data types of the tensor types supported by the interpreters
+TENSOR_TYPE_TO_DTYPE: Dict[int, Type[Any]] = {
+    TensorType.INT8: np.int8,
+    TensorType.INT16: np.int16,
+    TensorType.INT32: np.int32,
+    TensorType.INT64: np.int64,
+    TensorType.UINT8: np.uint8,
+    TensorType.FLOAT16: np.float16,
+    TensorType.FLOAT32: np.float32,
+    TensorType.BOOL: np.bool_,
+}
+
+
+class TensorDetails:
+    """! Immutable details of a single tensor.
+    Extracted once from the model flatbuffer so that tensor metadata can be read
+    without re-parsing the model.
+    """
+
+    __slots__ = (
+        "index",
+        "name",
+        "shape",
+        "shape_signature",
+        "tensor_type",
+        "dtype",
+        "size",
+        "scales",
+        "zero_points",
+        "quantized_dimension",
+        "sparsity",
+        "is_constant",
+        "is_variable",
+    )
+
+    def __init__(self, model: Model, tensor_index: int) -> None:
+        """! Tensor details initializer.
+        @param model The parsed model flatbuffer.
+        @param tensor_index The index of the tensor in the first subgraph.
+        """
+        tensor = model.Subgraphs(0).Tensors(tensor_index)
+        set_ = super().__setattr__
+
+        shape = tensor.ShapeAsNumpy()
+        if not isinstance(shape, np.ndarray):
+            shape = np.zeros(0, dtype=np.int32)
+        shape_signature = tensor.ShapeSignatureAsNumpy()
+        if not isinstance(shape_signature, np.ndarray):
+            shape_signature = shape.copy()
+        shape.flags.writeable = False
+        shape_signature.flags.writeable = False
+
+        tensor_type = tensor.Type()
+        dtype = TENSOR_TYPE_TO_DTYPE.get(tensor_type)
+        size: Optional[int] = None
+        if dtype is not None:
+            size = int(np.dtype(dtype).itemsize * np.prod(shape, dtype=np.int64))
+
+        scales = np.zeros(0, dtype=np.float32)
+        zero_points = np.zeros(0, dtype=np.int64)
+        quantized_dimension = 0
+        quantization = tensor.Quantization()
+        if quantization is not None:
+            if quantization.ScaleLength():
+                scales = quantization.ScaleAsNumpy()
+            if quantization.ZeroPointLength():
+                zero_points = quantization.ZeroPointAsNumpy()
+            quantized_dimension = quantization.QuantizedDimension()
+        scales.flags.writeable = False
+        zero_points.flags.writeable = False
+
+        # Buffer 0 is the empty sentinel buffer, any other buffer with data is a constant
+        buffer = model.Buffers(tensor.Buffer())
+        is_constant = buffer is not None and buffer.DataLength() > 0
+
+        set_("index", tensor_index)
+        set_("name", tensor.Name().decode("utf-8"))
+        set_("shape", shape)
+        set_("shape_signature", shape_signature)
+        set_("tensor_type", tensor_type)
+        set_("dtype", dtype)
+        set_("size", size)
+        set_("scales", scales)
+        set_("zero_points", zero_points)
+        set_("quantized_dimension", quantized_dimension)
+        set_("sparsity", tensor.Sparsity())
+        set_("is_constant", is_constant)
+        set_("is_variable", bool(tensor.IsVariable()))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(index={self.index}, name={self.name!r}, "
+            f"shape={self.shape.tolist()}, dtype={getattr(self.dtype, '__name__', None)})"
+        )
+
+    @property
+    def quantization(self) -> Tuple[float, int]:
+        """! The per-tensor (scale, zero point) pair, (0.0, 0) if not quantized."""
+        if len(self.scales) == 0:
+            return (0.0, 0)
+        zero_point = int(self.zero_points[0]) if len(self.zero_points) else 0
+        return (float(self.scales[0]), zero_point)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """! Tensor details in the dictionary layout used by tf.lite.Interpreter.
+        @return Tensor details, including the index, name, shape, data type, and quantization
+        parameters.
+        """
+        return {
+            "name": self.name,
+            "index": self.index,
+            "shape": self.shape,
+            "shape_signature": self.shape_signature,
+            "dtype": self.dtype,
+            "quantization": self.quantization,
+            "quantization_parameters": {
+                "scales": self.scales,
+                "zero_points": self.zero_points,
+                "quantized_dimension": self.quantized_dimension,
+            },
+            "sparsity_parameters": {self.sparsity},
+        }
+
+
+class ModelIndex:
+    """! Immutable index of the tensors of a model.
+    Built once per model, holds the details of every tensor and of the model
+    inputs and outputs.
+    """
+
+    __slots__ = ("tensors", "inputs", "outputs", "_input_positions", "_output_positions")
+
+    def __init__(self, model_content: bytes) -> None:
+        """! Model index initializer.
+        @param model_content The model flatbuffer (byte array).
+        """
+        model = Model.GetRootAsModel(model_content, 0)
+        subgraph = model.Subgraphs(0)
+        set_ = super().__setattr__
+
+        tensors = tuple(
+            TensorDetails(model, i) for i in range(subgraph.TensorsLength())
+        )
+        input_indices = [subgraph.Inputs(i) for i in range(subgraph.InputsLength())]
+        output_indices = [subgraph.Outputs(i) for i in range(subgraph.OutputsLength())]
+
+        set_("tensors", tensors)
+        set_("inputs", tuple(tensors[i] for i in input_indices))
+        set_("outputs", tuple(tensors[i] for i in output_indices))
+        set_("_input_positions", {t: n for n, t in enumerate(input_indices)})
+        set_("_output_positions", {t: n for n, t in enumerate(output_indices)})
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def input_position(self, tensor_index: int) -> Optional[int]:
+        """! Position of a tensor in the model inputs.
+        @param tensor_index The index of the tensor in the model.
+        @return The input position, or None if the tensor is not an input.
+        """
+        return self._input_positions.get(tensor_index)
+
+    def output_position(self, tensor_index: int) -> Optional[int]:
+        """! Position of a tensor in the model outputs.
+        @param tensor_index The index of the tensor in the model.
+        @return The output position, or None if the tensor is not an output.
+        """
+        return self._output_positions.get(tensor_index)
+
+
 class xcore_tflm_base_interpreter(ABC):
     """! The xcore interpreters base class.
     Defines a common base interface to be used by the host and device interpreters.
@@ -44,12 +222,19 @@ class xcore_tflm_base_interpreter(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def get_tensor(self, tensor_index: int = 0, model_index: int = 0, tensor: ndarray = None) -> ndarray:
+    def get_tensor(
+        self,
+        tensor_index: int = 0,
+        model_index: int = 0,
+        tensor: ndarray = None,
+        out: ndarray = None,
+    ) -> ndarray:
         """! Abstract method for reading data from the output tensor of a model.
         @param tensor_index  The index of output tensor to target.
         @param model_index  The model to target, for interpreters that support multiple models
         running concurrently. Defaults to 0 for use with a single model.
-        @param tensor  Tensor of correct shape to write into (optional).
+        @param tensor  Tensor of correct shape to write into (optional), alias of out.
+        @param out  Array of correct size to write into (optional).
         @return  The data that was stored in the output tensor.
         """
         raise NotImplementedError
@@ -64,6 +249,112 @@ class xcore_tflm_base_interpreter(ABC):
         """
         raise NotImplementedError
 
+    def set_all_inputs(
+        self, inputs: Union[ndarray, Sequence[ndarray]], model_index: int = 0
+    ) -> None:
+        """! Write every input tensor of a model.
+        @param inputs  An array for single input models, or a sequence with one array per input.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        """
+        for position, value in enumerate(self._input_list(inputs, model_index)):
+            self._set_input(position, value, model_index)
+
+    def _input_list(
+        self, inputs: Union[ndarray, Sequence[ndarray]], model_index: int = 0
+    ) -> Sequence[ndarray]:
+        """! Get the inputs of set_all_inputs as a sequence with one array per input.
+        An array is the only input of the model, any other sequence holds one array per input.
+        @param inputs  An array, or a sequence with one array per input.
+        @param model_index  The model to target.
+        @return  The sequence of input arrays.
+        """
+        if isinstance(inputs, ndarray):
+            inputs = [inputs]
+        count = len(self.get_model(model_index).index.inputs)
+        if len(inputs) != count:
+            raise ValueError("model has %d inputs, %d given" % (count, len(inputs)))
+        return inputs
+
+    def _set_input(self, position: int, value: ndarray, model_index: int = 0) -> None:
+        """! Write an input tensor of a model, addressed by its position in the model inputs.
+        @param position  The position of the tensor in the model inputs.
+        @param value  The blob of data to set the tensor to.
+        @param model_index  The model to target.
+        """
+        details = self.get_model(model_index).index.inputs[position]
+        self.set_tensor(details.index, value, model_index)
+
+    def set_tensor_float(
+        self, tensor_index: int, value: Any, model_index: int = 0
+    ) -> None:
+        """! Quantize float data and write it to an input tensor of a model.
+        @param tensor_index  The index of the input tensor in the model, as in
+        get_input_details.
+        @param value  Float data with the shape of the tensor.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        """
+        position = self.get_model(model_index).index.input_position(tensor_index)
+        if position is None:
+            raise IndexError(f"No tensor at index {tensor_index} found.")
+        value = self._quantizer(tensor_index, model_index).quantize(value)
+        self._set_input(position, value, model_index)
+
+    def get_tensor_float(
+        self, tensor_index: int = 0, model_index: int = 0, out: ndarray = None
+    ) -> ndarray:
+        """! Read an output tensor of a model and dequantize it to float32.
+        @param tensor_index  The index of the output tensor in the model, as in
+        get_output_details.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        @param out  Float32 array of the tensor shape to write into (optional).
+        @return  The dequantized data of the output tensor.
+        """
+        data = self.get_tensor(tensor_index, model_index)
+        return self._quantizer(tensor_index, model_index).dequantize(data, out)
+
+    def _quantizer(self, tensor_index: int, model_index: int = 0) -> TensorQuantizer:
+        """! Get the cached quantizer of a tensor, creating it on first use.
+        @param tensor_index  The index of the tensor in the model.
+        @param model_index  The model to target.
+        @return The quantizer of the tensor.
+        """
+        model = self.get_model(model_index)
+        quantizer = model.quantizers.get(tensor_index)
+        if quantizer is None:
+            quantizer = TensorQuantizer(model.index.tensors[tensor_index])
+            model.quantizers[tensor_index] = quantizer
+        return quantizer
+
+    def get_all_outputs(self, model_index: int = 0) -> List[ndarray]:
+        """! Read every output tensor of a model.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        @return  List with the data of each output tensor.
+        """
+        return [
+            self.get_tensor(details.index, model_index)
+            for details in self.get_model(model_index).index.outputs
+        ]
+
+    def run(
+        self, inputs: Union[ndarray, Sequence[ndarray]], model_index: int = 0
+    ) -> Union[ndarray, List[ndarray]]:
+        """! Set the inputs of a model, invoke it and read its outputs.
+        @param inputs  An array for single input models, or a sequence with one array per input.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        @return  The output array, or a list of output arrays for models with multiple outputs.
+        """
+        self.set_all_inputs(inputs, model_index)
+        self.invoke(model_index)
+        outputs = self.get_all_outputs(model_index)
+        if len(outputs) == 1:
+            return outputs[0]
+        return outputs
+
     @abstractmethod
     def invoke(self, model_index: int = 0) -> None:
         """! Abstract method for invoking the model and starting inference of the current
@@ -79,8 +370,10 @@ class xcore_tflm_base_interpreter(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def tensor_arena_size(self) -> int:
+    def tensor_arena_size(self, model_index: int = 0) -> int:
         """! Abstract method to read the size of the tensor arena required.
+        @param model_index The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
         @return size of the tensor arena as an integer.
         """
         raise NotImplementedError
@@ -93,8 +386,11 @@ class xcore_tflm_base_interpreter(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def print_memory_plan(self) -> None:
-        """! Abstract method to print a plan of memory allocation"""
+    def print_memory_plan(self, model_index: int = 0) -> None:
+        """! Abstract method to print a plan of memory allocation
+        @param model_index The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        """
         raise NotImplementedError
 
     def get_input_tensor_size(self, input_index: int = 0, model_index: int = 0) -> int:
@@ -104,34 +400,8 @@ class xcore_tflm_base_interpreter(ABC):
         running concurrently. Defaults to 0 for use with a single model.
         @return The size of the input tensor as an integer.
         """
-
-        # Select correct model from model list
-        model = self.get_model(model_index)
-        modelBuf = Model.GetRootAsModel(model.model_content, 0)
-
-        # Get index of specific input tensor
-        tensorIndex = modelBuf.Subgraphs(0).Inputs(input_index)
-
-        tensorType = modelBuf.Subgraphs(0).Tensors(tensorIndex).Type()
-
-        tensorSize: int
-        if tensorType == TensorType.INT8:
-            tensorSize = 1  # int8 is 1 byte
-        elif tensorType == TensorType.INT32:
-            tensorSize = 4  # int32 is 4 bytes
-        elif tensorType == TensorType.FLOAT32:
-            tensorSize = 4  # float32 is 4 bytes
-        else:
-            print(tensorType)
-            self._check_status(XTFLMInterpreterStatus.ERROR)
-            tensorSize = 0
-
-        # Calculate tensor size by multiplying shape elements
-        for i in range(0, modelBuf.Subgraphs(0).Tensors(tensorIndex).ShapeLength()):
-            tensorSize = tensorSize * modelBuf.Subgraphs(0).Tensors(tensorIndex).Shape(
-                i
-            )
-        return tensorSize
+        details = self.get_model(model_index).index.inputs[input_index]
+        return self._tensor_size(details)
 
     def get_output_tensor_size(
         self, output_index: int = 0, model_index: int = 0
@@ -142,35 +412,8 @@ class xcore_tflm_base_interpreter(ABC):
         running concurrently. Defaults to 0 for use with a single model.
         @return The size of the output tensor as an integer.
         """
-
-        # Select correct model from model list
-        modelBuf = None
-        model = self.get_model(model_index)
-        modelBuf = Model.GetRootAsModel(model.model_content, 0)
-
-        # Get index of specific output tensor
-        tensorIndex = modelBuf.Subgraphs(0).Outputs(output_index)
-
-        tensorType = modelBuf.Subgraphs(0).Tensors(tensorIndex).Type()
-
-        tensorSize: int
-        if tensorType == TensorType.INT8:
-            tensorSize = 1  # int8 is 1 byte
-        elif tensorType == TensorType.INT32:
-            tensorSize = 4  # int32 is 4 bytes
-        elif tensorType == TensorType.FLOAT32:
-            tensorSize = 4  # float32 is 4 bytes
-        else:
-            print(tensorType)
-            self._check_status(XTFLMInterpreterStatus.ERROR)
-            tensorSize = 0
-
-        # Calculate tensor size by multiplying shape elements
-        for i in range(0, modelBuf.Subgraphs(0).Tensors(tensorIndex).ShapeLength()):
-            tensorSize = tensorSize * modelBuf.Subgraphs(0).Tensors(tensorIndex).Shape(
-                i
-            )
-        return tensorSize
+        details = self.get_model(model_index).index.outputs[output_index]
+        return self._tensor_size(details)
 
     def get_tensor_size(self, tensor_index: int = 0, model_index: int = 0) -> int:
         """! Read the size of the input tensor from the model.
@@ -179,29 +422,29 @@ class xcore_tflm_base_interpreter(ABC):
         running concurrently. Defaults to 0 for use with a single model.
         @return The size of the input tensor as an integer.
         """
+        details = self.get_model(model_index).index.tensors[tensor_index]
+        return self._tensor_size(details)
 
-        # Select correct model from model list
-        modelBuf = None
-        model = self.get_model(model_index)
-        modelBuf = Model.GetRootAsModel(model.model_content, 0)
-
-        tensorType = modelBuf.Subgraphs(0).Tensors(tensor_index).Type()
-        if tensorType == TensorType.INT8:
-            tensorSize = 1  # int8 is 1 byte
-        elif tensorType == TensorType.INT32:
-            tensorSize = 4  # int32 is 4 bytes
-        elif tensorType == TensorType.FLOAT32:
-            tensorSize = 4  # float32 is 4 bytes
-        else:
-            print(tensorType)
+    def _tensor_size(self, details: "TensorDetails") -> int:
+        """! Read the byte size of a tensor, raising for unsupported tensor types.
+        @param details The tensor details from the model index.
+        @return The size of the tensor as an integer.
+        """
+        if details.size is None:
+            print(details.tensor_type)
             self._check_status(XTFLMInterpreterStatus.ERROR)
+            return 0
+        return details.size
 
-        # Calculate tensor size by multiplying shape elements
-        for i in range(0, modelBuf.Subgraphs(0).Tensors(tensor_index).ShapeLength()):
-            tensorSize = tensorSize * modelBuf.Subgraphs(0).Tensors(tensor_index).Shape(
-                i
-            )
-        return tensorSize
+    def get_memory_plan(self, model_index: int = 0) -> List[MemoryPlanEntry]:
+        """! Estimate the placement of the model's tensors in the tensor arena, see
+        plan_memory. Interpreters that can read the plan they use return that instead.
+        @param model_index The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        @return Offset, size, first use and last use of each non-constant tensor.
+        """
+        model = self.get_model(model_index)
+        return plan_memory(model.model_content, model.index)
 
     def get_input_details(self, model_index: int = 0) -> List[Dict[str, Any]]:
         """! Reads the input tensor details from the model.
@@ -210,135 +453,22 @@ class xcore_tflm_base_interpreter(ABC):
         @return Tensor details, including the index, name, shape, data type, and quantization
         parameters.
         """
-
-        # Select correct model from model list
-        modelBuf = None
-        model = self.get_model(model_index)
-        modelBuf = Model.GetRootAsModel(model.model_content, 0)
-
-        inputsList = []
-        for input_ in range(0, modelBuf.Subgraphs(0).InputsLength()):
-
-            tensorIndex = modelBuf.Subgraphs(0).Inputs(input_)
-
-            # Generate dictioary of tensor details
-            dtype: Union[Type[Any]]
-            if modelBuf.Subgraphs(0).Tensors(tensorIndex).Type() == TensorType.INT8:
-                dtype = np.int8
-            elif modelBuf.Subgraphs(0).Tensors(tensorIndex).Type() == TensorType.INT32:
-                dtype = np.int32
-            elif modelBuf.Subgraphs(0).Tensors(tensorIndex).Type() == TensorType.FLOAT32:
-                dtype = np.float32
-            else:
-                raise Exception
-
-            details = {
-                "name": str(modelBuf.Subgraphs(0).Tensors(tensorIndex).Name())[
-                    1:
-                ].strip("'"),
-                "index": tensorIndex,
-                "shape": modelBuf.Subgraphs(0).Tensors(tensorIndex).ShapeAsNumpy(),
-                "shape_signature": modelBuf.Subgraphs(0)
-                .Tensors(tensorIndex)
-                .ShapeSignatureAsNumpy(),
-                "dtype": dtype,
-                "quantization": (
-                    modelBuf.Subgraphs(0).Tensors(tensorIndex).Quantization().Scale(0),
-                    modelBuf.Subgraphs(0)
-                    .Tensors(tensorIndex)
-                    .Quantization()
-                    .ZeroPoint(0),
-                ),
-                "quantization_parameters": {
-                    "scales": modelBuf.Subgraphs(0)
-                    .Tensors(tensorIndex)
-                    .Quantization()
-                    .ScaleAsNumpy(),
-                    "zero_points": modelBuf.Subgraphs(0)
-                    .Tensors(tensorIndex)
-                    .Quantization()
-                    .ZeroPointAsNumpy(),
-                    "quantized_dimension": modelBuf.Subgraphs(0)
-                    .Tensors(tensorIndex)
-                    .Quantization()
-                    .QuantizedDimension(),
-                },
-                "sparsity_parameters": {
-                    modelBuf.Subgraphs(0).Tensors(tensorIndex).Sparsity()
-                },
-            }
-            inputsList.append(details)
-
-        return inputsList
+        return [
+            details.to_dict() for details in self.get_model(model_index).index.inputs
+        ]
 
     def get_output_details(
             self, model_index: int = 0
     ) -> List[Dict[str, Any]]:
         """! Reads the output tensor details from the model.
-        @param output_index  The index of output tensor to target.
         @param model_index The model to target, for interpreters that support multiple models
         running concurrently. Defaults to 0 for use with a single model.
         @return Tensor details, including the index, name, shape, data type, and quantization
         parameters.
         """
-
-        # Select correct model from models list
-        model = self.get_model(model_index)
-        modelBuf = Model.GetRootAsModel(model.model_content, 0)
-
-        outputsList = []
-        for output_ in range(0, modelBuf.Subgraphs(0).OutputsLength()):
-
-            # Output tensor is last tensor
-            tensorIndex = modelBuf.Subgraphs(0).Outputs(output_)
-
-            dtype: Union[Type[Any]]
-            # Generate dictionary of tensor details
-            if modelBuf.Subgraphs(0).Tensors(tensorIndex).Type() == TensorType.INT8:
-                dtype = np.int8
-            elif modelBuf.Subgraphs(0).Tensors(tensorIndex).Type() == TensorType.INT32:
-                dtype = np.int32
-            elif modelBuf.Subgraphs(0).Tensors(tensorIndex).Type() == TensorType.FLOAT32:
-                dtype = np.float32
-
-            details = {
-                "name": str(modelBuf.Subgraphs(0).Tensors(tensorIndex).Name())[
-                    1:
-                ].strip("'"),
-                "index": tensorIndex,
-                "shape": modelBuf.Subgraphs(0).Tensors(tensorIndex).ShapeAsNumpy(),
-                "shape_signature": modelBuf.Subgraphs(0)
-                .Tensors(tensorIndex)
-                .ShapeSignatureAsNumpy(),
-                "dtype": dtype,
-                "quantization": (
-                    modelBuf.Subgraphs(0).Tensors(tensorIndex).Quantization().Scale(0),
-                    modelBuf.Subgraphs(0)
-                    .Tensors(tensorIndex)
-                    .Quantization()
-                    .ZeroPoint(0),
-                ),
-                "quantization_parameters": {
-                    "scales": modelBuf.Subgraphs(0)
-                    .Tensors(tensorIndex)
-                    .Quantization()
-                    .ScaleAsNumpy(),
-                    "zero_points": modelBuf.Subgraphs(0)
-                    .Tensors(tensorIndex)
-                    .Quantization()
-                    .ZeroPointAsNumpy(),
-                    "quantized_dimension": modelBuf.Subgraphs(0)
-                    .Tensors(tensorIndex)
-                    .Quantization()
-                    .QuantizedDimension(),
-                },
-                "sparsity_parameters": {
-                    modelBuf.Subgraphs(0).Tensors(tensorIndex).Sparsity()
-                },
-            }
-            outputsList.append(details)
-
-        return outputsList
+        return [
+            details.to_dict() for details in self.get_model(model_index).index.outputs
+        ]
 
     def set_model(
         self,
@@ -349,6 +479,7 @@ class xcore_tflm_base_interpreter(ABC):
         model_index: int = 0,
         secondary_memory: bool = False,
         flash: bool = False,
+        use_mmap: bool = False,
     ) -> None:
         """! Adds a model to the interpreter's list of models.
         @param model_path The path to the model file (.tflite), alternative to model_content.
@@ -359,15 +490,17 @@ class xcore_tflm_base_interpreter(ABC):
         alternative to params_path (optional).
         @param model_index The model to target, for interpreters that support multiple models
         running concurrently. Defaults to 0 for use with a single model.
+        @param use_mmap Memory-map model_path and params_path instead of reading them, so the
+        file contents are shared through the page cache rather than copied.
         """
 
         # Check model_path or model_content is valid
         if type(model_path) == str or model_content is not None:
             tile_found = False
             # Find correct model and replace
-            for model in self.models:
+            for i, model in enumerate(self.models):
                 if model.tile == model_index:
-                    model = self.modelData(
+                    self.models[i] = self.modelData(
                         model_path,
                         model_content,
                         params_path,
@@ -375,6 +508,7 @@ class xcore_tflm_base_interpreter(ABC):
                         model_index,
                         secondary_memory,
                         flash,
+                        use_mmap=use_mmap,
                     )
                     tile_found = True
                     break
@@ -389,6 +523,7 @@ class xcore_tflm_base_interpreter(ABC):
                         model_index,
                         secondary_memory,
                         flash,
+                        use_mmap=use_mmap,
                     )
                 )
             self.initialise_interpreter(model_index)
@@ -412,6 +547,7 @@ class xcore_tflm_base_interpreter(ABC):
             model_index: int,
             secondary_memory: bool,
             flash: bool,
+            use_mmap: bool = False,
         ):
             """! Model data initializer.
             Sets up variables, generates a list of operators used in the model,
@@ -422,6 +558,7 @@ class xcore_tflm_base_interpreter(ABC):
             @param params_content Model parameters content (byte array)
             @param model_index The model to target, for interpreters that support multiple models
             running concurrently. Defaults to 0 for use with a single model.
+            @param use_mmap Memory-map the model and params paths instead of reading them.
             """
             self.model_path: Optional[str] = model_path
             self.model_content: Optional[bytes] = model_content
@@ -430,9 +567,13 @@ class xcore_tflm_base_interpreter(ABC):
             self.tile: int = model_index
             self.secondary_memory = secondary_memory
             self.flash = flash
+            self.use_mmap = use_mmap
             self.opList: List[str] = []
             self.pathToContent()
             self.modelToOpList()
+            self.index = ModelIndex(self.model_content)
+            # Quantizers of the tensors read or written as float, by tensor index
+            self.quantizers: Dict[int, TensorQuantizer] = {}
 
         def modelToOpList(self) -> None:
             """! Generates operator list from model."""
@@ -459,14 +600,23 @@ class xcore_tflm_base_interpreter(ABC):
 
             # Check if path exists but not content
             if self.model_content is None and self.model_path is not None:
-                with open(self.model_path, "rb") as input_fd:
-                    self.model_content = input_fd.read()
+                self.model_content = self.readContent(self.model_path)
 
             # Check if params_path exists but not params_content
             if self.params_content is None and self.params_path is not None:
-                with open(self.params_path, "rb") as input_fd2:
-                    self.params_content = input_fd2.read()
- 
+                self.params_content = self.readContent(self.params_path)
+
             # If params_content is None, set to empty byte array
             if self.params_content is None:
                 self.params_content = bytes([])
+
+        def readContent(self, path: str) -> Union[bytes, mmap.mmap]:
+            """! Reads a file to content, memory-mapped read only if use_mmap is set.
+            @param path Path to the file.
+            @return The file content.
+            """
+            with open(path, "rb") as input_fd:
+                if self.use_mmap and os.fstat(input_fd.fileno()).st_size > 0:
+                    # The mapping stays valid after the file is closed
+                    return mmap.mmap(input_fd.fileno(), 0, access=mmap.ACCESS_READ)
+                return input_fd.read()
@@ -0,0 +1,228 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from tflite.Model import Model
+
+from xmos_ai_tools.xinterpreters.base.model_patch import OFFLINE_MEMORY_ALLOCATION
+
+# Alignment of buffers in the tensor arena
+BUFFER_ALIGNMENT = 16
+# Tensor index of the kernel scratch buffers in a native memory plan
+SCRATCH_BUFFER = -1
+
+# A buffer in the output of the TFLM greedy memory planner's PrintMemoryPlan
+_PLANNER_BUFFER = re.compile(
+    r"size=(\d+),?\s*offset=(-?\d+),?\s*first_used=(-?\d+),?\s*last_used=(-?\d+)"
+)
+
+
+class MemoryPlanEntry:
+    """! Immutable placement of a single tensor in the tensor arena."""
+
+    __slots__ = ("tensor_index", "name", "offset", "size", "first_use", "last_use")
+
+    def __init__(
+        self,
+        tensor_index: int,
+        name: str,
+        offset: int,
+        size: int,
+        first_use: int,
+        last_use: int,
+    ) -> None:
+        """! Memory plan entry initializer.
+        @param tensor_index The index of the tensor in the model, SCRATCH_BUFFER for
+        kernel scratch buffers.
+        @param name The name of the tensor.
+        @param offset Offset of the tensor buffer from the start of the planned arena.
+        @param size Aligned size of the tensor buffer in bytes.
+        @param first_use Index of the first operator using the tensor.
+        @param last_use Index of the last operator using the tensor.
+        """
+        set_ = super().__setattr__
+        set_("tensor_index", tensor_index)
+        set_("name", name)
+        set_("offset", offset)
+        set_("size", size)
+        set_("first_use", first_use)
+        set_("last_use", last_use)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(tensor_index={self.tensor_index}, offset={self.offset}, "
+            f"size={self.size}, first_use={self.first_use}, last_use={self.last_use})"
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """! Memory plan entry as a dictionary."""
+        return {key: getattr(self, key) for key in self.__slots__}
+
+
+def align(size: int) -> int:
+    """! Round a size up to the buffer alignment of the tensor arena."""
+    return (size + BUFFER_ALIGNMENT - 1) // BUFFER_ALIGNMENT * BUFFER_ALIGNMENT
+
+
+def _offline_offsets(model_content: bytes) -> Dict[int, int]:
+    """! Read the arena offsets planned offline by the xformer (--xcore-offline-offsets).
+    The metadata holds a version, the subgraph index and the number of offsets, followed by
+    the offset of each tensor, or -1 for tensors planned at runtime.
+    @return The offset of each offline planned tensor of the first subgraph.
+    """
+    model = Model.GetRootAsModel(model_content, 0)
+    for i in range(model.MetadataLength()):
+        metadata = model.Metadata(i)
+        if metadata.Name() != OFFLINE_MEMORY_ALLOCATION:
+            continue
+        data = model.Buffers(metadata.Buffer()).DataAsNumpy()
+        values = np.frombuffer(bytes(data), dtype="<i4")
+        if len(values) < 3 or values[1] != 0:
+            continue
+        offsets = values[3 : 3 + values[2]]
+        return {t: int(offset) for t, offset in enumerate(offsets) if offset >= 0}
+    return {}
+
+
+def _lifetimes(model_content: bytes) -> Dict[int, Tuple[int, int]]:
+    """! Find the first and last operator using each tensor of the first subgraph.
+    Follows the TFLM allocation info builder, graph inputs are live from the first operator
+    and graph outputs until the last one.
+    """
+    model = Model.GetRootAsModel(model_content, 0)
+    subgraph = model.Subgraphs(0)
+    last_op = max(subgraph.OperatorsLength() - 1, 0)
+
+    first: Dict[int, int] = {}
+    last: Dict[int, int] = {}
+    for i in range(subgraph.InputsLength()):
+        first[subgraph.Inputs(i)] = 0
+    for i in range(subgraph.OutputsLength()):
+        last[subgraph.Outputs(i)] = last_op
+
+    for op_index in range(subgraph.OperatorsLength()):
+        op = subgraph.Operators(op_index)
+        for i in range(op.InputsLength()):
+            tensor_index = op.Inputs(i)
+            if tensor_index < 0:
+                continue
+            first.setdefault(tensor_index, op_index)
+            last[tensor_index] = max(last.get(tensor_index, op_index), op_index)
+        for i in range(op.OutputsLength()):
+            tensor_index = op.Outputs(i)
+            if tensor_index < 0:
+                continue
+            first.setdefault(tensor_index, op_index)
+            last[tensor_index] = max(last.get(tensor_index, op_index), op_index)
+
+    return {t: (first[t], last.get(t, first[t])) for t in first}
+
+
+def plan_memory(model_content: bytes, index: Any) -> List[MemoryPlanEntry]:
+    """! Estimate the placement of the non-constant tensors of a model in the tensor arena.
+    Reproduces the greedy memory planner of TFLM from the model alone, for interpreters
+    that cannot report the plan they use. Kernel scratch buffers are only known to the
+    interpreter, so where kernels request them the offsets differ from the real plan.
+    Tensors with offsets planned offline by the xformer are placed at those offsets, then
+    the largest remaining buffers are placed first at the lowest offset that does not
+    overlap a buffer which is live at the same time. Variable tensors are allocated
+    persistently by TFLM and are not part of the plan.
+    @param model_content The model flatbuffer (byte array).
+    @param index The ModelIndex of the model.
+    @return The plan entries, ordered by tensor index.
+    """
+    offline_offsets = _offline_offsets(model_content)
+
+    placed: List[MemoryPlanEntry] = []
+    requirements = []
+    for tensor_index, (first_use, last_use) in _lifetimes(model_content).items():
+        details = index.tensors[tensor_index]
+        if details.is_constant or details.is_variable or details.size is None:
+            continue
+        size = align(details.size)
+        if tensor_index in offline_offsets:
+            placed.append(
+                MemoryPlanEntry(
+                    tensor_index,
+                    details.name,
+                    offline_offsets[tensor_index],
+                    size,
+                    first_use,
+                    last_use,
+                )
+            )
+        else:
+            requirements.append((tensor_index, size, first_use, last_use))
+
+    # Largest buffers first, ties in order of first use as in the TFLM planner
+    requirements.sort(key=lambda r: (-r[1], r[2], r[0]))
+
+    for tensor_index, size, first_use, last_use in requirements:
+        live = sorted(
+            (p.offset, p.offset + p.size)
+            for p in placed
+            if p.first_use <= last_use and first_use <= p.last_use
+        )
+        offset = 0
+        for start, end in live:
+            if offset + size <= start:
+                break
+            offset = max(offset, end)
+        placed.append(
+            MemoryPlanEntry(
+                tensor_index,
+                index.tensors[tensor_index].name,
+                offset,
+                size,
+                first_use,
+                last_use,
+            )
+        )
+
+    return sorted(placed, key=lambda p: p.tensor_index)
+
+
+def parse_planner_output(text: str) -> List[Tuple[int, int, int, int]]:
+    """! Read the buffers from the output of the TFLM greedy memory planner.
+    @param text The text printed by PrintMemoryPlan.
+    @return The size, offset, first use and last use of each buffer, in planner order.
+    """
+    return [
+        (int(size), int(offset), int(first_use), int(last_use))
+        for size, offset, first_use, last_use in _PLANNER_BUFFER.findall(text)
+    ]
+
+
+def match_planner_buffers(
+    estimate: List[MemoryPlanEntry], buffers: List[Tuple[int, int, int, int]]
+) -> Optional[List[MemoryPlanEntry]]:
+    """! Attribute the buffers of the native planner to the tensors of a model.
+    The planner holds the non-constant tensors in index order, followed by the kernel
+    scratch buffers.
+    @param estimate The plan_memory plan of the model, giving the planned tensors.
+    @param buffers The buffers read by parse_planner_output.
+    @return The native plan, or None if the buffers do not match the model's tensors.
+    """
+    if len(buffers) < len(estimate):
+        return None
+    plan = []
+    for entry, (size, offset, first_use, last_use) in zip(estimate, buffers):
+        if (size, first_use, last_use) != (entry.size, entry.first_use, entry.last_use):
+            return None
+        plan.append(
+            MemoryPlanEntry(
+                entry.tensor_index, entry.name, offset, size, first_use, last_use
+            )
+        )
+    for i, (size, offset, first_use, last_use) in enumerate(buffers[len(estimate) :]):
+        plan.append(
+            MemoryPlanEntry(
+                SCRATCH_BUFFER, "scratch_%d" % i, offset, size, first_use, last_use
+            )
+        )
+    return plan
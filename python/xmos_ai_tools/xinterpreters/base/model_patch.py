@@ -0,0 +1,64 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import struct
+from typing import List, Sequence
+
+from tflite.Model import Model
+
+# vtable offset of the outputs field of the tflite SubGraph table
+_SUBGRAPH_OUTPUTS_FIELD = 8
+# vtable offset of the name field of the tflite Metadata table
+_METADATA_NAME_FIELD = 4
+# Metadata holding tensor arena offsets planned offline by the xformer
+OFFLINE_MEMORY_ALLOCATION = b"OfflineMemoryAllocation"
+
+
+def add_outputs(model_content: bytes, tensor_indices: Sequence[int]) -> bytes:
+    """! Make additional tensors outputs of the first subgraph of a model.
+    The new outputs vector is appended to the end of the flatbuffer and the subgraph is
+    pointed at it, leaving the rest of the model untouched. Outputs are kept alive until
+    the end of the graph by the memory planner, so an offline memory plan in the model
+    metadata no longer applies and is disabled.
+    @param model_content The model flatbuffer (byte array).
+    @param tensor_indices The tensors to append to the model outputs, in order.
+    @return The patched model flatbuffer.
+    """
+    model = Model.GetRootAsModel(model_content, 0)
+    subgraph = model.Subgraphs(0)
+
+    field_offset = subgraph._tab.Offset(_SUBGRAPH_OUTPUTS_FIELD)
+    if field_offset == 0:
+        raise ValueError("model subgraph has no outputs field to patch")
+    field_pos = subgraph._tab.Pos + field_offset
+
+    outputs: List[int] = [subgraph.Outputs(i) for i in range(subgraph.OutputsLength())]
+    for tensor_index in tensor_indices:
+        if tensor_index not in outputs:
+            outputs.append(tensor_index)
+
+    content = bytearray(model_content)
+    # Vectors are prefixed by a 32 bit length and must be 4 byte aligned
+    content += bytes(-len(content) % 4)
+    vector_pos = len(content)
+    content += struct.pack("<I%di" % len(outputs), len(outputs), *outputs)
+    # Offsets to tables and vectors are unsigned and relative to the field holding them
+    struct.pack_into("<I", content, field_pos, vector_pos - field_pos)
+
+    _disable_offline_memory_allocation(model, content)
+    return bytes(content)
+
+
+def _disable_offline_memory_allocation(model: Model, content: bytearray) -> None:
+    """! Rename offline memory allocation metadata in place so the interpreter ignores it.
+    @param model The parsed model flatbuffer.
+    @param content The model flatbuffer to modify.
+    """
+    for i in range(model.MetadataLength()):
+        metadata = model.Metadata(i)
+        if metadata.Name() != OFFLINE_MEMORY_ALLOCATION:
+            continue
+        name_offset = metadata._tab.Offset(_METADATA_NAME_FIELD)
+        # Strings are a 32 bit length followed by the bytes
+        name_pos = metadata._tab.Indirect(metadata._tab.Pos + name_offset) + 4
+        name_end = name_pos + len(OFFLINE_MEMORY_ALLOCATION)
+        content[name_pos:name_end] = OFFLINE_MEMORY_ALLOCATION.lower()
@@ -0,0 +1,111 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+from typing import Any, Optional, Union
+
+import numpy as np
+from numpy import ndarray
+
+
+class TensorQuantizer:
+    """! Converts the data of a single tensor to and from float.
+    The quantization parameters are prepared once per tensor, per-channel parameters are
+    reshaped to broadcast along the quantized dimension, and per-tensor int8 data is
+    dequantized with a lookup table.
+    """
+
+    __slots__ = (
+        "index",
+        "shape",
+        "dtype",
+        "is_float",
+        "scale",
+        "zero_point",
+        "_qmin",
+        "_qmax",
+        "_float_dtype",
+        "_lut",
+    )
+
+    def __init__(self, details: Any) -> None:
+        """! Tensor quantizer initializer.
+        @param details The TensorDetails of the tensor.
+        """
+        if details.dtype is None:
+            raise ValueError(
+                "tensor %d has unsupported type %d" % (details.index, details.tensor_type)
+            )
+        self.index: int = details.index
+        self.shape = tuple(details.shape)
+        self.dtype = np.dtype(details.dtype)
+        self.is_float: bool = np.issubdtype(self.dtype, np.floating)
+        self.scale: Union[np.float32, ndarray] = np.float32(1)
+        self.zero_point: Union[np.int32, ndarray] = np.int32(0)
+        self._qmin = 0
+        self._qmax = 0
+        self._float_dtype = np.float32
+        self._lut: Optional[ndarray] = None
+        if self.is_float:
+            return
+
+        if len(details.scales) == 0:
+            raise ValueError("tensor %d is not quantized" % details.index)
+        scales = details.scales.astype(np.float32)
+        zero_points = details.zero_points.astype(np.int32)
+        if len(zero_points) == 0:
+            zero_points = np.zeros(len(scales), dtype=np.int32)
+
+        if len(scales) > 1:
+            # Per-channel parameters, broadcast along the quantized dimension
+            broadcast_shape = [1] * len(self.shape)
+            broadcast_shape[details.quantized_dimension] = len(scales)
+            self.scale = scales.reshape(broadcast_shape)
+            self.zero_point = zero_points.reshape(broadcast_shape)
+        else:
+            self.scale = scales[0]
+            self.zero_point = zero_points[0]
+            if self.dtype == np.int8:
+                # Indexed by the int8 data reinterpreted as uint8
+                values = np.arange(256, dtype=np.uint8).view(np.int8).astype(np.float32)
+                self._lut = (values - self.zero_point) * self.scale
+
+        info = np.iinfo(self.dtype)
+        # float32 cannot represent the range of 32 and 64 bit types
+        if self.dtype.itemsize >= 4:
+            self._float_dtype = np.float64
+        self._qmin = self._float_dtype(info.min)
+        self._qmax = self._float_dtype(info.max)
+        # Clip to the largest float in range, so saturated data does not wrap in the cast
+        if int(self._qmax) > info.max:
+            self._qmax = np.nextafter(self._qmax, self._float_dtype(0))
+
+    def quantize(self, value: Any) -> ndarray:
+        """! Quantize float data to the tensor type.
+        @param value Float data with the number of elements of the tensor.
+        @return Array of the tensor shape and type.
+        """
+        value = np.asarray(value, dtype=np.float32).reshape(self.shape)
+        if self.is_float:
+            return value.astype(self.dtype, copy=False)
+
+        buffer = value.astype(self._float_dtype, copy=False) / self.scale
+        np.rint(buffer, out=buffer)
+        buffer += self.zero_point
+        np.clip(buffer, self._qmin, self._qmax, out=buffer)
+        return buffer.astype(self.dtype)
+
+    def dequantize(self, data: ndarray, out: Optional[ndarray] = None) -> ndarray:
+        """! Dequantize tensor data to float32.
+        @param data Array of the tensor type.
+        @param out Float32 array of the tensor shape to write into (optional).
+        @return The float32 data.
+        """
+        if out is None:
+            out = np.empty(data.shape, dtype=np.float32)
+        if self._lut is not None:
+            np.take(self._lut, data.view(np.uint8), out=out)
+        else:
+            out[...] = data
+            if not self.is_float:
+                out -= self.zero_point
+                out *= self.scale
+        return out
@@ -0,0 +1,161 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+"""! Builds minimal tflite flatbuffers for tests that parse models without running them."""
+import struct
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import flatbuffers
+from tflite.TensorType import TensorType
+
+# Table field slots of the tflite schema
+_MODEL_VERSION, _MODEL_OPERATOR_CODES, _MODEL_SUBGRAPHS = 0, 1, 2
+_MODEL_BUFFERS, _MODEL_METADATA = 4, 6
+_SUBGRAPH_TENSORS, _SUBGRAPH_INPUTS, _SUBGRAPH_OUTPUTS, _SUBGRAPH_OPERATORS = 0, 1, 2, 3
+_TENSOR_SHAPE, _TENSOR_TYPE, _TENSOR_BUFFER, _TENSOR_NAME = 0, 1, 2, 3
+_TENSOR_QUANTIZATION, _TENSOR_IS_VARIABLE = 4, 5
+_QUANTIZATION_SCALE, _QUANTIZATION_ZERO_POINT, _QUANTIZATION_DIMENSION = 2, 3, 6
+_OPERATOR_OPCODE_INDEX, _OPERATOR_INPUTS, _OPERATOR_OUTPUTS = 0, 1, 2
+_OPERATOR_CODE_DEPRECATED_BUILTIN, _OPERATOR_CODE_BUILTIN = 0, 3
+_BUFFER_DATA = 0
+_METADATA_NAME, _METADATA_BUFFER = 0, 1
+
+# tensor: (shape, type, constant data or None, (scales, zero points, dimension) or None)
+Tensor = Tuple[Sequence[int], int, Optional[bytes], Optional[Tuple[list, list, int]]]
+
+
+def _vector(builder: flatbuffers.Builder, prepend, values: Sequence, size: int) -> int:
+    builder.StartVector(size, len(values), size)
+    for value in reversed(values):
+        prepend(value)
+    return builder.EndVector()
+
+
+def _offsets(builder: flatbuffers.Builder, offsets: Sequence[int]) -> int:
+    return _vector(builder, builder.PrependUOffsetTRelative, offsets, 4)
+
+
+def build_model(
+    tensors: Sequence[Tensor],
+    operators: Sequence[Tuple[Sequence[int], Sequence[int]]],
+    inputs: Sequence[int],
+    outputs: Sequence[int],
+    metadata: Optional[Dict[str, bytes]] = None,
+) -> bytes:
+    """! Build a single subgraph model.
+    @param tensors  The tensors, see Tensor.
+    @param operators  The input and output tensor indices of each operator, all ADD ops.
+    @param inputs  The input tensor indices of the subgraph.
+    @param outputs  The output tensor indices of the subgraph.
+    @param metadata  Metadata names and the content of their buffers.
+    @return The model flatbuffer.
+    """
+    builder = flatbuffers.Builder(1024)
+
+    # Buffer 0 is the empty sentinel, then one buffer per constant and per metadata entry
+    buffer_data: List[Optional[bytes]] = [None]
+    tensor_buffers = []
+    for _, _, data, _ in tensors:
+        if data is None:
+            tensor_buffers.append(0)
+        else:
+            tensor_buffers.append(len(buffer_data))
+            buffer_data.append(data)
+    metadata_buffers = []
+    for data in (metadata or {}).values():
+        metadata_buffers.append(len(buffer_data))
+        buffer_data.append(data)
+
+    buffers = []
+    for data in buffer_data:
+        data_offset = builder.CreateByteVector(data) if data else None
+        builder.StartObject(1)
+        if data_offset is not None:
+            builder.PrependUOffsetTRelativeSlot(_BUFFER_DATA, data_offset, 0)
+        buffers.append(builder.EndObject())
+
+    tensor_offsets = []
+    for i, (shape, tensor_type, _, quantization) in enumerate(tensors):
+        name = builder.CreateString("tensor_%d" % i)
+        shape_offset = _vector(builder, builder.PrependInt32, list(shape), 4)
+        quantization_offset = None
+        if quantization is not None:
+            scales, zero_points, dimension = quantization
+            scale_offset = _vector(builder, builder.PrependFloat32, scales, 4)
+            zero_point_offset = _vector(builder, builder.PrependInt64, zero_points, 8)
+            builder.StartObject(7)
+            builder.PrependUOffsetTRelativeSlot(_QUANTIZATION_SCALE, scale_offset, 0)
+            builder.PrependUOffsetTRelativeSlot(
+                _QUANTIZATION_ZERO_POINT, zero_point_offset, 0
+            )
+            builder.PrependInt32Slot(_QUANTIZATION_DIMENSION, dimension, 0)
+            quantization_offset = builder.EndObject()
+        builder.StartObject(6)
+        builder.PrependUOffsetTRelativeSlot(_TENSOR_SHAPE, shape_offset, 0)
+        builder.PrependInt8Slot(_TENSOR_TYPE, tensor_type, 0)
+        builder.PrependUint32Slot(_TENSOR_BUFFER, tensor_buffers[i], 0)
+        builder.PrependUOffsetTRelativeSlot(_TENSOR_NAME, name, 0)
+        if quantization_offset is not None:
+            builder.PrependUOffsetTRelativeSlot(
+                _TENSOR_QUANTIZATION, quantization_offset, 0
+            )
+        tensor_offsets.append(builder.EndObject())
+
+    operator_offsets = []
+    for op_inputs, op_outputs in operators:
+        inputs_offset = _vector(builder, builder.PrependInt32, list(op_inputs), 4)
+        outputs_offset = _vector(builder, builder.PrependInt32, list(op_outputs), 4)
+        builder.StartObject(3)
+        builder.PrependUint32Slot(_OPERATOR_OPCODE_INDEX, 0, 0)
+        builder.PrependUOffsetTRelativeSlot(_OPERATOR_INPUTS, inputs_offset, 0)
+        builder.PrependUOffsetTRelativeSlot(_OPERATOR_OUTPUTS, outputs_offset, 0)
+        operator_offsets.append(builder.EndObject())
+
+    tensors_offset = _offsets(builder, tensor_offsets)
+    inputs_offset = _vector(builder, builder.PrependInt32, list(inputs), 4)
+    outputs_offset = _vector(builder, builder.PrependInt32, list(outputs), 4)
+    operators_offset = _offsets(builder, operator_offsets)
+    builder.StartObject(4)
+    builder.PrependUOffsetTRelativeSlot(_SUBGRAPH_TENSORS, tensors_offset, 0)
+    builder.PrependUOffsetTRelativeSlot(_SUBGRAPH_INPUTS, inputs_offset, 0)
+    builder.PrependUOffsetTRelativeSlot(_SUBGRAPH_OUTPUTS, outputs_offset, 0)
+    builder.PrependUOffsetTRelativeSlot(_SUBGRAPH_OPERATORS, operators_offset, 0)
+    subgraph = builder.EndObject()
+
+    # A single ADD operator code
+    builder.StartObject(4)
+    builder.PrependInt8Slot(_OPERATOR_CODE_DEPRECATED_BUILTIN, 0, 0)
+    builder.PrependInt32Slot(_OPERATOR_CODE_BUILTIN, 0, 0)
+    operator_code = builder.EndObject()
+
+    metadata_offsets = []
+    for name, buffer_index in zip(metadata or {}, metadata_buffers):
+        name_offset = builder.CreateString(name)
+        builder.StartObject(2)
+        builder.PrependUOffsetTRelativeSlot(_METADATA_NAME, name_offset, 0)
+        builder.PrependUint32Slot(_METADATA_BUFFER, buffer_index, 0)
+        metadata_offsets.append(builder.EndObject())
+
+    operator_codes_offset = _offsets(builder, [operator_code])
+    subgraphs_offset = _offsets(builder, [subgraph])
+    buffers_offset = _offsets(builder, buffers)
+    metadata_offset = _offsets(builder, metadata_offsets)
+    builder.StartObject(7)
+    builder.PrependUint32Slot(_MODEL_VERSION, 3, 0)
+    builder.PrependUOffsetTRelativeSlot(_MODEL_OPERATOR_CODES, operator_codes_offset, 0)
+    builder.PrependUOffsetTRelativeSlot(_MODEL_SUBGRAPHS, subgraphs_offset, 0)
+    builder.PrependUOffsetTRelativeSlot(_MODEL_BUFFERS, buffers_offset, 0)
+    builder.PrependUOffsetTRelativeSlot(_MODEL_METADATA, metadata_offset, 0)
+    builder.Finish(builder.EndObject(), file_identifier=b"TFL3")
+    return bytes(builder.Output())
+
+
+def offline_memory_allocation(offsets: Sequence[int]) -> bytes:
+    """! Content of OfflineMemoryAllocation metadata, as written by the xformer.
+    @param offsets  The arena offset of each tensor, -1 for tensors planned at runtime.
+    """
+    return struct.pack("<3i%di" % len(offsets), 0, 0, len(offsets), *offsets)
+
+
+def int8_tensor(shape: Sequence[int], data: Optional[bytes] = None) -> Tensor:
+    """! An int8 tensor with per-tensor quantization."""
+    return (shape, TensorType.INT8, data, ([0.5], [0], 0))
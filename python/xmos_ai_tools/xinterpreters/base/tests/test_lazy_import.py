@@ -0,0 +1,69 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import xmos_ai_tools.xinterpreters as xinterpreters
+
+HOST_MODULE = "xmos_ai_tools.xinterpreters.host.host_interpreter"
+DEVICE_MODULE = "xmos_ai_tools.xinterpreters.device.device_interpreter"
+
+# Reports the modules loaded, and whether the native library is, after each step
+SCRIPT = """
+import json, sys
+
+def state():
+    host = sys.modules.get(%(host)r)
+    return {
+        "usb": "usb" in sys.modules,
+        "host": host is not None,
+        "device": %(device)r in sys.modules,
+        "lib": host is not None and host.lib is not None,
+    }
+
+states = []
+import xmos_ai_tools.xinterpreters as xinterpreters
+states.append(state())
+xinterpreters.xcore_tflm_usb_interpreter
+states.append(state())
+xinterpreters.xcore_tflm_host_interpreter
+states.append(state())
+print(json.dumps(states))
+""" % {
+    "host": HOST_MODULE,
+    "device": DEVICE_MODULE,
+}
+
+
+def test_import_loads_nothing_until_used():
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT], env=env, capture_output=True, text=True, check=True
+    )
+    after_import, after_usb, after_host = json.loads(result.stdout.splitlines()[-1])
+
+    assert after_import == {"usb": False, "host": False, "device": False, "lib": False}
+    # pyusb is imported when connecting to a device
+    assert after_usb == {"usb": False, "host": False, "device": True, "lib": False}
+    # The native library is loaded when the first interpreter is created
+    assert after_host == {"usb": False, "host": True, "device": True, "lib": False}
+
+
+def test_attributes_are_cached():
+    value = xinterpreters.xcore_tflm_async_interpreter
+
+    assert vars(xinterpreters)["xcore_tflm_async_interpreter"] is value
+    assert value.__module__ == "xmos_ai_tools.xinterpreters.base.async_interpreter"
+
+
+def test_unknown_attribute():
+    with pytest.raises(AttributeError, match="no_such_interpreter"):
+        xinterpreters.no_such_interpreter
+
+
+def test_dir_lists_lazy_attributes():
+    assert set(xinterpreters.__all__) <= set(dir(xinterpreters))
@@ -0,0 +1,114 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import pytest
+
+from xmos_ai_tools.xinterpreters.base.base_interpreter import ModelIndex
+from xmos_ai_tools.xinterpreters.base.memory_plan import (
+    BUFFER_ALIGNMENT,
+    SCRATCH_BUFFER,
+    align,
+    match_planner_buffers,
+    parse_planner_output,
+    plan_memory,
+)
+
+from model_builder import build_model, int8_tensor, offline_memory_allocation
+
+# input (64 bytes) -> op 0 -> tensor 1 (32 bytes) -> op 1 -> output (16 bytes)
+TENSORS = [
+    int8_tensor([1, 64]),
+    int8_tensor([1, 32]),
+    int8_tensor([1, 10]),
+    int8_tensor([1, 32], bytes(32)),
+]
+OPERATORS = [([0, 3], [1]), ([1, 3], [2])]
+
+
+def _plan(metadata=None):
+    model_content = build_model(TENSORS, OPERATORS, [0], [2], metadata)
+    plan = plan_memory(model_content, ModelIndex(model_content))
+    return {entry.tensor_index: entry for entry in plan}
+
+
+def test_align():
+    assert align(0) == 0
+    assert align(1) == BUFFER_ALIGNMENT
+    assert align(BUFFER_ALIGNMENT) == BUFFER_ALIGNMENT
+    assert align(BUFFER_ALIGNMENT + 1) == 2 * BUFFER_ALIGNMENT
+
+
+def test_greedy_plan():
+    plan = _plan()
+
+    # Constants are not planned
+    assert sorted(plan) == [0, 1, 2]
+    assert [(plan[t].first_use, plan[t].last_use) for t in (0, 1, 2)] == [
+        (0, 0),
+        (0, 1),
+        (1, 1),
+    ]
+    assert plan[2].size == align(10)
+    # Largest first, tensor 2 reuses the input buffer that is dead by op 1
+    assert plan[0].offset == 0
+    assert plan[1].offset == 64
+    assert plan[2].offset == 0
+
+
+def test_offline_offsets_are_honoured():
+    plan = _plan({"OfflineMemoryAllocation": offline_memory_allocation([-1, 0, -1, -1])})
+
+    assert plan[1].offset == 0
+    # The runtime planned buffers are placed around the offline planned one
+    assert plan[0].offset == 32
+    assert plan[2].offset == 32
+
+
+@pytest.mark.parametrize("name", ["offlinememoryallocation", "OtherMetadata"])
+def test_other_metadata_is_ignored(name):
+    plan = _plan({name: offline_memory_allocation([-1, 0, -1, -1])})
+
+    assert plan[0].offset == 0
+    assert plan[1].offset == 64
+
+
+# Output of the TFLM greedy memory planner for TENSORS with a scratch buffer for op 1
+PLANNER_OUTPUT = """Planner buffers:
+A (id=0): size=64, offset=0, first_used=0 last_used=0
+B (id=1): size=32, offset=64, first_used=0 last_used=1
+C (id=2): size=16, offset=0, first_used=1 last_used=1
+D (id=3): size=48, offset=16, first_used=1 last_used=1
+
+AAAABB..........
+"""
+
+
+def test_parse_planner_output():
+    assert parse_planner_output(PLANNER_OUTPUT) == [
+        (64, 0, 0, 0),
+        (32, 64, 0, 1),
+        (16, 0, 1, 1),
+        (48, 16, 1, 1),
+    ]
+    assert parse_planner_output("") == []
+
+
+def test_match_planner_buffers():
+    estimate = list(_plan().values())
+    plan = match_planner_buffers(estimate, parse_planner_output(PLANNER_OUTPUT))
+
+    assert [(p.tensor_index, p.offset, p.size) for p in plan] == [
+        (0, 0, 64),
+        (1, 64, 32),
+        (2, 0, 16),
+        (SCRATCH_BUFFER, 16, 48),
+    ]
+    assert plan[3].first_use == plan[3].last_use == 1
+
+
+def test_mismatching_planner_buffers():
+    estimate = list(_plan().values())
+    buffers = parse_planner_output(PLANNER_OUTPUT)
+
+    assert match_planner_buffers(estimate, buffers[:2]) is None
+    buffers[1] = (48, 64, 0, 1)
+    assert match_planner_buffers(estimate, buffers) is None
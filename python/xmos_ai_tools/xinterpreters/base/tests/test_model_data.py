@@ -0,0 +1,77 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import mmap
+
+import pytest
+
+from xmos_ai_tools.xinterpreters.base.base_interpreter import xcore_tflm_base_interpreter
+
+from model_builder import build_model, int8_tensor
+
+# input -> op 0 -> tensor 1 -> op 1 -> output
+TENSORS = [int8_tensor([1, 8]) for _ in range(3)]
+OPERATORS = [([0, 0], [1]), ([1, 1], [2])]
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    path = tmp_path / "model.tflite"
+    path.write_bytes(build_model(TENSORS, OPERATORS, [0], [2]))
+    return path
+
+
+def _model_data(model_path, params_path=None, use_mmap=False):
+    return xcore_tflm_base_interpreter.modelData(
+        str(model_path),
+        None,
+        None if params_path is None else str(params_path),
+        None,
+        0,
+        False,
+        False,
+        use_mmap=use_mmap,
+    )
+
+
+def test_mmap_matches_read(model_path, tmp_path):
+    params_path = tmp_path / "model.params"
+    params_path.write_bytes(bytes(range(256)))
+
+    read = _model_data(model_path, params_path)
+    mapped = _model_data(model_path, params_path, use_mmap=True)
+
+    assert isinstance(read.model_content, bytes)
+    assert isinstance(mapped.model_content, mmap.mmap)
+    assert isinstance(mapped.params_content, mmap.mmap)
+    assert mapped.model_content[:] == read.model_content
+    assert mapped.params_content[:] == read.params_content
+    # The model is parsed from the mapping like from the bytes
+    assert mapped.opList == read.opList
+    assert [t.index for t in mapped.index.outputs] == [t.index for t in read.index.outputs]
+
+
+def test_mmap_is_read_only(model_path):
+    mapped = _model_data(model_path, use_mmap=True)
+
+    with pytest.raises(TypeError):
+        mapped.model_content[0] = 0
+    assert model_path.read_bytes() == mapped.model_content[:]
+
+
+def test_mmap_outlives_file(model_path):
+    content = model_path.read_bytes()
+    mapped = _model_data(model_path, use_mmap=True)
+    # The mapping stays valid after the file is closed and unlinked
+    model_path.unlink()
+
+    assert mapped.model_content[:] == content
+
+
+def test_mmap_empty_file(model_path, tmp_path):
+    params_path = tmp_path / "empty.params"
+    params_path.write_bytes(b"")
+
+    mapped = _model_data(model_path, params_path, use_mmap=True)
+
+    # Empty files cannot be mapped, they are read instead
+    assert mapped.params_content == b""
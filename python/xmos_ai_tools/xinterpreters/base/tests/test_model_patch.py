@@ -0,0 +1,68 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+from tflite.Model import Model
+
+from xmos_ai_tools.xinterpreters.base.base_interpreter import ModelIndex
+from xmos_ai_tools.xinterpreters.base.model_patch import (
+    OFFLINE_MEMORY_ALLOCATION,
+    add_outputs,
+)
+
+from model_builder import build_model, int8_tensor, offline_memory_allocation
+
+# input -> op 0 -> tensor 1 -> op 1 -> tensor 2 -> op 2 -> output
+TENSORS = [int8_tensor([1, 8]) for _ in range(4)]
+OPERATORS = [([0, 0], [1]), ([1, 1], [2]), ([2, 2], [3])]
+
+
+def _model(metadata=None):
+    return build_model(TENSORS, OPERATORS, [0], [3], metadata)
+
+
+def _outputs(model_content):
+    return [details.index for details in ModelIndex(model_content).outputs]
+
+
+def _metadata_names(model_content):
+    model = Model.GetRootAsModel(model_content, 0)
+    return [model.Metadata(i).Name() for i in range(model.MetadataLength())]
+
+
+def test_add_outputs():
+    model_content = _model()
+    patched = add_outputs(model_content, [2, 1])
+
+    assert _outputs(patched) == [3, 2, 1]
+    # The original flatbuffer is left in place and the new outputs vector appended
+    assert len(patched) > len(model_content)
+    assert _outputs(model_content) == [3]
+    subgraph = Model.GetRootAsModel(patched, 0).Subgraphs(0)
+    assert subgraph.OperatorsLength() == len(OPERATORS)
+    assert subgraph.TensorsLength() == len(TENSORS)
+
+
+def test_existing_outputs_are_not_repeated():
+    patched = add_outputs(_model(), [3, 1, 1])
+
+    assert _outputs(patched) == [3, 1]
+
+
+def test_patch_twice():
+    patched = add_outputs(add_outputs(_model(), [1]), [2])
+
+    assert _outputs(patched) == [3, 1, 2]
+
+
+def test_offline_memory_allocation_is_disabled():
+    metadata = {
+        "OfflineMemoryAllocation": offline_memory_allocation([0, 16, 0, 16]),
+        "min_runtime_version": b"1.5.0",
+    }
+    model_content = _model(metadata)
+    patched = add_outputs(model_content, [1])
+
+    assert OFFLINE_MEMORY_ALLOCATION in _metadata_names(model_content)
+    assert _metadata_names(patched) == [
+        OFFLINE_MEMORY_ALLOCATION.lower(),
+        b"min_runtime_version",
+    ]
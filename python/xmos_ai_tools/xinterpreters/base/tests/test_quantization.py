@@ -0,0 +1,103 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import numpy as np
+import pytest
+from tflite.TensorType import TensorType
+
+from xmos_ai_tools.xinterpreters.base.base_interpreter import ModelIndex
+from xmos_ai_tools.xinterpreters.base.quantization import TensorQuantizer
+
+from model_builder import build_model
+
+
+def _quantizer(shape, tensor_type, quantization):
+    """! The quantizer of the input of a single ADD model."""
+    tensors = [(shape, tensor_type, None, quantization)] * 2
+    model_content = build_model(tensors, [([0, 0], [1])], [0], [1])
+    return TensorQuantizer(ModelIndex(model_content).tensors[0])
+
+
+def _reference(value, scale, zero_point, dtype):
+    info = np.iinfo(dtype)
+    quantized = np.rint(np.asarray(value, dtype=np.float64) / scale) + zero_point
+    return np.clip(quantized, info.min, info.max).astype(dtype)
+
+
+@pytest.mark.parametrize(
+    "tensor_type, dtype",
+    [
+        (TensorType.INT8, np.int8),
+        (TensorType.UINT8, np.uint8),
+        (TensorType.INT16, np.int16),
+        (TensorType.INT32, np.int32),
+    ],
+)
+def test_per_tensor(tensor_type, dtype):
+    quantizer = _quantizer([2, 8], tensor_type, ([0.25], [3], 0))
+    value = np.linspace(-40, 40, 16, dtype=np.float32).reshape(2, 8)
+
+    quantized = quantizer.quantize(value)
+    assert quantized.dtype == dtype and quantized.shape == (2, 8)
+    np.testing.assert_array_equal(quantized, _reference(value, 0.25, 3, dtype))
+
+    dequantized = quantizer.dequantize(quantized)
+    assert dequantized.dtype == np.float32
+    np.testing.assert_allclose(
+        dequantized, (quantized.astype(np.float32) - 3) * 0.25, rtol=0, atol=1e-6
+    )
+
+
+def test_int8_lookup_table_covers_every_value():
+    quantizer = _quantizer([256], TensorType.INT8, ([0.1], [-5], 0))
+    data = np.arange(-128, 128, dtype=np.int8)
+    out = np.empty(256, dtype=np.float32)
+
+    assert quantizer.dequantize(data, out) is out
+    np.testing.assert_allclose(out, (data.astype(np.float32) + 5) * np.float32(0.1))
+
+
+def test_per_channel():
+    scales, zero_points = [0.5, 1.0, 2.0], [0, 1, -1]
+    quantizer = _quantizer([2, 3], TensorType.INT8, (scales, zero_points, 1))
+    value = np.array([[1.0, 2.0, 4.0], [-1.0, -2.0, -4.0]], dtype=np.float32)
+
+    quantized = quantizer.quantize(value)
+    np.testing.assert_array_equal(quantized, [[2, 3, 1], [-2, -1, -3]])
+    np.testing.assert_allclose(quantizer.dequantize(quantized), value)
+
+
+@pytest.mark.parametrize(
+    "tensor_type, dtype",
+    [
+        (TensorType.INT8, np.int8),
+        (TensorType.INT16, np.int16),
+        (TensorType.INT32, np.int32),
+        (TensorType.INT64, np.int64),
+    ],
+)
+def test_saturation(tensor_type, dtype):
+    quantizer = _quantizer([2], tensor_type, ([1e-9], [0], 0))
+    info = np.iinfo(dtype)
+
+    # Four times the range of the type
+    limit = 4e-9 * float(info.max)
+    quantized = quantizer.quantize([limit, -limit])
+    # The int64 maximum is not a float64, it saturates to the largest float below it
+    assert info.max - 2 ** 10 <= quantized[0] <= info.max
+    assert quantized[1] == info.min
+    if dtype != np.int64:
+        assert quantized[0] == info.max
+
+
+def test_float_tensor():
+    quantizer = _quantizer([4], TensorType.FLOAT32, None)
+    value = np.array([0.1, -2.5, 3.0, 1e6], dtype=np.float32)
+
+    assert quantizer.is_float
+    np.testing.assert_array_equal(quantizer.quantize(value), value)
+    np.testing.assert_array_equal(quantizer.dequantize(value), value)
+
+
+def test_not_quantized():
+    with pytest.raises(ValueError):
+        _quantizer([4], TensorType.INT8, None)
@@ -0,0 +1,268 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+"""! Benchmark of the xformer and the host interpreter.
+Converts every .tflite model under a directory, runs it on the host interpreter and
+reports invoke latency, tensor set/get overhead, arena size and model size as JSON.
+
+    python -m xmos_ai_tools.xinterpreters.bench integration_tests/models -o bench.json
+    python -m xmos_ai_tools.xinterpreters.bench integration_tests/models --baseline bench.json
+"""
+import argparse
+import json
+import pathlib
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from xmos_ai_tools import xformer
+from xmos_ai_tools.xinterpreters.host.host_interpreter import (
+    xcore_tflm_host_interpreter,
+)
+
+PERCENTILES = (50, 95, 99)
+
+
+def _summarise(samples_ns: List[int]) -> Dict[str, float]:
+    """! Summarise timing samples.
+    @param samples_ns Samples in nanoseconds.
+    @return Mean and percentiles in microseconds.
+    """
+    samples = np.asarray(samples_ns, dtype=np.float64) / 1000.0
+    summary = {"mean_us": float(samples.mean())}
+    for p in PERCENTILES:
+        summary[f"p{p}_us"] = float(np.percentile(samples, p))
+    return summary
+
+
+def _random_inputs(ie: xcore_tflm_host_interpreter, rng: np.random.Generator) -> List[np.ndarray]:
+    """! Generate random data for every input of the loaded model."""
+    inputs = []
+    for details in ie.get_model().index.inputs:
+        dtype = np.dtype(details.dtype)
+        shape = tuple(details.shape)
+        if np.issubdtype(dtype, np.integer):
+            info = np.iinfo(dtype)
+            inputs.append(rng.integers(info.min, info.max, shape, dtype=dtype, endpoint=True))
+        else:
+            inputs.append(rng.standard_normal(shape).astype(dtype))
+    return inputs
+
+
+def convert_model(
+    model_path: pathlib.Path,
+    temp_dirname: str,
+    thread_count: int = 5,
+    flash_image: bool = False,
+) -> Dict[str, Any]:
+    """! Convert a model with the xformer.
+    @param model_path Path to the .tflite model.
+    @param temp_dirname Directory to write the converted model to.
+    @param thread_count Number of threads to optimise the model for.
+    @param flash_image Write the model parameters to a separate flash image.
+    @return The converted model and params content, and the conversion measurements.
+    """
+    output_file = pathlib.Path(temp_dirname) / "model.tflite"
+    params_file = pathlib.Path(temp_dirname) / "model.params"
+    params: Dict[str, Optional[str]] = {"xcore-thread-count": str(thread_count)}
+    if flash_image:
+        params["xcore-flash-image-file"] = str(params_file)
+
+    start = time.perf_counter()
+    xformer.convert(model_path, output_file, params)
+    convert_seconds = time.perf_counter() - start
+
+    model_content = output_file.read_bytes()
+    params_content = params_file.read_bytes() if params_file.exists() else b""
+    return {
+        "model_content": model_content,
+        "params_content": params_content,
+        "convert_seconds": convert_seconds,
+        "xformer_arena_bytes": xformer.tensor_arena_size(),
+    }
+
+
+def benchmark_model(
+    model_path: pathlib.Path,
+    iterations: int = 100,
+    warmup: int = 5,
+    thread_count: int = 5,
+    flash_image: bool = False,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """! Convert a model and measure it on the host interpreter.
+    @param model_path Path to the .tflite model.
+    @param iterations Number of timed inferences.
+    @param warmup Number of inferences run before timing.
+    @param thread_count Number of threads to optimise the model for.
+    @param flash_image Write the model parameters to a separate flash image.
+    @param seed Seed of the random input data.
+    @return The measurements of the model.
+    """
+    with tempfile.TemporaryDirectory() as temp_dirname:
+        converted = convert_model(model_path, temp_dirname, thread_count, flash_image)
+
+    result: Dict[str, Any] = {
+        "model_bytes": model_path.stat().st_size,
+        "xformed_model_bytes": len(converted["model_content"]),
+        "params_bytes": len(converted["params_content"]),
+        "convert_seconds": converted["convert_seconds"],
+        "xformer_arena_bytes": converted["xformer_arena_bytes"],
+    }
+
+    rng = np.random.default_rng(seed)
+    with xcore_tflm_host_interpreter() as ie:
+        ie.set_model(
+            model_content=converted["model_content"],
+            params_content=converted["params_content"],
+        )
+        result["arena_bytes"] = ie.tensor_arena_size()
+        inputs = _random_inputs(ie, rng)
+        outputs = [
+            np.empty(details.shape, dtype=details.dtype)
+            for details in ie.get_model().index.outputs
+        ]
+
+        for _ in range(warmup):
+            ie.set_all_inputs(inputs)
+            ie.invoke()
+
+        set_ns: List[int] = []
+        invoke_ns: List[int] = []
+        get_ns: List[int] = []
+        output_details = ie.get_model().index.outputs
+        for _ in range(iterations):
+            start = time.perf_counter_ns()
+            ie.set_all_inputs(inputs)
+            set_done = time.perf_counter_ns()
+            ie.invoke()
+            invoke_done = time.perf_counter_ns()
+            for details, out in zip(output_details, outputs):
+                ie.get_tensor(details.index, out=out)
+            get_done = time.perf_counter_ns()
+            set_ns.append(set_done - start)
+            invoke_ns.append(invoke_done - set_done)
+            get_ns.append(get_done - invoke_done)
+
+    result["invoke"] = _summarise(invoke_ns)
+    result["set_tensor"] = _summarise(set_ns)
+    result["get_tensor"] = _summarise(get_ns)
+    return result
+
+
+def run(
+    directory: pathlib.Path,
+    iterations: int = 100,
+    warmup: int = 5,
+    thread_count: int = 5,
+    flash_image: bool = False,
+) -> Dict[str, Any]:
+    """! Benchmark every .tflite model under a directory.
+    Models that fail to convert or run are reported with their error and skipped.
+    @param directory Directory to search for models.
+    @param iterations Number of timed inferences per model.
+    @param warmup Number of inferences run before timing.
+    @param thread_count Number of threads to optimise the models for.
+    @param flash_image Write the model parameters to a separate flash image.
+    @return The benchmark configuration and the measurements of each model.
+    """
+    models: Dict[str, Any] = {}
+    for model_path in sorted(directory.rglob("*.tflite")):
+        name = str(model_path.relative_to(directory))
+        try:
+            models[name] = benchmark_model(
+                model_path, iterations, warmup, thread_count, flash_image
+            )
+        except Exception as e:
+            models[name] = {"error": f"{type(e).__name__}: {e}"}
+        _print_result(name, models[name])
+
+    return {
+        "config": {
+            "directory": str(directory),
+            "iterations": iterations,
+            "warmup": warmup,
+            "thread_count": thread_count,
+            "flash_image": flash_image,
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+        },
+        "models": models,
+    }
+
+
+def _print_result(name: str, result: Dict[str, Any]) -> None:
+    if "error" in result:
+        print(f"{name}: {result['error']}", file=sys.stderr)
+        return
+    invoke = result["invoke"]
+    print(
+        f"{name}: invoke p50 {invoke['p50_us']:.1f}us p95 {invoke['p95_us']:.1f}us "
+        f"p99 {invoke['p99_us']:.1f}us, set {result['set_tensor']['p50_us']:.1f}us, "
+        f"get {result['get_tensor']['p50_us']:.1f}us, arena {result['arena_bytes']} bytes, "
+        f"model {result['xformed_model_bytes']} bytes, params {result['params_bytes']} bytes"
+    )
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """! Compare benchmark results against a baseline.
+    @param results The current results.
+    @param baseline Results of an earlier run, e.g. of another commit.
+    @return One line per model measured in both runs, with the relative changes.
+    """
+    lines = []
+    for name, result in results["models"].items():
+        base = baseline["models"].get(name)
+        if base is None or "error" in result or "error" in base:
+            continue
+        changes = []
+        for key in ("invoke", "set_tensor", "get_tensor"):
+            old, new = base[key]["p50_us"], result[key]["p50_us"]
+            change = (new - old) / old * 100.0 if old else 0.0
+            changes.append(f"{key} p50 {old:.1f}us -> {new:.1f}us ({change:+.1f}%)")
+        arena_change = result["arena_bytes"] - base["arena_bytes"]
+        changes.append(f"arena {arena_change:+d} bytes")
+        lines.append(f"{name}: " + ", ".join(changes))
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n")[0].lstrip("! "),
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("directory", type=pathlib.Path, help="Directory of .tflite models")
+    parser.add_argument("-o", "--output", type=pathlib.Path, help="Write results to JSON")
+    parser.add_argument("-n", "--iterations", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--thread-count", type=int, default=5)
+    parser.add_argument(
+        "--flash-image",
+        action="store_true",
+        help="Convert with the parameters in a separate flash image",
+    )
+    parser.add_argument(
+        "--baseline", type=pathlib.Path, help="JSON results of an earlier run to compare to"
+    )
+    args = parser.parse_args(argv)
+
+    results = run(
+        args.directory, args.iterations, args.warmup, args.thread_count, args.flash_image
+    )
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2, sort_keys=True))
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())
+        for line in compare(results, baseline):
+            print(line)
+
+    failed = sum("error" in result for result in results["models"].values())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
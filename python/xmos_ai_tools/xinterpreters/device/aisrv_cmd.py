@@ -44,4 +44,16 @@ CMD_SET_OUTPUT_GPIO_THRESH = int(0x80 | 0x12)
 CMD_GET_OUTPUT_GPIO_MODE = int(0x13)
 CMD_SET_OUTPUT_GPIO_MODE = int(0x80 | 0x13)
 
+# Length and CRC-32 of the model loaded in an engine, as two little endian uint32
+CMD_GET_MODEL_HASH = int(0x14)
+
+# Every output or input tensor of an engine in a single transfer, the tensor data
+# concatenated in the order of the model outputs or inputs
+CMD_GET_OUTPUT_TENSORS = int(0x15)
+CMD_SET_INPUT_TENSORS = int(0x80 | 0x15)
+
+# Number of inferences run by an engine since its model was set, as a little endian
+# uint32 that wraps around
+CMD_GET_INFERENCE_COUNT = int(0x16)
+
 CMD_HELLO = int(0x55)
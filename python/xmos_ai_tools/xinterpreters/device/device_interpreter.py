@@ -1,8 +1,15 @@
 # Copyright 2022 XMOS LIMITED. This Software is subject to the terms of the
 # XMOS Public License: Version 1
-import sys
+import array
+import collections
+import mmap
+import queue
+import struct
+import threading
+import time
+import zlib
 from abc import abstractmethod
-from typing import List, Union, Tuple, Optional, Any, Dict
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union, Tuple
 
 import numpy as np
 from numpy import ndarray
@@ -11,8 +18,20 @@ import xmos_ai_tools.xinterpreters.device.aisrv_cmd as aisrv_cmd
 from xmos_ai_tools.xinterpreters.base.base_interpreter import (
     xcore_tflm_base_interpreter,
 )
+from xmos_ai_tools.xinterpreters.host.exceptions import SetTensorError
 
+if TYPE_CHECKING:
+    from xmos_ai_tools.xinterpreters.device.profiler import OpTimings
+
+# Default packet size, used by interfaces that do not report their own
 XCORE_IE_MAX_BLOCK_SIZE = 512
+# Largest single bulk transfer, rounded down to a whole number of packets
+XCORE_IE_MAX_TRANSFER_SIZE = 256 * 1024
+# Timeout of a transfer, plus the time to move its data at the slowest expected rate
+XCORE_IE_TIMEOUT_MS = 1000
+XCORE_IE_MIN_BYTES_PER_SECOND = 1000000
+# Reads may wait for an inference to complete
+XCORE_IE_READ_TIMEOUT_MS = 10000
 
 
 class AISRVError(Exception):
@@ -21,7 +40,7 @@ class AISRVError(Exception):
     pass
 
 
-class IOError(AISRVError):
+class AISRVIOError(AISRVError):
     """IO Error from device"""
 
     pass
@@ -51,6 +70,35 @@ class CommandError(AISRVError):
     pass
 
 
+# Commands found to be supported by each connected device, shared by its sessions
+_DEVICE_CAPABILITIES: Dict[Any, Dict[str, Optional[bool]]] = {}
+
+# USB vendor and product ids of AISRV devices
+AISRV_USB_VENDOR_ID = 0x20B1
+AISRV_USB_PRODUCT_ID = 0xA15E
+
+
+def find_devices() -> List[Any]:
+    """! Enumerate the AISRV devices attached over USB.
+    @return  The pyusb device of each attached AISRV device.
+    """
+    import usb
+
+    return list(
+        usb.core.find(
+            find_all=True, idVendor=AISRV_USB_VENDOR_ID, idProduct=AISRV_USB_PRODUCT_ID
+        )
+    )
+
+
+def model_hash(model_bytes: Union[bytes, bytearray, mmap.mmap]) -> Tuple[int, int]:
+    """! Content hash of a model, as reported by the device for its loaded model.
+    @param model_bytes  The model content.
+    @return  The length and CRC-32 of the model.
+    """
+    return len(model_bytes), zlib.crc32(model_bytes) & 0xFFFFFFFF
+
+
 class xcore_tflm_device_interpreter(xcore_tflm_base_interpreter):
     """! The xcore interpreters device class.
     To be inherited by usb/spi interpreters, inherits from base interpreter.
@@ -61,10 +109,65 @@ class xcore_tflm_device_interpreter(xcore_tflm_base_interpreter):
         Calls the connect function to connect to a device over the current interface.
         """
         self._timings_length = None
-        self._max_block_size = XCORE_IE_MAX_BLOCK_SIZE  # TODO read from (usb) device?
+        # Packet sizes of reads and writes, replaced by the sizes of the device endpoints
+        # on connect
+        self._max_block_size = XCORE_IE_MAX_BLOCK_SIZE
+        self._out_max_block_size = XCORE_IE_MAX_BLOCK_SIZE
+        # Bytes and seconds transferred in each direction
+        self._transfers: Dict[str, List[float]] = {
+            "upload": [0, 0.0],
+            "download": [0, 0.0],
+        }
+        # Command and hash of the model downloaded to each engine in this session
+        self._model_hashes: Dict[int, Tuple[int, int, int]] = {}
+        # Statistics of the latest acquisition stream
+        self._stream_stats: Dict[str, float] = {}
         self.connect()
+        self._capabilities = self._device_capabilities()
         super().__init__()
 
+    def _device_key(self) -> Any:
+        """! Key identifying the connected device across sessions, None if unknown."""
+        return None
+
+    def _device_capabilities(self) -> Dict[str, Optional[bool]]:
+        """! The commands found to be supported by the connected device, shared by every
+        session with the same device so that unsupported commands are probed once.
+        """
+        key = self._device_key()
+        if key is None:
+            return {}
+        return _DEVICE_CAPABILITIES.setdefault(key, {})
+
+    @property
+    def _model_hash_supported(self) -> bool:
+        """! Whether the device supports CMD_GET_MODEL_HASH, cleared by a failed probe."""
+        return self._capabilities.get("model_hash", True) is not False
+
+    @_model_hash_supported.setter
+    def _model_hash_supported(self, supported: bool) -> None:
+        self._capabilities["model_hash"] = supported
+
+    @property
+    def _inference_count_supported(self) -> bool:
+        """! Whether the device supports CMD_GET_INFERENCE_COUNT, cleared by a failed probe."""
+        return self._capabilities.get("inference_count", True) is not False
+
+    @_inference_count_supported.setter
+    def _inference_count_supported(self, supported: bool) -> None:
+        self._capabilities["inference_count"] = supported
+
+    @property
+    def _batched_io_supported(self) -> Optional[bool]:
+        """! Whether the device supports moving all tensors in one transfer, None until
+        probed.
+        """
+        return self._capabilities.get("batched_io")
+
+    @_batched_io_supported.setter
+    def _batched_io_supported(self, supported: Optional[bool]) -> None:
+        self._capabilities["batched_io"] = supported
+
     def __exit__(self, exc_type, exc_value, exc_traceback) -> None:
         """! Exit calls close function to delete interpreter"""
         self.close()
@@ -76,11 +179,13 @@ class xcore_tflm_device_interpreter(xcore_tflm_base_interpreter):
         """
         model = self.get_model(model_index)
         self.download_model(
-            bytearray(model.model_content),
+            model.model_content,
             model.secondary_memory,
             model.flash,
             model.tile,
         )
+        if len(model.index.inputs) > 1 or len(model.index.outputs) > 1:
+            self._probe_batched_io(model_index)
         return
 
     def set_tensor(self, tensor_index, value: ndarray, model_index=0) -> None:
@@ -90,22 +195,11 @@ class xcore_tflm_device_interpreter(xcore_tflm_base_interpreter):
         @param model_index The engine to target, for interpreters that support multiple models
         running concurrently. Defaults to 0 for use with a single model.
         """
-        count: Optional[int]
-        tensor_details: Optional[Dict[str, Any]]
-        count, tensor_details = next(
-            filter(lambda x: x[1]["index"] == tensor_index, enumerate(self.get_input_details())),
-            (None, None)
-        )
+        count = self.get_model(model_index).index.input_position(tensor_index)
 
-        if count is None or tensor_details is None:
-            print(f"No tensor at index {tensor_index} found.", sys.stderr)
-            raise IndexError
+        if count is None:
+            raise IndexError(f"No tensor at index {tensor_index} found.")
 
-        tensor_type = tensor_details["dtype"]
-        if tensor_type == np.int32 or tensor_type == np.float32:
-            bpi = 4
-        else:
-            bpi = 1
         self._download_data(
             aisrv_cmd.CMD_SET_INPUT_TENSOR,
             value.tobytes(),
@@ -115,44 +209,162 @@ class xcore_tflm_device_interpreter(xcore_tflm_base_interpreter):
         print("Setting Input Tensor")
         return
 
-    def get_tensor(self, tensor_index: int = 0, model_index: int = 0, tensor: ndarray = None) -> ndarray:
+    def get_tensor(
+        self,
+        tensor_index: int = 0,
+        model_index: int = 0,
+        tensor: ndarray = None,
+        out: ndarray = None,
+    ) -> ndarray:
         """! Abstract for reading the data in the output tensor of a model.
         @param tensor_index  The index of output tensor to target.
-        @param tensor Tensor of correct shape to write into (optional)
+        @param tensor Tensor of correct shape to write into (optional), alias of out.
+        @param out Array of correct shape to write into (optional).
         @param model_index The engine to target, for interpreters that support multiple models
         running concurrently. Defaults to 0 for use with a single model.
         @return The data that was stored in the output tensor.
         """
 
-        count: Optional[int]
-        tensor_details: Optional[Dict[str, Any]]
-        count, tensor_details = next(
-            filter(lambda x: x[1]["index"] == tensor_index, enumerate(self.get_output_details())),
-            (None, None)
-        )
+        model_tensors = self.get_model(model_index).index
+        count = model_tensors.output_position(tensor_index)
 
-        if count is None or tensor_details is None:
-            print(f"No tensor at index {tensor_index} found.", sys.stderr)
-            raise IndexError
+        if count is None:
+            raise IndexError(f"No tensor at index {tensor_index} found.")
 
-        tensor_type = tensor_details["dtype"]
-        tensor_length = self.get_tensor_size(tensor_index, model_index)
+        tensor_details = model_tensors.tensors[tensor_index]
+        tensor_length = self._tensor_size(tensor_details)
 
+        if out is None:
+            out = tensor
+        if out is None:
+            out = np.empty(tensor_details.shape, dtype=tensor_details.dtype)
+
+        direct = (
+            out.flags.c_contiguous and out.flags.writeable and out.nbytes == tensor_length
+        )
+        # Read straight into the output array when possible
         data_read = self._upload_data(
             aisrv_cmd.CMD_GET_OUTPUT_TENSOR,
             tensor_length,
             tensor_num=count,
             engine_num=model_index,
+            buffer=out if direct else None,
         )
+        if len(data_read) != tensor_length:
+            raise AISRVIOError(
+                "Read %d bytes of output tensor %d, expected %d"
+                % (len(data_read), tensor_index, tensor_length)
+            )
+        if not direct:
+            output = np.frombuffer(data_read, dtype=tensor_details.dtype)
+            np.copyto(out, output.reshape(out.shape))
+        return out
+
+    def _probe_batched_io(self, model_index: int = 0) -> None:
+        """! Find whether the device supports moving all tensors in one transfer, once per
+        device. Probed after the model download, while no inference is running, so that the
+        short timeout of the probe cannot expire waiting for an inference.
+        @param model_index  The model to target.
+        """
+        if self._batched_io_supported is None:
+            self._read_all_outputs(model_index, probe=True)
+
+    def _read_all_outputs(
+        self, model_index: int = 0, probe: bool = False
+    ) -> Optional[List[ndarray]]:
+        """! Read every output tensor with a single CMD_GET_OUTPUT_TENSORS transfer.
+        @param model_index  The model to target.
+        @param probe  Find whether the device supports the command, which is otherwise only
+        sent once it is known to be supported.
+        @return  The output arrays, or None if the device does not support the command.
+        """
+        if not probe and not self._batched_io_supported:
+            return None
 
-        assert type(data_read) == list
-        assert type(data_read[0]) == int
-
-        x = np.array(data_read, np.uint8)
-        bytes = x.tobytes()
-        output = np.frombuffer(bytes, dtype=tensor_type)
+        output_details = self.get_model(model_index).index.outputs
+        sizes = [self._tensor_size(details) for details in output_details]
+        try:
+            data = self._upload_data(
+                aisrv_cmd.CMD_GET_OUTPUT_TENSORS,
+                sum(sizes),
+                engine_num=model_index,
+                probe=probe,
+            )
+        except AISRVIOError:
+            if not probe:
+                raise
+            # Older firmware stalls on or ignores unknown commands
+            self._batched_io_supported = False
+            return None
+        if len(data) != sum(sizes):
+            if not probe:
+                raise AISRVIOError(
+                    "Read %d bytes of output tensors, expected %d" % (len(data), sum(sizes))
+                )
+            self._batched_io_supported = False
+            return None
+        self._batched_io_supported = True
+
+        outputs = []
+        offset = 0
+        for details, size in zip(output_details, sizes):
+            output = np.frombuffer(
+                data, dtype=details.dtype, count=size // np.dtype(details.dtype).itemsize,
+                offset=offset,
+            )
+            outputs.append(output.reshape(details.shape))
+            offset += size
+        return outputs
+
+    def get_all_outputs(self, model_index: int = 0) -> List[ndarray]:
+        """! Read every output tensor of a model.
+        Models with multiple outputs are read in a single transfer if the device supports
+        it, and one tensor at a time otherwise.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        @return  List with the data of each output tensor.
+        """
+        if len(self.get_model(model_index).index.outputs) > 1:
+            outputs = self._read_all_outputs(model_index)
+            if outputs is not None:
+                return outputs
+        return super().get_all_outputs(model_index)
+
+    def set_all_inputs(
+        self, inputs: Union[ndarray, Sequence[ndarray]], model_index: int = 0
+    ) -> None:
+        """! Write every input tensor of a model.
+        Models with multiple inputs are written in a single transfer once the device has
+        been found to support it, and one tensor at a time otherwise.
+        @param inputs  An array for single input models, or a sequence with one array per input.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        """
+        input_details = self.get_model(model_index).index.inputs
+        # Only a failed read shows the command is unsupported, a device may ignore an
+        # unknown write, so writes wait for the read probed when the model was set
+        if len(input_details) == 1 or not self._batched_io_supported:
+            super().set_all_inputs(inputs, model_index)
+            return
+        inputs = self._input_list(inputs, model_index)
+
+        sizes = [self._tensor_size(details) for details in input_details]
+        frame = bytearray(sum(sizes))
+        frame_view = memoryview(frame)
+        offset = 0
+        for details, size, value in zip(input_details, sizes, inputs):
+            value = np.ascontiguousarray(value)
+            if value.nbytes != size:
+                raise SetTensorError(
+                    "mismatching size in set_all_inputs for tensor %d, %d vs %d"
+                    % (details.index, value.nbytes, size)
+                )
+            frame_view[offset : offset + size] = memoryview(value).cast("B")
+            offset += size
 
-        return np.reshape(output, tensor_details["shape"])
+        self._download_data(
+            aisrv_cmd.CMD_SET_INPUT_TENSORS, frame, engine_num=model_index
+        )
 
     def get_input_tensor(self, input_index=0, model_index=0) -> List[Union[int, Tuple[float]]]:
         """! Abstract for reading the data in the input tensor of a model.
@@ -170,15 +382,208 @@ class xcore_tflm_device_interpreter(xcore_tflm_base_interpreter):
             engine_num=model_index,
         )
 
-        assert type(data_read) == list
-        assert type(data_read[0]) == int
-
-        x = np.array(data_read, np.uint8)
-        bytes = x.tobytes()
-        output = np.frombuffer(bytes, dtype=np.uint32)
+        output = np.frombuffer(data_read, dtype=np.uint32)
 
         return output.tolist()
 
+    def invoke_pipelined(
+        self,
+        inputs: Iterable[Union[ndarray, Sequence[ndarray]]],
+        model_index: int = 0,
+        depth: int = 2,
+    ) -> Iterator[Union[ndarray, List[ndarray]]]:
+        """! Run a sequence of samples on the device, overlapping host work with the device.
+        Samples are drawn from inputs and prepared on one thread while another runs the
+        set, invoke and get round trips on the device, so neither producing inputs nor
+        consuming outputs stalls the device. The device processes one command at a time,
+        so the round trips of consecutive samples do not overlap each other: the time per
+        sample drops from the sum of the host and device work to the larger of the two,
+        and there is no gain when the host does no work per sample.
+        inputs is iterated on a background thread, up to depth samples ahead of the
+        outputs, so it must not use this interpreter.
+        @param inputs  Iterable of samples, each an array for single input models, or a
+        sequence with one array per input.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        @param depth  Number of samples prepared ahead, and of outputs held for the caller.
+        @return  Generator of the outputs of each sample in order, an array or a list of
+        arrays for models with multiple outputs.
+        """
+        prepared: "queue.Queue[Tuple[str, Any]]" = queue.Queue(depth)
+        results: "queue.Queue[Tuple[str, Any]]" = queue.Queue(depth)
+        stop = threading.Event()
+
+        def put(q: "queue.Queue[Tuple[str, Any]]", item: Tuple[str, Any]) -> bool:
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def get(q: "queue.Queue[Tuple[str, Any]]") -> Tuple[str, Any]:
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            return ("end", None)
+
+        def prepare() -> None:
+            try:
+                for sample in inputs:
+                    values = self._input_list(sample, model_index)
+                    values = [np.ascontiguousarray(value) for value in values]
+                    if not put(prepared, ("sample", values)):
+                        return
+                put(prepared, ("end", None))
+            except Exception as e:
+                put(prepared, ("error", e))
+
+        def run() -> None:
+            try:
+                while True:
+                    kind, values = get(prepared)
+                    if kind != "sample":
+                        put(results, (kind, values))
+                        return
+                    result = self.run(values, model_index)
+                    if not put(results, ("result", result)):
+                        return
+            except Exception as e:
+                put(results, ("error", e))
+
+        threads = [
+            threading.Thread(target=prepare, name="xcore_tflm_prepare", daemon=True),
+            threading.Thread(target=run, name="xcore_tflm_device", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                kind, value = get(results)
+                if kind == "error":
+                    raise value
+                if kind == "end":
+                    return
+                yield value
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def start_acquire_stream(self, engine_num=0) -> None:
+        """! Put the device in continuous sensor acquisition and inference mode."""
+        raise NotImplementedError
+
+    def stream_results(
+        self,
+        model_index: int = 0,
+        capacity: int = 16,
+        read_timings: bool = True,
+        start: bool = True,
+    ) -> Iterator[Tuple[List[ndarray], Optional[List[int]]]]:
+        """! Continuously drain the results of a device in acquisition stream mode.
+        A background thread reads the output tensors, and the operator timings, as fast as
+        the link allows into a ring buffer of capacity frames. A reading is a new frame if the
+        inference count of the device has changed since the previous one, starting from the
+        count when the generator is created, and frames the device ran between two readings
+        are counted as missed. Devices that do not report inference
+        counts are read for a new frame when the reading differs from the previous one, so
+        consecutive frames with identical outputs and timings are returned once and the
+        repeats counted as duplicates. When the caller falls behind the oldest frames are
+        overwritten and counted as dropped. No other commands may be sent to the device
+        while the generator is running, statistics are available from stream_stats.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        @param capacity  Number of frames held for the caller.
+        @param read_timings  Read the operator timings of every frame.
+        @param start  Send CMD_START_ACQUIRE_STREAM before draining.
+        @return  Generator of (outputs, timings) pairs, timings is None without read_timings.
+        """
+        ring: "collections.deque[Tuple[List[ndarray], Optional[List[int]]]]" = (
+            collections.deque(maxlen=capacity)
+        )
+        ready = threading.Condition()
+        stop = threading.Event()
+        error: List[Exception] = []
+        stats = {
+            "frames": 0,
+            "dropped": 0,
+            "duplicates": 0,
+            "missed": 0,
+            "seconds": 0.0,
+            "fps": 0.0,
+        }
+        self._stream_stats = stats
+
+        def drain(previous: Any) -> None:
+            start_time = time.perf_counter()
+            try:
+                while not stop.is_set():
+                    count = self.read_inference_count(model_index)
+                    outputs = self.get_all_outputs(model_index)
+                    timings = self.read_times(model_index) if read_timings else None
+                    if count is None:
+                        reading: Any = ([output.tobytes() for output in outputs], timings)
+                    else:
+                        # Outputs read while the next frame completed may mix two frames
+                        if self.read_inference_count(model_index) != count:
+                            continue
+                        reading = count
+                    if reading == previous:
+                        stats["duplicates"] += 1
+                        continue
+                    if count is not None and previous is not None:
+                        stats["missed"] += (count - previous - 1) % 2**32
+                    previous = reading
+                    with ready:
+                        if len(ring) == ring.maxlen:
+                            stats["dropped"] += 1
+                        ring.append((outputs, timings))
+                        stats["frames"] += 1
+                        stats["seconds"] = time.perf_counter() - start_time
+                        stats["fps"] = stats["frames"] / stats["seconds"]
+                        ready.notify()
+            except Exception as e:
+                error.append(e)
+            finally:
+                with ready:
+                    stop.set()
+                    ready.notify()
+
+        # Only the frames run after this call are new
+        baseline = self.read_inference_count(model_index)
+        if start:
+            self.start_acquire_stream(engine_num=model_index)
+        thread = threading.Thread(
+            target=drain, args=(baseline,), name="xcore_tflm_stream", daemon=True
+        )
+        thread.start()
+        try:
+            while True:
+                with ready:
+                    while not ring and not stop.is_set():
+                        ready.wait()
+                    if not ring:
+                        break
+                    frame = ring.popleft()
+                yield frame
+            if error:
+                raise error[0]
+        finally:
+            stop.set()
+            thread.join()
+
+    def stream_stats(self) -> Dict[str, float]:
+        """! Read the statistics of the latest acquisition stream.
+        @return  The number of frames, dropped frames, repeated readings of the same frame
+        and frames missed between readings, the elapsed seconds and the sustained frames
+        per second.
+        """
+        return dict(self._stream_stats)
+
     @abstractmethod
     def invoke(self, model_index=0) -> None:
         pass
@@ -190,7 +595,7 @@ class xcore_tflm_device_interpreter(xcore_tflm_base_interpreter):
         """
         return
 
-    def tensor_arena_size(self) -> int:
+    def tensor_arena_size(self, model_index: int = 0) -> int:
         """! Abstract to read the size of the tensor arena required
         @return size of the tensor arena as an integer
         """
@@ -202,7 +607,7 @@ class xcore_tflm_device_interpreter(xcore_tflm_base_interpreter):
         """
         raise NotImplementedError
 
-    def print_memory_plan(self) -> None:
+    def print_memory_plan(self, model_index: int = 0) -> None:
         """! Abstract to print a plan of memory allocation"""
         raise NotImplementedError
 
@@ -218,20 +623,67 @@ class xcore_tflm_device_interpreter(xcore_tflm_base_interpreter):
         """! Abstract to clear errors on the device"""
         pass
 
+    def read_model_hash(self, model_index: int = 0) -> Optional[Tuple[int, int]]:
+        """! Read the hash of the model loaded on the device.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        @return  The length and CRC-32 of the loaded model, or None if the device does not
+        report model hashes.
+        """
+        if not self._model_hash_supported:
+            return None
+        try:
+            data = self._upload_data(
+                aisrv_cmd.CMD_GET_MODEL_HASH, 8, engine_num=model_index, probe=True
+            )
+        except AISRVIOError:
+            # Older firmware stalls on or ignores unknown commands
+            self._model_hash_supported = False
+            return None
+        if len(data) != 8:
+            self._model_hash_supported = False
+            return None
+        self._model_hash_supported = True
+        return struct.unpack("<II", data)
+
+    def read_inference_count(self, model_index: int = 0) -> Optional[int]:
+        """! Read the number of inferences the device has run since the model was set.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        @return  The inference count, which wraps around at 2**32, or None if the device
+        does not report inference counts.
+        """
+        if not self._inference_count_supported:
+            return None
+        try:
+            data = self._upload_data(
+                aisrv_cmd.CMD_GET_INFERENCE_COUNT, 4, engine_num=model_index, probe=True
+            )
+        except AISRVIOError:
+            # Older firmware stalls on or ignores unknown commands
+            self._inference_count_supported = False
+            return None
+        if len(data) != 4:
+            self._inference_count_supported = False
+            return None
+        self._inference_count_supported = True
+        return struct.unpack("<I", data)[0]
+
     def download_model(
-            self, model_bytes: bytearray, secondary_memory: bool = False, flash: bool = False, model_index: int = 0
+            self, model_bytes: Union[bytes, bytearray, mmap.mmap], secondary_memory: bool = False, flash: bool = False, model_index: int = 0, force: bool = False
     ):
         """! Download a model on to the device.
-        @param model_bytes  The byte array containing the model.
+        The download is skipped if the same model was already downloaded to the engine in
+        this session, or if the device reports a loaded model with the same hash.
+        @param model_bytes  The byte array containing the model, or a memory map of it.
         @param secondary_memory  Download the model to primary and secondary memory.
         @param flash  Store the model in flash memory.
         @param model_index  The model to target, for interpreters that support multiple models
         running concurrently. Defaults to 0 for use with a single model.
+        @param force  Download the model even if the device already holds it.
         """
 
         if not flash:
-            assert type(model_bytes) == bytearray
-
             print("Model length (bytes): " + str(len(model_bytes)))
 
             if secondary_memory:
@@ -249,12 +701,35 @@ class xcore_tflm_device_interpreter(xcore_tflm_base_interpreter):
                 print("Loading model to primary memory")
                 cmd = aisrv_cmd.CMD_SET_MODEL_PRIMARY_FLASH
 
+        if flash:
+            self._model_hashes.pop(model_index, None)
+        else:
+            hash_ = model_hash(model_bytes)
+            if not force and self._model_hashes.get(model_index) == (cmd, *hash_):
+                print("Model already downloaded, skipping download")
+                return
+            if not force and self.read_model_hash(model_index) == hash_:
+                print("Model already on device, skipping download")
+                self._model_hashes[model_index] = (cmd, *hash_)
+                return
+
         try:
             # Download model to device
+            start = time.perf_counter()
             self._download_data(cmd, model_bytes, engine_num=model_index)
-        except IOError:
-            print("IO Error\n")
-            raise IOError
+            seconds = time.perf_counter() - start
+        except AISRVIOError:
+            self._model_hashes.pop(model_index, None)
+            raise
+
+        if not flash:
+            self._model_hashes[model_index] = (cmd, *hash_)
+
+        if seconds > 0:
+            print(
+                "Model downloaded in %.3f s (%.2f MB/s)"
+                % (seconds, len(model_bytes) / seconds / 1e6)
+            )
 
     def read_debug_log(self) -> str:
         """! Read the debug log on device (TFLM Error Reporter)."""
@@ -262,7 +737,7 @@ class xcore_tflm_device_interpreter(xcore_tflm_base_interpreter):
             aisrv_cmd.CMD_GET_DEBUG_LOG, 256
         )  # TODO rm magic number
 
-        r = bytearray(debug_string).decode("utf8", errors="replace")
+        r = bytes(debug_string).decode("utf8", errors="replace")
         return r
 
     def read_times(self, model_index: int = 0) -> List[Union[int, Tuple[float]]]:
@@ -277,14 +752,85 @@ class xcore_tflm_device_interpreter(xcore_tflm_base_interpreter):
             aisrv_cmd.CMD_GET_TIMINGS, ops_length * 4, engine_num=model_index
         )
 
-        x = np.array(times_bytes, np.uint8)
-        bytes = x.tobytes()
-        output = np.frombuffer(bytes, dtype=np.uint32)
+        output = np.frombuffer(times_bytes, dtype=np.uint32)
 
         return output.tolist()
 
+    def _transfer_size(self, block_size: Optional[int] = None) -> int:
+        """! Size of the bulk transfers data is split into, a whole number of packets.
+        @param block_size  The packet size, defaults to the packet size of reads.
+        @return  The transfer size in bytes.
+        """
+        if block_size is None:
+            block_size = self._max_block_size
+        return max(XCORE_IE_MAX_TRANSFER_SIZE // block_size * block_size, block_size)
+
+    def _transfer_timeout(self, length: int, timeout: int = XCORE_IE_TIMEOUT_MS) -> int:
+        """! Timeout of a transfer, scaled to its length.
+        @param length  Length of the transfer in bytes.
+        @param timeout  Timeout of a transfer without data, in milliseconds.
+        @return  The timeout in milliseconds.
+        """
+        return timeout + length * 1000 // XCORE_IE_MIN_BYTES_PER_SECOND
+
+    def _record_transfer(self, direction: str, length: int, seconds: float) -> None:
+        """! Add a completed transfer to the transfer statistics.
+        @param direction  "upload" or "download".
+        @param length  Length of the transfer in bytes.
+        @param seconds  Duration of the transfer.
+        """
+        totals = self._transfers[direction]
+        totals[0] += length
+        totals[1] += seconds
+
+    def transfer_stats(self) -> Dict[str, Dict[str, float]]:
+        """! Read the data transferred to and from the device since connecting.
+        @return  For "upload" and "download", the bytes, seconds and achieved MB/s.
+        """
+        return {
+            direction: {
+                "bytes": length,
+                "seconds": seconds,
+                "mb_per_second": length / seconds / 1e6 if seconds > 0 else 0.0,
+            }
+            for direction, (length, seconds) in self._transfers.items()
+        }
+
+    def profile(
+        self,
+        runs: int = 100,
+        inputs: Optional[Union[ndarray, Sequence[ndarray]]] = None,
+        model_index: int = 0,
+        warmup: int = 1,
+    ) -> "OpTimings":
+        """! Invoke the model repeatedly and collect the operator timings of every run.
+        @param runs  Number of profiled runs.
+        @param inputs  Inputs to set before the first run (optional), an array for single
+        input models, or a sequence with one array per input.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        @param warmup  Number of runs before profiling.
+        @return  The runs x ops timings, with per operator statistics and JSON/CSV export.
+        """
+        from xmos_ai_tools.xinterpreters.device.profiler import profile
+
+        return profile(self, runs, inputs, model_index, warmup)
+
     @abstractmethod
-    def _upload_data(self, cmd, length, sign=False, tensor_num=0, engine_num=0) -> bytes:
+    def _upload_data(
+        self, cmd, length, sign=False, tensor_num=0, engine_num=0, buffer=None, probe=False
+    ) -> memoryview:
+        """! Abstract to read data from the device.
+        @param cmd  The command requesting the data.
+        @param length  The expected length of the data in bytes.
+        @param buffer  Writable, contiguous buffer of length bytes to read into (optional),
+        a new bytearray is allocated otherwise.
+        @param probe  The command may be unsupported by the device, fail without reporting
+        the error or reading the debug log, and wait for the reply for XCORE_IE_TIMEOUT_MS
+        only.
+        @return  A byte view of the data read, in buffer.
+        @throws AISRVIOError  The transfer failed.
+        """
         raise NotImplementedError
 
     @abstractmethod
@@ -293,53 +839,103 @@ class xcore_tflm_device_interpreter(xcore_tflm_base_interpreter):
 
 
 class xcore_tflm_usb_interpreter(xcore_tflm_device_interpreter):
-    def __init__(self, timeout=500000):
+    def __init__(self, timeout=500000, device=None):
+        """! USB interpreter initializer.
+        @param timeout  Timeout of command writes in milliseconds.
+        @param device  The pyusb device to connect to, as returned by find_devices. Defaults
+        to the first AISRV device found.
+        """
         self._out_ep = None
         self._in_ep = None
         self._dev = None
+        # Staging buffer of uploads, allocated for the IN endpoint on connect
+        self._upload_buffer = None
+        self._device = device
         self._timeout = timeout
         super().__init__()
 
     def _download_data(self, cmd, data_bytes, tensor_num=0, engine_num=0):
         import usb
 
+        data = memoryview(data_bytes).cast("B")
+        transfer_size = self._transfer_size(self._out_max_block_size)
+
         try:
+            start = time.perf_counter()
             self._out_ep.write(bytes([cmd, engine_num, tensor_num]))
-            self._out_ep.write(data_bytes, 1000)
 
-            if (len(data_bytes) % self._max_block_size) == 0:
-                self._out_ep.write(bytearray([]), 1000)
+            # Every transfer but the last is a whole number of packets, so the device
+            # sees one stream ending at the first short packet
+            for offset in range(0, max(len(data), 1), transfer_size):
+                transfer = array.array("B")
+                transfer.frombytes(data[offset : offset + transfer_size])
+                self._out_ep.write(transfer, self._transfer_timeout(len(transfer)))
+
+            if (len(data) % self._out_max_block_size) == 0:
+                self._out_ep.write(bytearray([]), XCORE_IE_TIMEOUT_MS)
+
+            self._record_transfer("download", len(data), time.perf_counter() - start)
 
         except usb.core.USBError as e:
             if e.backend_error_code == usb.backend.libusb1.LIBUSB_ERROR_PIPE:
-                print("USB error, DOWNLOAD IN/OUT pipe halted")
                 self._clear_error()
-                print("DEBUG LOG: ", self.read_debug_log())
-                raise IOError()
-
-    def _upload_data(self, cmd, length, sign=False, tensor_num=0, engine_num=0):
+                raise AISRVIOError(
+                    "USB error, DOWNLOAD IN/OUT pipe halted, debug log: %s"
+                    % self.read_debug_log()
+                ) from e
+            raise AISRVIOError("USB error, DOWNLOAD failed: %s" % e) from e
+
+    def _upload_data(
+        self, cmd, length, sign=False, tensor_num=0, engine_num=0, buffer=None, probe=False
+    ) -> memoryview:
         import usb
 
-        read_data = []
+        if buffer is None:
+            buffer = bytearray(length)
+        read_data = memoryview(buffer).cast("B")
+        read_total = 0
+
+        # Staging buffer of a whole number of packets, a transfer ends early at the short
+        # or zero length packet ending the upload
+        buff = self._upload_buffer
+        buff_view = memoryview(buff)
+        transfer_size = len(buff)
 
         try:
-            self._out_ep.write(bytes([cmd, engine_num, tensor_num]), self._timeout)
-            buff = usb.util.create_buffer(self._max_block_size)
+            start = time.perf_counter()
+            if probe:
+                # Firmware without the command never answers, do not wait for an inference
+                write_timeout = timeout = XCORE_IE_TIMEOUT_MS
+            else:
+                write_timeout = self._timeout
+                timeout = self._transfer_timeout(transfer_size, XCORE_IE_READ_TIMEOUT_MS)
+            self._out_ep.write(bytes([cmd, engine_num, tensor_num]), write_timeout)
 
             while True:
-                read_len = self._dev.read(self._in_ep, buff, 10000)
-                read_data.extend(buff[:read_len])
-                if read_len != self._max_block_size:
+                # A transfer ends early at a short packet, which ends the upload
+                read_len = self._dev.read(self._in_ep, buff, timeout)
+                # Data beyond the expected length is drained and discarded
+                n = min(read_len, len(read_data) - read_total)
+                read_data[read_total : read_total + n] = buff_view[:n]
+                read_total += n
+                if read_len != transfer_size:
                     break
 
-            return read_data
+            self._record_transfer("upload", read_total, time.perf_counter() - start)
+            return read_data[:read_total]
 
         except usb.core.USBError as e:
             if e.backend_error_code == usb.backend.libusb1.LIBUSB_ERROR_PIPE:
-                print("USB error, UPLOAD IN/OUT pipe halted")
                 self._clear_error()
-                print("DEBUG LOG: ", self.read_debug_log())
-                raise IOError()
+                if not probe:
+                    raise AISRVIOError(
+                        "USB error, UPLOAD IN/OUT pipe halted, debug log: %s"
+                        % self.read_debug_log()
+                    ) from e
+            raise AISRVIOError("USB error, UPLOAD failed: %s" % e) from e
+
+    def _device_key(self) -> Any:
+        return ("usb", self._dev.bus, self._dev.address)
 
     def _clear_error(self):
         import usb
@@ -352,8 +948,13 @@ class xcore_tflm_usb_interpreter(xcore_tflm_device_interpreter):
 
         self._dev = None
         while self._dev is None:
-            # TODO - more checks that we have the right device..
-            self._dev = usb.core.find(idVendor=0x20B1, idProduct=0xA15E)
+            if self._device is not None:
+                self._dev = self._device
+            else:
+                # TODO - more checks that we have the right device..
+                self._dev = usb.core.find(
+                    idVendor=AISRV_USB_VENDOR_ID, idProduct=AISRV_USB_PRODUCT_ID
+                )
 
             # set the active configuration. With no arguments, the first
             # configuration will be the active one
@@ -377,8 +978,10 @@ class xcore_tflm_usb_interpreter(xcore_tflm_device_interpreter):
                                         self._dev.set_configuration()
                                     except usb.core.USBError:
                                         self._clear_error()
-                                        print("USB error : Could not detach kernel driver from interface({0})".format(intf.bInterfaceNumber))
-                                        raise IOError()
+                                        raise AISRVIOError(
+                                            "USB error : Could not detach kernel driver "
+                                            "from interface({0})".format(intf.bInterfaceNumber)
+                                        )
                 cfg = self._dev.get_active_configuration()
 
             # print("found device: \n" + str(cfg))
@@ -401,6 +1004,11 @@ class xcore_tflm_usb_interpreter(xcore_tflm_device_interpreter):
             assert self._out_ep is not None
             assert self._in_ep is not None
 
+            # Transfers are split into and terminated by packets of the endpoint size
+            self._max_block_size = self._in_ep.wMaxPacketSize
+            self._out_max_block_size = self._out_ep.wMaxPacketSize
+            self._upload_buffer = usb.util.create_buffer(self._transfer_size())
+
             print("Connected to AISRV via USB")
 
     def invoke(self, model_index=0):
@@ -468,7 +1076,7 @@ class xcore_tflm_usb_interpreter(xcore_tflm_device_interpreter):
         )
         self._out_ep.write(bytes([0]), 1000)
 
-    def set_output_gpio_threshold(self, index, threshold):
+    def set_output_gpio_threshold(self, index, threshold, engine_num=0):
         self._out_ep.write(
             bytes([aisrv_cmd.CMD_SET_OUTPUT_GPIO_THRESH, engine_num, 0]), 1000
         )
@@ -0,0 +1,185 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import collections
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from numpy import ndarray
+
+from xmos_ai_tools.xinterpreters.device.device_interpreter import (
+    xcore_tflm_device_interpreter,
+    xcore_tflm_usb_interpreter,
+    find_devices,
+)
+
+Outputs = Union[ndarray, List[ndarray]]
+
+
+class xcore_tflm_usb_interpreter_pool:
+    """! Shards inferences across every attached AISRV device.
+    Each device has its own queue and worker thread, and each inference is queued on
+    the device with the fewest outstanding inferences.
+    """
+
+    def __init__(
+        self,
+        model_path: Optional[str] = None,
+        model_content: Optional[bytes] = None,
+        secondary_memory: bool = False,
+        flash: bool = False,
+        devices: Optional[Sequence[Any]] = None,
+        interpreters: Optional[Sequence[xcore_tflm_device_interpreter]] = None,
+    ) -> None:
+        """! Device pool initializer.
+        Connects to the devices and loads the model onto each of them.
+        @param model_path The path to the model file (.tflite), alternative to model_content.
+        @param model_content The byte array representing a model, alternative to model_path.
+        @param secondary_memory  Download the model to primary and secondary memory.
+        @param flash  Load the model from flash memory.
+        @param devices  The pyusb devices to use, defaults to every AISRV device found.
+        @param interpreters  Connected device interpreters to use instead of devices.
+        """
+        if interpreters is None:
+            if devices is None:
+                devices = find_devices()
+            interpreters = [xcore_tflm_usb_interpreter(device=device) for device in devices]
+        if not interpreters:
+            raise ValueError("No AISRV devices found")
+
+        self._interpreters = list(interpreters)
+        self._queues: List["queue.Queue[Optional[tuple]]"] = []
+        self._outstanding = [0] * len(self._interpreters)
+        self._completed = [0] * len(self._interpreters)
+
+        self._lock = threading.Lock()
+        self._start_time: Optional[float] = None
+        self._end_time: Optional[float] = None
+
+        self._workers: List[threading.Thread] = []
+        for device_index, ie in enumerate(self._interpreters):
+            ie.set_model(
+                model_path=model_path,
+                model_content=model_content,
+                secondary_memory=secondary_memory,
+                flash=flash,
+            )
+            self._queues.append(queue.Queue())
+            worker = threading.Thread(
+                target=self._work,
+                args=(device_index,),
+                name=f"xcore_tflm_usb_{device_index}",
+                daemon=True,
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def __enter__(self) -> "xcore_tflm_usb_interpreter_pool":
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback) -> None:
+        """! Exit calls close function to delete the interpreters"""
+        self.close()
+
+    @property
+    def num_devices(self) -> int:
+        """! Number of devices in the pool."""
+        return len(self._interpreters)
+
+    def _work(self, device_index: int) -> None:
+        """! Worker of a device, runs the inferences queued on it in order."""
+        ie = self._interpreters[device_index]
+        tasks = self._queues[device_index]
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+            future, inputs = task
+            result: Any = None
+            error: Optional[Exception] = None
+            running = future.set_running_or_notify_cancel()
+            if running:
+                try:
+                    result = ie.run(inputs)
+                except Exception as e:
+                    error = e
+            # Free the device before waking the caller, so its next submit can use it
+            with self._lock:
+                self._outstanding[device_index] -= 1
+                if running and error is None:
+                    self._completed[device_index] += 1
+                    self._end_time = time.perf_counter()
+            if error is not None:
+                future.set_exception(error)
+            elif running:
+                future.set_result(result)
+
+    def submit(self, inputs: Union[ndarray, Sequence[ndarray]]) -> Future:
+        """! Queue an inference on the least busy device.
+        @param inputs  An array for single input models, or a sequence with one array per input.
+        @return  A future holding the output array, or a list of output arrays for models
+        with multiple outputs.
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._start_time is None:
+                self._start_time = time.perf_counter()
+            device_index = min(
+                range(len(self._outstanding)), key=self._outstanding.__getitem__
+            )
+            self._outstanding[device_index] += 1
+        self._queues[device_index].put((future, inputs))
+        return future
+
+    def map(self, inputs: Iterable[Union[ndarray, Sequence[ndarray]]]) -> Iterator[Outputs]:
+        """! Run inferences across the devices for an iterable of inputs.
+        Only a few inferences per device are queued at a time, so faster devices are
+        given more of the inputs.
+        @param inputs  Iterable of inputs, as accepted by submit.
+        @return  Iterator over the outputs, in the order of the inputs.
+        """
+        futures: "collections.deque[Future]" = collections.deque()
+        for x in inputs:
+            if len(futures) >= 2 * self.num_devices:
+                yield futures.popleft().result()
+            futures.append(self.submit(x))
+        while futures:
+            yield futures.popleft().result()
+
+    def stats(self) -> Dict[str, Any]:
+        """! Read the throughput of the pool since the first submitted inference.
+        @return  The number of completed inferences, the elapsed time in seconds, the
+        aggregate throughput in inferences per second and the inferences completed by
+        each device.
+        """
+        with self._lock:
+            completed = list(self._completed)
+            elapsed = 0.0
+            if self._start_time is not None and self._end_time is not None:
+                elapsed = self._end_time - self._start_time
+        count = sum(completed)
+        return {
+            "inferences": count,
+            "seconds": elapsed,
+            "inferences_per_second": count / elapsed if elapsed > 0 else 0.0,
+            "inferences_per_device": completed,
+        }
+
+    def reset_stats(self) -> None:
+        """! Reset the throughput statistics."""
+        with self._lock:
+            self._completed = [0] * len(self._interpreters)
+            self._start_time = None
+            self._end_time = None
+
+    def close(self) -> None:
+        """! Finish the queued inferences and disconnect from the devices."""
+        for tasks in self._queues:
+            tasks.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+        for ie in self._interpreters:
+            ie.close()
@@ -0,0 +1,314 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+import xmos_ai_tools.xinterpreters.device.aisrv_cmd as aisrv_cmd
+from xmos_ai_tools.xinterpreters.device.device_interpreter import (
+    xcore_tflm_device_interpreter,
+    model_hash,
+    AISRVIOError,
+)
+from xmos_ai_tools.xinterpreters.host.host_interpreter import (
+    xcore_tflm_host_interpreter,
+)
+
+_SET_MODEL_COMMANDS = (
+    aisrv_cmd.CMD_SET_MODEL_PRIMARY,
+    aisrv_cmd.CMD_SET_MODEL_SECONDARY,
+    aisrv_cmd.CMD_SET_MODEL_PRIMARY_FLASH,
+    aisrv_cmd.CMD_SET_MODEL_SECONDARY_FLASH,
+)
+
+
+class AISRVEmulator:
+    """! Software stand-in for an AISRV device.
+    Handles the AISRV commands of the device interpreter with a host interpreter, one
+    model per engine, and delays every transfer to emulate the latency and bandwidth of
+    the link. Commands a device would stall on raise AISRVIOError. In acquisition stream
+    mode a background thread plays the frames set with set_sensor into the first model
+    input and runs an inference per frame, as a device does with its sensor.
+    """
+
+    def __init__(
+        self,
+        bandwidth: Optional[float] = None,
+        latency: float = 0.0,
+        max_tensor_arena_size: Optional[int] = None,
+    ) -> None:
+        """! Emulator initializer.
+        @param bandwidth  Link bandwidth in bytes per second, None for no limit.
+        @param latency  Time taken by every transfer in seconds, on top of the data.
+        @param max_tensor_arena_size  Tensor arena size of the host interpreter (optional).
+        """
+        self.bandwidth = bandwidth
+        self.latency = latency
+        if max_tensor_arena_size is None:
+            self.interpreter = xcore_tflm_host_interpreter()
+        else:
+            self.interpreter = xcore_tflm_host_interpreter(max_tensor_arena_size)
+        # Hash of the model loaded in each engine
+        self._model_hashes: Dict[int, Any] = {}
+        # Number of inferences run by each engine since its model was set
+        self._inference_counts: Dict[int, int] = {}
+        self._debug_log = b""
+        # The device handles one command at a time
+        self._lock = threading.Lock()
+        # Sensor frames and frame rate of the acquisition stream
+        self._sensor_frames: Optional[Iterable[Any]] = None
+        self._frame_rate: Optional[float] = None
+        self._stream_thread: Optional[threading.Thread] = None
+        self._stream_stop = threading.Event()
+        # Number of frames run by acquisition streams
+        self.frames_acquired = 0
+        # Commands the connected interpreters found the emulator to support, shared by
+        # their sessions like the capabilities of a USB device
+        self.capabilities: Dict[str, Optional[bool]] = {}
+
+    def set_sensor(self, frames: Iterable[Any], frame_rate: Optional[float] = None) -> None:
+        """! Set the frames acquired by the sensor in acquisition stream mode.
+        @param frames  Iterable of frames, each the data of the first model input.
+        @param frame_rate  Frames acquired per second, None to run frames back to back.
+        """
+        self._sensor_frames = frames
+        self._frame_rate = frame_rate
+
+    def _start_stream(self, engine_num: int) -> None:
+        """! Start the acquisition stream thread, called with the lock held.
+        @param engine_num  The engine running inference on the frames.
+        """
+        if self._sensor_frames is None:
+            raise AISRVIOError("No sensor frames set for the acquisition stream")
+        if self._stream_thread is not None and self._stream_thread.is_alive():
+            raise AISRVIOError("Acquisition stream already running")
+        self._stream_stop.clear()
+        self._stream_thread = threading.Thread(
+            target=self._acquire,
+            args=(iter(self._sensor_frames), self._frame_rate, engine_num),
+            name="aisrv_emulator_stream",
+            daemon=True,
+        )
+        self._stream_thread.start()
+
+    def _acquire(self, frames: Any, frame_rate: Optional[float], engine_num: int) -> None:
+        """! Run an inference per sensor frame until the frames end or the stream stops.
+        @param frames  Iterator of frames.
+        @param frame_rate  Frames acquired per second, None to run frames back to back.
+        @param engine_num  The engine running inference on the frames.
+        """
+        period = 1.0 / frame_rate if frame_rate else 0.0
+        next_frame = time.perf_counter()
+        for frame in frames:
+            if self._stream_stop.wait(max(0.0, next_frame - time.perf_counter())):
+                return
+            next_frame += period
+            with self._lock:
+                try:
+                    self.interpreter.set_tensor(0, np.asarray(frame), engine_num)
+                    self.interpreter.invoke(engine_num)
+                except Exception as e:
+                    self._debug_log = str(e).encode("utf-8")
+                    return
+                self._count_inference(engine_num)
+                self.frames_acquired += 1
+
+    def stop_stream(self) -> None:
+        """! Stop the acquisition stream and wait for the frame being run."""
+        self._stream_stop.set()
+        if self._stream_thread is not None:
+            self._stream_thread.join()
+            self._stream_thread = None
+
+    def _count_inference(self, engine_num: int) -> None:
+        """! Count an inference run by an engine, called with the lock held."""
+        count = self._inference_counts.get(engine_num, 0)
+        self._inference_counts[engine_num] = (count + 1) % 2**32
+
+    def _transfer(self, length: int) -> None:
+        """! Wait for the duration of a transfer over the link.
+        @param length  Length of the transfer in bytes.
+        """
+        seconds = self.latency
+        if self.bandwidth:
+            seconds += length / self.bandwidth
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def download(self, cmd: int, data: Any, tensor_num: int = 0, engine_num: int = 0) -> None:
+        """! Handle a command sending data to the device.
+        @param cmd  The command.
+        @param data  The data sent with the command.
+        @param tensor_num  The tensor targeted by the command.
+        @param engine_num  The engine targeted by the command.
+        """
+        self._transfer(len(data))
+        with self._lock:
+            try:
+                if cmd in _SET_MODEL_COMMANDS:
+                    model_content = bytes(data)
+                    self.interpreter.set_model(
+                        model_content=model_content, model_index=engine_num
+                    )
+                    self._model_hashes[engine_num] = model_hash(model_content)
+                    self._inference_counts[engine_num] = 0
+                elif cmd == aisrv_cmd.CMD_SET_INPUT_TENSOR:
+                    self.interpreter.set_tensor(
+                        tensor_num, np.frombuffer(data, dtype=np.uint8), engine_num
+                    )
+                elif cmd == aisrv_cmd.CMD_SET_INPUT_TENSORS:
+                    data = np.frombuffer(data, dtype=np.uint8)
+                    offset = 0
+                    for i, details in enumerate(
+                        self.interpreter.get_model(engine_num).index.inputs
+                    ):
+                        size = self.interpreter.get_tensor_size(details.index, engine_num)
+                        self.interpreter.set_tensor(
+                            i, data[offset : offset + size], engine_num
+                        )
+                        offset += size
+                elif cmd == aisrv_cmd.CMD_START_INFER:
+                    self.interpreter.invoke(engine_num)
+                    self._count_inference(engine_num)
+                elif cmd == aisrv_cmd.CMD_START_ACQUIRE_STREAM:
+                    self._start_stream(engine_num)
+                else:
+                    raise AISRVIOError("Unsupported command 0x%02x" % cmd)
+            except AISRVIOError:
+                raise
+            except Exception as e:
+                self._debug_log = str(e).encode("utf-8")
+                raise AISRVIOError(str(e)) from e
+
+    def upload(self, cmd: int, length: int, tensor_num: int = 0, engine_num: int = 0) -> bytes:
+        """! Handle a command reading data from the device.
+        @param cmd  The command.
+        @param length  Length of the data expected by the host.
+        @param tensor_num  The tensor targeted by the command.
+        @param engine_num  The engine targeted by the command.
+        @return  The data returned by the device.
+        """
+        with self._lock:
+            try:
+                data = self._upload(cmd, length, tensor_num, engine_num)
+            except AISRVIOError:
+                raise
+            except Exception as e:
+                self._debug_log = str(e).encode("utf-8")
+                raise AISRVIOError(str(e)) from e
+        self._transfer(len(data))
+        return data
+
+    def _upload(self, cmd: int, length: int, tensor_num: int, engine_num: int) -> bytes:
+        ie = self.interpreter
+        if cmd == aisrv_cmd.CMD_GET_OUTPUT_TENSOR:
+            details = ie.get_model(engine_num).index.outputs[tensor_num]
+            return ie.get_tensor(details.index, engine_num).tobytes()
+        if cmd == aisrv_cmd.CMD_GET_OUTPUT_TENSORS:
+            return b"".join(
+                ie.get_tensor(details.index, engine_num).tobytes()
+                for details in ie.get_model(engine_num).index.outputs
+            )
+        if cmd == aisrv_cmd.CMD_GET_INPUT_TENSOR:
+            return ie.get_input_tensor(tensor_num, engine_num).tobytes()
+        if cmd == aisrv_cmd.CMD_GET_TIMINGS:
+            return np.array(ie.read_times(engine_num), dtype=np.uint32).tobytes()
+        if cmd == aisrv_cmd.CMD_GET_MODEL_HASH:
+            if engine_num not in self._model_hashes:
+                return bytes(8)
+            return struct.pack("<II", *self._model_hashes[engine_num])
+        if cmd == aisrv_cmd.CMD_GET_INFERENCE_COUNT:
+            return struct.pack("<I", self._inference_counts.get(engine_num, 0))
+        if cmd == aisrv_cmd.CMD_GET_DEBUG_LOG:
+            return self._debug_log[:length]
+        raise AISRVIOError("Unsupported command 0x%02x" % cmd)
+
+    def tensor_arena_size(self, engine_num: int = 0) -> int:
+        """! Read the size of the tensor arena used by the model of an engine."""
+        with self._lock:
+            return self.interpreter.tensor_arena_size(engine_num)
+
+    def close(self) -> None:
+        """! Stop the acquisition stream and delete the host interpreters of every engine."""
+        self.stop_stream()
+        with self._lock:
+            self.interpreter.__exit__(None, None, None)
+
+
+class xcore_tflm_emulated_interpreter(xcore_tflm_device_interpreter):
+    """! Device interpreter connected to an AISRVEmulator instead of a device.
+    Runs the device interpreter code paths without hardware, e.g. in CI.
+    """
+
+    def __init__(
+        self,
+        emulator: Optional[AISRVEmulator] = None,
+        bandwidth: Optional[float] = None,
+        latency: float = 0.0,
+        max_block_size: Optional[int] = None,
+    ) -> None:
+        """! Emulated interpreter initializer.
+        @param emulator  The emulator to connect to, a new one is created by default.
+        @param bandwidth  Link bandwidth in bytes per second of a new emulator.
+        @param latency  Latency of every transfer in seconds of a new emulator.
+        @param max_block_size  Packet size of the emulated link (optional).
+        """
+        # An emulator created here is closed with the interpreter
+        self._owns_emulator = emulator is None
+        if emulator is None:
+            emulator = AISRVEmulator(bandwidth, latency)
+        self.emulator = emulator
+        self._block_size = max_block_size
+        super().__init__()
+
+    def connect(self) -> None:
+        if self._block_size is not None:
+            self._max_block_size = self._out_max_block_size = self._block_size
+
+    def _device_capabilities(self) -> Dict[str, Optional[bool]]:
+        return self.emulator.capabilities
+
+    def _clear_error(self) -> None:
+        pass
+
+    def _download_data(self, cmd, data_bytes, tensor_num=0, engine_num=0) -> None:
+        data = memoryview(data_bytes).cast("B")
+        start = time.perf_counter()
+        self.emulator.download(cmd, data, tensor_num, engine_num)
+        self._record_transfer("download", len(data), time.perf_counter() - start)
+
+    def _upload_data(
+        self, cmd, length, sign=False, tensor_num=0, engine_num=0, buffer=None, probe=False
+    ) -> memoryview:
+        if buffer is None:
+            buffer = bytearray(length)
+        read_data = memoryview(buffer).cast("B")
+
+        start = time.perf_counter()
+        data = self.emulator.upload(cmd, length, tensor_num, engine_num)
+        read_total = min(len(data), len(read_data))
+        read_data[:read_total] = data[:read_total]
+        self._record_transfer("upload", read_total, time.perf_counter() - start)
+        return read_data[:read_total]
+
+    def invoke(self, model_index=0) -> None:
+        self._download_data(aisrv_cmd.CMD_START_INFER, b"", engine_num=model_index)
+
+    def start_acquire_stream(self, engine_num=0) -> None:
+        """! Put the emulator in acquisition stream mode, see AISRVEmulator.set_sensor."""
+        self._download_data(aisrv_cmd.CMD_START_ACQUIRE_STREAM, b"", engine_num=engine_num)
+
+    def tensor_arena_size(self, model_index: int = 0) -> int:
+        """! Read the size of the tensor arena required.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        @return size of the tensor arena as an integer.
+        """
+        return self.emulator.tensor_arena_size(model_index)
+
+    def close(self, model_index=0) -> None:
+        if self._owns_emulator:
+            self.emulator.close()
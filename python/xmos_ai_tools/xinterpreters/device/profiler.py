@@ -0,0 +1,148 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import csv
+import io
+import json
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from numpy import ndarray
+
+_COLUMNS = ("index", "op", "p50", "p99", "mean", "min", "max", "share")
+
+
+class OpTimings:
+    """! Operator timings of repeated inferences.
+    Holds a runs x ops matrix of the times reported by the interpreter, in the order of
+    the model's opList, and summarises the distribution of each operator.
+    """
+
+    def __init__(self, op_names: Sequence[str], times: ndarray) -> None:
+        """! Operator timings initializer.
+        @param op_names  The name of each operator, the model's opList.
+        @param times  Matrix of times with one row per run and one column per operator.
+        """
+        self.op_names = list(op_names)
+        self.times = np.asarray(times, dtype=np.uint64).reshape(-1, len(self.op_names))
+
+    @property
+    def runs(self) -> int:
+        """! Number of profiled runs."""
+        return self.times.shape[0]
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """! Summarise the timings of each operator.
+        @return  For each operator, its index and name, the p50, p99, mean, min and max of
+        its time, and its share of the total time of all runs.
+        """
+        if self.runs == 0:
+            return []
+        times = self.times.astype(np.float64)
+        p50, p99 = np.percentile(times, [50, 99], axis=0)
+        totals = times.sum(axis=0)
+        total = totals.sum()
+        return [
+            {
+                "index": i,
+                "op": name,
+                "p50": float(p50[i]),
+                "p99": float(p99[i]),
+                "mean": float(times[:, i].mean()),
+                "min": int(self.times[:, i].min()),
+                "max": int(self.times[:, i].max()),
+                "share": float(totals[i] / total) if total else 0.0,
+            }
+            for i, name in enumerate(self.op_names)
+        ]
+
+    def total(self) -> Dict[str, float]:
+        """! Summarise the total time of each run.
+        @return  The p50, p99, mean, min and max of the sum of the operator times.
+        """
+        if self.runs == 0:
+            return {}
+        totals = self.times.sum(axis=1).astype(np.float64)
+        p50, p99 = np.percentile(totals, [50, 99])
+        return {
+            "p50": float(p50),
+            "p99": float(p99),
+            "mean": float(totals.mean()),
+            "min": int(totals.min()),
+            "max": int(totals.max()),
+        }
+
+    def to_json(self, path: Optional[str] = None, raw: bool = False) -> str:
+        """! Export the summary as JSON.
+        @param path  File to write to (optional).
+        @param raw  Include the runs x ops matrix.
+        @return  The JSON text.
+        """
+        content: Dict[str, Any] = {
+            "runs": self.runs,
+            "ops": self.summary(),
+            "total": self.total(),
+        }
+        if raw:
+            content["times"] = self.times.tolist()
+        text = json.dumps(content, indent=2)
+        if path is not None:
+            with open(path, "w") as output_fd:
+                output_fd.write(text)
+        return text
+
+    def to_csv(self, path: Optional[str] = None) -> str:
+        """! Export the summary as CSV, one row per operator.
+        @param path  File to write to (optional).
+        @return  The CSV text.
+        """
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=_COLUMNS)
+        writer.writeheader()
+        writer.writerows(self.summary())
+        text = output.getvalue()
+        if path is not None:
+            with open(path, "w", newline="") as output_fd:
+                output_fd.write(text)
+        return text
+
+    def print_summary(self, top: Optional[int] = None) -> None:
+        """! Print the operators, most expensive first.
+        @param top  Number of operators to print, all by default.
+        """
+        rows = sorted(self.summary(), key=lambda row: row["share"], reverse=True)
+        print(f"{'index':>5} {'op':<32} {'p50':>12} {'p99':>12} {'share':>7}")
+        for row in rows[:top]:
+            print(
+                f"{row['index']:>5} {row['op']:<32} {row['p50']:>12.0f} "
+                f"{row['p99']:>12.0f} {row['share']:>7.1%}"
+            )
+
+
+def profile(
+    interpreter: Any,
+    runs: int = 100,
+    inputs: Optional[Union[ndarray, Sequence[ndarray]]] = None,
+    model_index: int = 0,
+    warmup: int = 1,
+) -> OpTimings:
+    """! Invoke a model repeatedly and collect the operator timings of every run.
+    @param interpreter  The interpreter to profile, providing read_times.
+    @param runs  Number of profiled runs.
+    @param inputs  Inputs to set before the first run (optional), an array for single input
+    models, or a sequence with one array per input.
+    @param model_index  The model to target, for interpreters that support multiple models
+    running concurrently. Defaults to 0 for use with a single model.
+    @param warmup  Number of runs before profiling.
+    @return  The operator timings.
+    """
+    op_names = interpreter.get_model(model_index).opList
+    if inputs is not None:
+        interpreter.set_all_inputs(inputs, model_index)
+    for _ in range(warmup):
+        interpreter.invoke(model_index)
+
+    times = np.zeros((runs, len(op_names)), dtype=np.uint64)
+    for run in range(runs):
+        interpreter.invoke(model_index)
+        times[run] = interpreter.read_times(model_index)[: len(op_names)]
+    return OpTimings(op_names, times)
@@ -0,0 +1,5 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+
+# The smoke test is a script that needs a device, it is run by its own Makefile
+collect_ignore = ["test_smoke"]
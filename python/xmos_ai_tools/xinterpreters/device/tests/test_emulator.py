@@ -0,0 +1,166 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+from pathlib import Path
+
+import numpy as np
+import pytest
+from tflite.Model import Model
+
+import xmos_ai_tools.xinterpreters.device.aisrv_cmd as aisrv_cmd
+from xmos_ai_tools.xinterpreters import (
+    xcore_tflm_emulated_interpreter,
+    xcore_tflm_host_interpreter,
+)
+from xmos_ai_tools.xinterpreters.base.model_patch import add_outputs
+from xmos_ai_tools.xinterpreters.device.emulator import AISRVEmulator
+from xmos_ai_tools.xinterpreters.device.device_interpreter import AISRVIOError
+
+SMOKE_MODEL = (
+    Path(__file__).parents[2] / "host" / "tests" / "test_smoke" / "smoke_model.tflite"
+)
+
+
+class LegacyEmulator(AISRVEmulator):
+    """! Emulates firmware without the model hash and batched tensor commands."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Number of unsupported commands received
+        self.unsupported = 0
+
+    def _upload(self, cmd, length, tensor_num, engine_num):
+        if cmd in (aisrv_cmd.CMD_GET_MODEL_HASH, aisrv_cmd.CMD_GET_OUTPUT_TENSORS):
+            self.unsupported += 1
+            raise AISRVIOError("Unsupported command 0x%02x" % cmd)
+        return super()._upload(cmd, length, tensor_num, engine_num)
+
+
+@pytest.fixture
+def connect():
+    """! Create emulated interpreters, closed with their emulators after the test."""
+    created = []
+
+    def _connect(emulator=None, **kwargs):
+        ie = xcore_tflm_emulated_interpreter(emulator, **kwargs)
+        created.append(ie)
+        return ie
+
+    yield _connect
+    for ie in created:
+        ie.close()
+        ie.emulator.close()
+
+
+@pytest.fixture(scope="module")
+def smoke_model():
+    return SMOKE_MODEL.read_bytes()
+
+
+@pytest.fixture(scope="module")
+def multi_output_model(smoke_model):
+    # The outputs of the first two operators become extra model outputs
+    operators = Model.GetRootAsModel(smoke_model, 0).Subgraphs(0)
+    extra = [operators.Operators(i).Outputs(0) for i in range(2)]
+    return add_outputs(smoke_model, extra)
+
+
+def _host_outputs(model_content, inputs):
+    with xcore_tflm_host_interpreter() as ie:
+        ie.set_model(model_content=model_content)
+        ie.set_all_inputs(inputs)
+        ie.invoke()
+        return ie.get_all_outputs()
+
+
+def _random_input(ie):
+    details = ie.get_input_details()[0]
+    info = np.iinfo(details["dtype"])
+    return np.random.default_rng(0).integers(
+        info.min, info.max, details["shape"], dtype=details["dtype"], endpoint=True
+    )
+
+
+def test_set_tensor_invoke_get_tensor(connect, smoke_model):
+    ie = connect()
+    ie.set_model(model_content=smoke_model)
+    data = _random_input(ie)
+    ie.set_tensor(ie.get_input_details()[0]["index"], data)
+    ie.invoke()
+    output = ie.get_tensor(ie.get_output_details()[0]["index"])
+
+    np.testing.assert_array_equal(output, _host_outputs(smoke_model, data)[0])
+
+
+def test_get_tensor_into_array(connect, smoke_model):
+    ie = connect(max_block_size=64)
+    ie.set_model(model_content=smoke_model)
+    data = _random_input(ie)
+    details = ie.get_output_details()[0]
+    out = np.empty(details["shape"], dtype=details["dtype"])
+    ie.set_tensor(ie.get_input_details()[0]["index"], data)
+    ie.invoke()
+    assert ie.get_tensor(details["index"], out=out) is out
+
+    np.testing.assert_array_equal(out, _host_outputs(smoke_model, data)[0])
+
+
+def test_unknown_tensor(connect, smoke_model):
+    ie = connect()
+    ie.set_model(model_content=smoke_model)
+    with pytest.raises(IndexError):
+        ie.get_tensor(ie.get_input_details()[0]["index"])
+
+
+def test_model_already_on_device(connect, smoke_model):
+    emulator = AISRVEmulator()
+    ie = connect(emulator)
+    ie.set_model(model_content=smoke_model)
+    assert ie.transfer_stats()["download"]["bytes"] == len(smoke_model)
+
+    # A new session finds the model by its hash and skips the download
+    ie = connect(emulator)
+    ie.set_model(model_content=smoke_model)
+    assert ie.transfer_stats()["download"]["bytes"] == 0
+
+
+def test_model_hash_fallback(connect, smoke_model):
+    emulator = LegacyEmulator()
+    ie = connect(emulator)
+    assert ie.read_model_hash() is None
+    assert not ie._model_hash_supported
+    ie.set_model(model_content=smoke_model)
+    assert ie.transfer_stats()["download"]["bytes"] == len(smoke_model)
+
+    assert emulator.unsupported == 1
+
+    # Without model hashes a new session downloads the model again, without probing
+    ie = connect(emulator)
+    assert not ie._model_hash_supported
+    ie.set_model(model_content=smoke_model)
+    assert ie.transfer_stats()["download"]["bytes"] == len(smoke_model)
+    assert emulator.unsupported == 1
+
+
+@pytest.mark.parametrize(
+    "emulator_class, batched", [(AISRVEmulator, True), (LegacyEmulator, False)]
+)
+def test_batched_outputs(connect, multi_output_model, emulator_class, batched):
+    emulator = emulator_class()
+    ie = connect(emulator)
+    ie.set_model(model_content=multi_output_model)
+    # Probed when the model is set, and shared with later sessions
+    assert ie._batched_io_supported is batched
+    ie = connect(emulator)
+    ie.set_model(model_content=multi_output_model)
+    data = _random_input(ie)
+    ie.set_all_inputs(data)
+    ie.invoke()
+    outputs = ie.get_all_outputs()
+    assert ie._batched_io_supported is batched
+    if not batched:
+        assert emulator.unsupported == 2
+
+    expected = _host_outputs(multi_output_model, data)
+    assert len(outputs) == len(expected) == 3
+    for output, host_output in zip(outputs, expected):
+        np.testing.assert_array_equal(output, host_output)
@@ -0,0 +1,159 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import xmos_ai_tools.xinterpreters.device.aisrv_cmd as aisrv_cmd
+from xmos_ai_tools.xinterpreters import (
+    xcore_tflm_emulated_interpreter,
+    xcore_tflm_host_interpreter,
+)
+from xmos_ai_tools.xinterpreters.device.emulator import AISRVEmulator
+from xmos_ai_tools.xinterpreters.device.device_interpreter import AISRVIOError
+
+SMOKE_MODEL = (
+    Path(__file__).parents[2] / "host" / "tests" / "test_smoke" / "smoke_model.tflite"
+)
+FRAME_RATE = 10.0
+
+
+class CountlessEmulator(AISRVEmulator):
+    """! Emulates firmware without the inference count command."""
+
+    def _upload(self, cmd, length, tensor_num, engine_num):
+        if cmd == aisrv_cmd.CMD_GET_INFERENCE_COUNT:
+            raise AISRVIOError("Unsupported command 0x%02x" % cmd)
+        return super()._upload(cmd, length, tensor_num, engine_num)
+
+
+def _frames(count):
+    return [np.full((1, 256, 256, 3), value, dtype=np.int8) for value in range(count)]
+
+
+def _expected(frames, repeats=True):
+    """! The outputs of the frames run on the host.
+    @param repeats  Keep consecutive repeats of an output, which a stream cannot tell
+    apart without inference counts.
+    """
+    expected = []
+    with xcore_tflm_host_interpreter() as ie:
+        ie.set_model(model_path=str(SMOKE_MODEL))
+        for frame in frames:
+            output = ie.run(frame).copy()
+            if repeats or not expected or not np.array_equal(expected[-1], output):
+                expected.append(output)
+    return expected
+
+
+def _connect(emulator=None):
+    ie = xcore_tflm_emulated_interpreter(emulator)
+    ie.set_model(model_path=str(SMOKE_MODEL))
+    return ie
+
+
+@pytest.fixture
+def interpreter():
+    ie = _connect()
+    yield ie
+    ie.close()
+
+
+def test_stream_without_sensor(interpreter):
+    with pytest.raises(AISRVIOError):
+        interpreter.start_acquire_stream()
+
+
+def test_stream_results(interpreter):
+    frames = _frames(6)
+    expected = _expected(frames)
+    interpreter.emulator.set_sensor(frames, FRAME_RATE)
+
+    stream = interpreter.stream_results(capacity=len(frames))
+    results = [next(stream) for _ in expected]
+    stream.close()
+
+    for (outputs, timings), output in zip(results, expected):
+        np.testing.assert_array_equal(outputs[0], output)
+        assert len(timings) == len(interpreter.get_model(0).opList)
+    stats = interpreter.stream_stats()
+    assert stats["frames"] == len(expected)
+    assert stats["dropped"] == 0
+    assert stats["missed"] == 0
+
+
+def test_stream_results_identical_frames(interpreter):
+    # Consecutive frames with the same outputs are still separate frames
+    frames = [frame for frame in _frames(3) for _ in range(2)]
+    expected = _expected(frames)
+    interpreter.emulator.set_sensor(frames, FRAME_RATE)
+
+    stream = interpreter.stream_results(capacity=len(frames), read_timings=False)
+    results = [next(stream)[0] for _ in expected]
+    stream.close()
+
+    for outputs, output in zip(results, expected):
+        np.testing.assert_array_equal(outputs[0], output)
+    assert interpreter.stream_stats()["frames"] == len(frames)
+
+
+def test_stream_results_without_inference_count():
+    ie = _connect(CountlessEmulator())
+    frames = [frame for frame in _frames(3) for _ in range(2)]
+    # Without inference counts repeated readings are told apart by their contents, so
+    # identical consecutive frames are returned once
+    expected = _expected(frames, repeats=False)
+    ie.emulator.set_sensor(frames, FRAME_RATE)
+    try:
+        stream = ie.stream_results(capacity=len(frames), read_timings=False)
+        results = [next(stream)[0] for _ in expected]
+        while ie.emulator.frames_acquired < len(frames):
+            time.sleep(1 / FRAME_RATE)
+        stream.close()
+    finally:
+        ie.close()
+        ie.emulator.close()
+
+    for outputs, output in zip(results, expected):
+        np.testing.assert_array_equal(outputs[0], output)
+    stats = ie.stream_stats()
+    assert stats["frames"] == len(expected)
+    assert stats["duplicates"] > 0
+
+
+def test_stream_results_drops_oldest_frames(interpreter):
+    frames = _frames(8)
+    expected = _expected(frames)
+    interpreter.emulator.set_sensor(frames, FRAME_RATE)
+
+    stream = interpreter.stream_results(capacity=2, read_timings=False)
+    first, _ = next(stream)
+    # A consumer that falls behind the sensor until the stream ends
+    while interpreter.emulator.frames_acquired < len(frames):
+        time.sleep(1 / FRAME_RATE)
+    time.sleep(1 / FRAME_RATE)
+    last = [next(stream)[0] for _ in range(2)]
+    stream.close()
+
+    np.testing.assert_array_equal(first[0], expected[0])
+    # Only the newest frames are left in the ring
+    for outputs, output in zip(last, expected[-2:]):
+        np.testing.assert_array_equal(outputs[0], output)
+    stats = interpreter.stream_stats()
+    assert stats["frames"] == len(expected)
+    assert stats["dropped"] == len(expected) - 3
+
+
+def test_close_stops_stream():
+    emulator = AISRVEmulator()
+    ie = xcore_tflm_emulated_interpreter(emulator)
+    ie.set_model(model_path=str(SMOKE_MODEL))
+    emulator.set_sensor(_frames(100), FRAME_RATE)
+    ie.start_acquire_stream()
+    emulator.close()
+
+    acquired = emulator.frames_acquired
+    time.sleep(2 / FRAME_RATE)
+    assert emulator.frames_acquired == acquired < 100
@@ -0,0 +1,169 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import xmos_ai_tools.xinterpreters.device.aisrv_cmd as aisrv_cmd
+from xmos_ai_tools.xinterpreters import xcore_tflm_emulated_interpreter
+from xmos_ai_tools.xinterpreters.device.device_interpreter_pool import (
+    xcore_tflm_usb_interpreter_pool,
+)
+from xmos_ai_tools.xinterpreters.device.emulator import AISRVEmulator
+from xmos_ai_tools.xinterpreters.device.device_interpreter import AISRVIOError
+
+SMOKE_MODEL = (
+    Path(__file__).parents[2] / "host" / "tests" / "test_smoke" / "smoke_model.tflite"
+)
+POOL_THREADS = "xcore_tflm_usb_"
+
+
+class GatedEmulator(AISRVEmulator):
+    """! Holds every inference until the gate is opened, and counts the inferences."""
+
+    def __init__(self, gate):
+        super().__init__()
+        self.gate = gate
+        self.invokes = 0
+
+    def download(self, cmd, data, tensor_num=0, engine_num=0):
+        if cmd == aisrv_cmd.CMD_START_INFER:
+            self.gate.wait()
+            self.invokes += 1
+        super().download(cmd, data, tensor_num, engine_num)
+
+
+class ClosingInterpreter(xcore_tflm_emulated_interpreter):
+    """! Records when the interpreter is closed."""
+
+    closed = False
+
+    def close(self, model_index=0):
+        self.closed = True
+        super().close(model_index)
+
+
+@pytest.fixture
+def pool():
+    """! Create pools of emulated interpreters, closed with the emulators after the test."""
+    created = []
+
+    def _pool(count, gate=None):
+        if gate is None:
+            gate = threading.Event()
+            gate.set()
+        emulators = [GatedEmulator(gate) for _ in range(count)]
+        interpreters = [ClosingInterpreter(emulator) for emulator in emulators]
+        p = xcore_tflm_usb_interpreter_pool(
+            model_path=str(SMOKE_MODEL), interpreters=interpreters
+        )
+        created.append((p, emulators))
+        return p
+
+    yield _pool
+    for p, emulators in created:
+        p.close()
+        for emulator in emulators:
+            emulator.close()
+
+
+def _samples(count):
+    ie = xcore_tflm_emulated_interpreter()
+    try:
+        ie.set_model(model_path=str(SMOKE_MODEL))
+        details = ie.get_input_details()[0]
+        rng = np.random.default_rng(0)
+        samples = [
+            rng.integers(-128, 128, details["shape"], dtype=details["dtype"])
+            for _ in range(count)
+        ]
+        expected = [ie.run(sample).copy() for sample in samples]
+    finally:
+        ie.close()
+    return samples, expected
+
+
+def _pool_threads():
+    return [t for t in threading.enumerate() if t.name.startswith(POOL_THREADS)]
+
+
+def test_dispatch_to_least_busy_device(pool):
+    gate = threading.Event()
+    p = pool(3, gate)
+    samples, _ = _samples(6)
+
+    # Held inferences stay outstanding, so submits are spread over the devices
+    futures = [p.submit(sample) for sample in samples]
+    assert p._outstanding == [2, 2, 2]
+    gate.set()
+    for future in futures:
+        future.result()
+
+    assert [ie.emulator.invokes for ie in p._interpreters] == [2, 2, 2]
+    stats = p.stats()
+    assert stats["inferences"] == 6
+    assert stats["inferences_per_device"] == [2, 2, 2]
+
+
+def test_map_keeps_input_order(pool):
+    p = pool(3)
+    samples, expected = _samples(12)
+
+    outputs = list(p.map(samples))
+
+    assert len(outputs) == len(samples)
+    for output, expected_output in zip(outputs, expected):
+        np.testing.assert_array_equal(output, expected_output)
+    assert sum(p.stats()["inferences_per_device"]) == len(samples)
+
+
+def test_submit_results_match_inputs(pool):
+    p = pool(2)
+    samples, expected = _samples(5)
+
+    futures = [p.submit(sample) for sample in samples]
+
+    for future, expected_output in zip(futures, expected):
+        np.testing.assert_array_equal(future.result(), expected_output)
+
+
+def test_device_error_is_raised_by_future(pool):
+    p = pool(1)
+    samples, expected = _samples(2)
+
+    bad = p.submit(np.zeros(3, dtype=np.float32))
+    good = p.submit(samples[0])
+
+    with pytest.raises(AISRVIOError, match="mismatching size"):
+        bad.result()
+    # The worker carries on after a failed inference
+    np.testing.assert_array_equal(good.result(), expected[0])
+    assert p.stats()["inferences"] == 1
+
+
+def test_close_finishes_queued_inferences(pool):
+    gate = threading.Event()
+    p = pool(2, gate)
+    samples, expected = _samples(4)
+    futures = [p.submit(sample) for sample in samples]
+
+    closer = threading.Thread(target=p.close)
+    closer.start()
+    # close waits for the queued inferences
+    closer.join(0.1)
+    assert closer.is_alive()
+    gate.set()
+    closer.join()
+
+    for future, expected_output in zip(futures, expected):
+        assert future.done()
+        np.testing.assert_array_equal(future.result(), expected_output)
+    assert all(ie.closed for ie in p._interpreters)
+    assert not _pool_threads()
+
+
+def test_no_interpreters():
+    with pytest.raises(ValueError):
+        xcore_tflm_usb_interpreter_pool(model_path=str(SMOKE_MODEL), interpreters=[])
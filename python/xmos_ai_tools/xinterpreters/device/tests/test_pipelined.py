@@ -0,0 +1,115 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import xmos_ai_tools.xinterpreters.device.aisrv_cmd as aisrv_cmd
+from xmos_ai_tools.xinterpreters import xcore_tflm_emulated_interpreter
+from xmos_ai_tools.xinterpreters.device.emulator import AISRVEmulator
+from xmos_ai_tools.xinterpreters.device.device_interpreter import AISRVIOError
+
+SMOKE_MODEL = (
+    Path(__file__).parents[2] / "host" / "tests" / "test_smoke" / "smoke_model.tflite"
+)
+PIPELINE_THREADS = {"xcore_tflm_prepare", "xcore_tflm_device"}
+
+
+class FailingEmulator(AISRVEmulator):
+    """! Fails the inference of the sample at fail_at."""
+
+    def __init__(self, fail_at):
+        super().__init__()
+        self.fail_at = fail_at
+        self.invokes = 0
+
+    def download(self, cmd, data, tensor_num=0, engine_num=0):
+        if cmd == aisrv_cmd.CMD_START_INFER:
+            self.invokes += 1
+            if self.invokes == self.fail_at + 1:
+                raise AISRVIOError("inference failed")
+        super().download(cmd, data, tensor_num, engine_num)
+
+
+def _connect(emulator=None):
+    ie = xcore_tflm_emulated_interpreter(emulator)
+    ie.set_model(model_path=str(SMOKE_MODEL))
+    return ie
+
+
+def _samples(ie, count):
+    details = ie.get_input_details()[0]
+    rng = np.random.default_rng(0)
+    return [
+        rng.integers(-128, 128, details["shape"], dtype=details["dtype"])
+        for _ in range(count)
+    ]
+
+
+def _pipeline_threads():
+    return [t for t in threading.enumerate() if t.name in PIPELINE_THREADS]
+
+
+@pytest.mark.parametrize("depth", [1, 3])
+def test_matches_sequential_invoke(depth):
+    ie = _connect()
+    try:
+        samples = _samples(ie, 6)
+        expected = [ie.run(sample).copy() for sample in samples]
+        outputs = list(ie.invoke_pipelined(iter(samples), depth=depth))
+    finally:
+        ie.close()
+
+    assert len(outputs) == len(samples)
+    for output, expected_output in zip(outputs, expected):
+        np.testing.assert_array_equal(output, expected_output)
+    assert not _pipeline_threads()
+
+
+def test_device_error_is_raised():
+    ie = _connect(FailingEmulator(fail_at=2))
+    try:
+        samples = _samples(ie, 5)
+        outputs = []
+        with pytest.raises(AISRVIOError, match="inference failed"):
+            for output in ie.invoke_pipelined(samples):
+                outputs.append(output)
+    finally:
+        ie.close()
+        ie.emulator.close()
+
+    # The samples before the failure are returned first
+    assert len(outputs) == 2
+    assert not _pipeline_threads()
+
+
+def test_input_error_is_raised():
+    ie = _connect()
+
+    def samples():
+        yield from _samples(ie, 2)
+        raise ValueError("no more samples")
+
+    try:
+        outputs = []
+        with pytest.raises(ValueError, match="no more samples"):
+            for output in ie.invoke_pipelined(samples()):
+                outputs.append(output)
+    finally:
+        ie.close()
+
+    assert len(outputs) == 2
+
+
+def test_close_stops_pipeline():
+    ie = _connect()
+    try:
+        pipeline = ie.invoke_pipelined(iter(_samples(ie, 8)), depth=1)
+        next(pipeline)
+        pipeline.close()
+    finally:
+        ie.close()
+
+    assert not _pipeline_threads()
@@ -0,0 +1,104 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import csv
+import io
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from xmos_ai_tools.xinterpreters import xcore_tflm_emulated_interpreter
+from xmos_ai_tools.xinterpreters.device.profiler import OpTimings
+
+SMOKE_MODEL = (
+    Path(__file__).parents[2] / "host" / "tests" / "test_smoke" / "smoke_model.tflite"
+)
+
+OP_NAMES = ["CONV_2D", "ADD", "SOFTMAX"]
+# Four runs of three operators
+TIMES = np.array([[10, 1, 0], [20, 1, 0], [30, 1, 0], [40, 1, 100]])
+
+
+@pytest.fixture
+def timings():
+    return OpTimings(OP_NAMES, TIMES)
+
+
+def test_summary(timings):
+    summary = timings.summary()
+
+    assert timings.runs == 4
+    assert [row["op"] for row in summary] == OP_NAMES
+    assert [row["index"] for row in summary] == [0, 1, 2]
+    conv = summary[0]
+    assert conv["p50"] == 25.0
+    assert conv["mean"] == 25.0
+    assert (conv["min"], conv["max"]) == (10, 40)
+    assert conv["p99"] == pytest.approx(39.7)
+    assert sum(row["share"] for row in summary) == pytest.approx(1.0)
+    assert summary[1]["share"] == pytest.approx(4 / 204)
+
+
+def test_total(timings):
+    total = timings.total()
+
+    assert (total["min"], total["max"]) == (11, 141)
+    assert total["mean"] == pytest.approx(204 / 4)
+    assert total["p50"] == 26.0
+
+
+def test_no_runs():
+    timings = OpTimings(OP_NAMES, np.zeros((0, 3)))
+
+    assert timings.runs == 0
+    assert timings.summary() == []
+    assert timings.total() == {}
+
+
+def test_to_json(timings, tmp_path):
+    path = tmp_path / "profile.json"
+    text = timings.to_json(str(path), raw=True)
+
+    assert path.read_text() == text
+    content = json.loads(text)
+    assert content["runs"] == 4
+    assert content["ops"] == timings.summary()
+    assert content["times"] == TIMES.tolist()
+    assert "times" not in json.loads(timings.to_json())
+
+
+def test_to_csv(timings, tmp_path):
+    path = tmp_path / "profile.csv"
+    text = timings.to_csv(str(path))
+
+    with open(path, newline="") as csv_fd:
+        assert csv_fd.read() == text
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert [row["op"] for row in rows] == OP_NAMES
+    assert float(rows[0]["p50"]) == 25.0
+
+
+def test_print_summary(timings, capsys):
+    timings.print_summary(top=1)
+
+    lines = capsys.readouterr().out.splitlines()
+    # The header and the most expensive operator
+    assert len(lines) == 2
+    assert "CONV_2D" in lines[1]
+
+
+def test_profile():
+    ie = xcore_tflm_emulated_interpreter()
+    try:
+        ie.set_model(model_path=str(SMOKE_MODEL))
+        details = ie.get_input_details()[0]
+        inputs = np.zeros(details["shape"], dtype=details["dtype"])
+        timings = ie.profile(runs=3, inputs=inputs)
+        op_names = ie.get_model(0).opList
+    finally:
+        ie.close()
+
+    assert timings.runs == 3
+    assert timings.op_names == op_names
+    assert timings.times.shape == (3, len(op_names))
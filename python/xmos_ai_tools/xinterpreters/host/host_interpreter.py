@@ -1,8 +1,13 @@
 # Copyright 2022 XMOS LIMITED. This Software is subject to the terms of the
 # XMOS Public License: Version 1
+import os
 import sys
 import ctypes
-from typing import Optional, Dict, Any, List
+import tempfile
+import threading
+import warnings
+from contextlib import contextmanager
+from typing import Optional, Dict, List, Tuple, Union, Sequence, Any, Iterable, Iterator
 
 import numpy as np
 from pathlib import Path
@@ -10,7 +15,16 @@ from pathlib import Path
 from numpy import ndarray
 
 from xmos_ai_tools.xinterpreters.base.base_interpreter import (
-    xcore_tflm_base_interpreter, XTFLMInterpreterStatus,
+    xcore_tflm_base_interpreter, XTFLMInterpreterStatus, TensorDetails,
+)
+from xmos_ai_tools.xinterpreters.base.model_patch import add_outputs
+from xmos_ai_tools.xinterpreters.base.memory_plan import (
+    BUFFER_ALIGNMENT,
+    MemoryPlanEntry,
+    align,
+    match_planner_buffers,
+    parse_planner_output,
+    plan_memory,
 )
 
 # DLL path for different platforms
@@ -22,7 +36,107 @@ elif sys.platform == "darwin":
 else:
     lib_path = str(Path.joinpath(__PARENT_DIR, "libs", "windows", "xtflm_python.dll"))
 
-lib = ctypes.cdll.LoadLibrary(lib_path)
+# Native library, loaded when the first interpreter is created
+lib: Any = None
+_lib_lock = threading.Lock()
+
+
+def _load_library() -> None:
+    """! Load the native library and declare its function signatures, once per process."""
+    global lib
+    with _lib_lock:
+        if lib is not None:
+            return
+        lib = _bind_library(ctypes.cdll.LoadLibrary(lib_path))
+
+
+def _bind_library(lib: Any) -> Any:
+    """! Declare the argument and return types of the native library functions."""
+    lib.new_interpreter.restype = ctypes.c_void_p
+    lib.new_interpreter.argtypes = [
+        ctypes.c_size_t,
+    ]
+
+    lib.print_memory_plan.restype = None
+    lib.print_memory_plan.argtypes = [ctypes.c_void_p]
+
+    lib.delete_interpreter.restype = None
+    lib.delete_interpreter.argtypes = [ctypes.c_void_p]
+
+    lib.initialize.restype = ctypes.c_int
+    lib.initialize.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_void_p,
+        ctypes.c_size_t,
+        ctypes.c_void_p,
+    ]
+
+    lib.set_input_tensor.restype = ctypes.c_int
+    lib.set_input_tensor.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_size_t,
+        ctypes.c_void_p,
+        ctypes.c_int,
+    ]
+
+    lib.get_output_tensor.restype = ctypes.c_int
+    lib.get_output_tensor.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_size_t,
+        ctypes.c_void_p,
+        ctypes.c_int,
+    ]
+
+    lib.get_input_tensor.restype = ctypes.c_int
+    lib.get_input_tensor.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_size_t,
+        ctypes.c_void_p,
+        ctypes.c_int,
+    ]
+
+    lib.get_input_tensor_buffer.restype = ctypes.c_void_p
+    lib.get_input_tensor_buffer.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+
+    lib.get_output_tensor_buffer.restype = ctypes.c_void_p
+    lib.get_output_tensor_buffer.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+
+    lib.reset.restype = ctypes.c_int
+    lib.reset.argtypes = [ctypes.c_void_p]
+
+    lib.invoke.restype = ctypes.c_int
+    lib.invoke.argtypes = [ctypes.c_void_p]
+
+    lib.invoke_batch.restype = ctypes.c_int
+    lib.invoke_batch.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_size_t,
+        ctypes.POINTER(ctypes.c_void_p),
+        ctypes.POINTER(ctypes.c_size_t),
+        ctypes.c_size_t,
+        ctypes.POINTER(ctypes.c_void_p),
+        ctypes.POINTER(ctypes.c_size_t),
+        ctypes.c_size_t,
+        ctypes.c_int,
+    ]
+
+    lib.get_op_times.restype = ctypes.c_size_t
+    lib.get_op_times.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_void_p,
+        ctypes.c_size_t,
+    ]
+
+    lib.get_error.restype = ctypes.c_size_t
+    lib.get_error.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+
+    lib.arena_used_bytes.restype = ctypes.c_size_t
+    lib.arena_used_bytes.argtypes = [
+        ctypes.c_void_p,
+    ]
+
+    return lib
+
 
 from xmos_ai_tools.xinterpreters.host.exceptions import (
     InterpreterError,
@@ -33,79 +147,62 @@ from xmos_ai_tools.xinterpreters.host.exceptions import (
     ModelSizeError,
     ArenaSizeError,
     DeviceTimeoutError,
+    GetProfilerTimesError,
 )
 
 MAX_TENSOR_ARENA_SIZE = 10000000
+# Most outputs an interpreter can have, NUM_OUTPUT_TENSORS in src/xtflm_conf.h
+MAX_OUTPUT_TENSORS = 40
+
+
+@contextmanager
+def _redirect_native_output(fd: int) -> Iterator[None]:
+    """! Redirect what the native library prints to stdout and stderr to a file.
+    @param fd  File descriptor of the file.
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = [os.dup(1), os.dup(2)]
+    try:
+        os.dup2(fd, 1)
+        os.dup2(fd, 2)
+        yield
+    finally:
+        os.dup2(saved[0], 1)
+        os.dup2(saved[1], 2)
+        for saved_fd in saved:
+            os.close(saved_fd)
+
 
 class xcore_tflm_host_interpreter(xcore_tflm_base_interpreter):
     """! The xcore interpreters host class.
     The interpreter to be used on a host, inherits from base interpreter.
     """
 
-    def __init__(self, max_tensor_arena_size: int = MAX_TENSOR_ARENA_SIZE) -> None:
+    def __init__(
+        self,
+        max_tensor_arena_size: int = MAX_TENSOR_ARENA_SIZE,
+        auto_arena_size: bool = True,
+    ) -> None:
         """! Host interpreter initializer.
-        Sets up functions from the cdll, and calls to cdll function to create a new interpreter.
+        Loads the native library on first use.
+        @param max_tensor_arena_size  Largest tensor arena a model may use.
+        @param auto_arena_size  Shrink the memory of each interpreter to the arena its model
+        needs once the model is loaded.
         """
         self._error_msg = ctypes.create_string_buffer(4096)
 
-        lib.new_interpreter.restype = ctypes.c_void_p
-        lib.new_interpreter.argtypes = [
-            ctypes.c_size_t,
-        ]
-
-        lib.print_memory_plan.restype = None
-        lib.print_memory_plan.argtypes = [ctypes.c_void_p]
-
-        lib.delete_interpreter.restype = None
-        lib.delete_interpreter.argtypes = [ctypes.c_void_p]
-
-        lib.initialize.restype = ctypes.c_int
-        lib.initialize.argtypes = [
-            ctypes.c_void_p,
-            ctypes.c_char_p,
-            ctypes.c_size_t,
-            ctypes.c_char_p,
-        ]
-
-        lib.set_input_tensor.restype = ctypes.c_int
-        lib.set_input_tensor.argtypes = [
-            ctypes.c_void_p,
-            ctypes.c_size_t,
-            ctypes.c_void_p,
-            ctypes.c_int,
-        ]
-
-        lib.get_output_tensor.restype = ctypes.c_int
-        lib.get_output_tensor.argtypes = [
-            ctypes.c_void_p,
-            ctypes.c_size_t,
-            ctypes.c_void_p,
-            ctypes.c_int,
-        ]
-
-        lib.get_input_tensor.restype = ctypes.c_int
-        lib.get_input_tensor.argtypes = [
-            ctypes.c_void_p,
-            ctypes.c_size_t,
-            ctypes.c_void_p,
-            ctypes.c_int,
-        ]
-
-        lib.reset.restype = ctypes.c_int
-        lib.reset.argtypes = [ctypes.c_void_p]
-
-        lib.invoke.restype = ctypes.c_int
-        lib.invoke.argtypes = [ctypes.c_void_p]
-
-        lib.get_error.restype = ctypes.c_size_t
-        lib.get_error.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
-
-        lib.arena_used_bytes.restype = ctypes.c_size_t
-        lib.arena_used_bytes.argtypes = [
-            ctypes.c_void_p,
-        ]
+        _load_library()
 
         self._max_tensor_arena_size = max_tensor_arena_size
+        self._auto_arena_size = auto_arena_size
+        # Native interpreter handle for each model index
+        self._objs: Dict[int, int] = {}
+        # Accumulated operator times for each model index with profiling enabled
+        self._profiles: Dict[int, ndarray] = {}
+        # Captured model, captured tensor indices and patched model content for each
+        # model index with intermediate tensors selected for capture
+        self._captures: Dict[int, Tuple[Any, Tuple[int, ...], bytes]] = {}
 
         super().__init__()
 
@@ -113,84 +210,297 @@ class xcore_tflm_host_interpreter(xcore_tflm_base_interpreter):
         return self
 
     def __exit__(self, exc_type, exc_value, exc_traceback) -> None:
-        """! Exit calls close function to delete interpreter"""
-        self.close()
+        """! Exit calls close function to delete all interpreters"""
+        for model_index in list(self._objs):
+            self.close(model_index)
+
+    @property
+    def obj(self) -> Optional[int]:
+        """! Native interpreter handle of model 0, kept for single model use."""
+        return self._objs.get(0)
+
+    def _obj(self, model_index: int = 0) -> int:
+        """! Read the native interpreter handle of a model.
+        @param model_index  The model to target.
+        @return The native interpreter handle.
+        """
+        obj = self._objs.get(model_index)
+        if obj is None:
+            raise IndexError(f"No interpreter for model at index {model_index} found.")
+        return obj
 
     def initialise_interpreter(self, model_index: int = 0) -> None:
         """! Interpreter initialiser, initialised interpreter with model and parameters (optional)
+        Each model index has its own native interpreter, which replaces and frees any
+        interpreter previously created for that index. The model is first loaded with an
+        arena of max_tensor_arena_size bytes, and when auto_arena_size is set the interpreter
+        is then recreated with only the arena the model needs.
         @param model_index  The model to target, for interpreters that support multiple models
         running concurrently. Defaults to 0 for use with a single model.
         """
-        max_model_size = 50000000
-        self.obj = lib.new_interpreter(max_model_size)
-        currentModel = None
+        self.close(model_index)
 
-        for model in self.models:
-            if model.tile == model_index:
-                currentModel = model
+        currentModel = self.get_model(model_index)
 
         if currentModel is None:
-            print(f"No model at index {model_index} found.", sys.stderr)
-            raise IndexError
+            raise IndexError(f"No model at index {model_index} found.")
 
         assert currentModel.model_content is not None
 
+        model_content = currentModel.model_content
+        capture = self._captures.get(model_index)
+        if capture is not None:
+            if capture[0] is currentModel:
+                model_content = capture[2]
+            else:
+                # The captured tensors belong to a model that has since been replaced
+                del self._captures[model_index]
+        params_content = currentModel.params_content
+
+        # The model is copied to the start of the interpreter memory, followed by the arena
+        model_size = align(len(model_content))
+        obj = self._create_interpreter(
+            model_content, params_content, model_size + self._max_tensor_arena_size
+        )
+        if obj is None:
+            raise ArenaSizeError(
+                "Unable to initialize interpreter, tensor arena larger than %d bytes required"
+                % self._max_tensor_arena_size
+            )
+        self._objs[model_index] = obj
+
+        if self._auto_arena_size:
+            memory_size = model_size + align(lib.arena_used_bytes(obj)) + BUFFER_ALIGNMENT
+            if memory_size < model_size + self._max_tensor_arena_size:
+                exact_obj = self._create_interpreter(
+                    model_content, params_content, memory_size
+                )
+                # Keep the larger interpreter if the model does not fit the exact arena
+                if exact_obj is not None:
+                    lib.delete_interpreter(obj)
+                    self._objs[model_index] = exact_obj
+
+        # Restart profiling of a replaced model, its operators may have changed
+        if model_index in self._profiles:
+            self.enable_profiling(True, model_index)
+
+    def _create_interpreter(
+        self, model_content: Any, params_content: Any, memory_size: int
+    ) -> Optional[int]:
+        """! Create a native interpreter and load a model into it.
+        @param model_content  The model flatbuffer to load.
+        @param params_content  The model parameters.
+        @param memory_size  Size of the interpreter memory, holding the model and the arena.
+        @return The native interpreter handle, or None if the model could not be loaded.
+        """
+        # Pass pointers to the content, which may be bytes or a read only memory map
+        model_content = np.frombuffer(model_content, dtype=np.uint8)
+        params_content = np.frombuffer(params_content, dtype=np.uint8)
+
+        obj = lib.new_interpreter(memory_size)
         status = lib.initialize(
-            self.obj,
-            currentModel.model_content,
-            len(currentModel.model_content),
-            currentModel.params_content,
+            obj,
+            model_content.ctypes.data,
+            len(model_content),
+            params_content.ctypes.data,
         )
         if XTFLMInterpreterStatus(status) is XTFLMInterpreterStatus.ERROR:
-            raise RuntimeError("Unable to initialize interpreter")
+            lib.delete_interpreter(obj)
+            return None
+        return obj
 
     def set_tensor(self, tensor_index: int, value: ndarray, model_index=0) -> None:
         """! Write the input tensor of a model.
+        The data is passed to the interpreter without an intermediate copy if value is a
+        C-contiguous array.
         @param value  The blob of data to set the tensor to.
         @param tensor_index  The index of input tensor to target. Defaults to 0.
         @param model_index  The model to target, for interpreters that support multiple models
         running concurrently. Defaults to 0 for use with a single model.
         """
-        val = value.tobytes()
+        if not isinstance(value, ndarray):
+            value = np.frombuffer(value, dtype=np.uint8)
+        # Only copies if the array is not already C-contiguous
+        value = np.ascontiguousarray(value)
 
-        length = len(val)
-        length2 = self.get_input_tensor_size(tensor_index)
+        length = value.nbytes
+        length2 = self.get_input_tensor_size(tensor_index, model_index)
         if length != length2:
-            print("ERROR: mismatching size in set_input_tensor %d vs %d" % (length, length2))
-
-        self._check_status(lib.set_input_tensor(self.obj, tensor_index, val, length))
+            raise SetTensorError(
+                "mismatching size in set_input_tensor %d vs %d" % (length, length2)
+            )
+
+        data_ptr = value.ctypes.data_as(ctypes.c_void_p)
+        self._check_status(
+            lib.set_input_tensor(self._obj(model_index), tensor_index, data_ptr, length),
+            model_index,
+        )
 
-    def get_tensor(self, tensor_index: int = 0, model_index: int = 0, tensor: ndarray = None) -> ndarray:
+    def _set_input(self, position: int, value: ndarray, model_index: int = 0) -> None:
+        """! Write an input tensor of a model, addressed by its position in the model inputs.
+        @param position  The position of the tensor in the model inputs.
+        @param value  The blob of data to set the tensor to.
+        @param model_index  The model to target.
+        """
+        # The host interpreter addresses inputs by position
+        self.set_tensor(position, value, model_index)
+
+    def get_tensor(
+        self,
+        tensor_index: int = 0,
+        model_index: int = 0,
+        tensor: ndarray = None,
+        out: ndarray = None,
+    ) -> ndarray:
         """! Read data from the output tensor of a model.
         @param tensor_index  The index of output tensor to target.
         @param model_index  The model to target, for interpreters that support multiple models
         running concurrently. Defaults to 0 for use with a single model.
-        @param tensor  Tensor of correct shape to write into (optional).
+        @param tensor  Tensor of correct shape to write into (optional), alias of out.
+        @param out  C-contiguous array of the tensor size to write into (optional). Reusing
+        the same array across calls avoids allocating a new output for every inference.
         @return  The data that was stored in the output tensor.
         """
+        model_tensors = self.get_model(model_index).index
+        count = model_tensors.output_position(tensor_index)
 
-        count: Optional[int]
-        tensor_details: Optional[Dict[str, Any]]
-        count, tensor_details = next(
-            filter(lambda x: x[1]["index"] == tensor_index, enumerate(self.get_output_details())),
-            (None, None)
-        )
+        if count is None:
+            raise IndexError(f"No tensor at index {tensor_index} found.")
 
-        if count is None or tensor_details is None:
-            print(f"No tensor at index {tensor_index} found.", sys.stderr)
-            raise IndexError
+        if out is None:
+            out = tensor
+        return self._read_output(
+            count, model_tensors.tensors[tensor_index], model_index, out
+        )
 
-        length = self.get_tensor_size(tensor_index)
-        if tensor is None:
-            tensor = np.zeros(tensor_details["shape"], dtype=tensor_details["dtype"])
+    def _read_output(
+        self,
+        count: int,
+        tensor_details: TensorDetails,
+        model_index: int,
+        out: Optional[ndarray],
+    ) -> ndarray:
+        """! Copy an output of the native interpreter into an array.
+        @param count  The position of the tensor in the interpreter outputs.
+        @param tensor_details  The details of the tensor.
+        @param model_index  The model to target.
+        @param out  C-contiguous array of the tensor size to write into, or None to allocate.
+        @return  The array holding the data of the tensor.
+        """
+        length = self._tensor_size(tensor_details)
+        if out is None:
+            out = np.empty(tensor_details.shape, dtype=tensor_details.dtype)
         else:
-            length = len(tensor.tobytes())
-            if length != length:
-                print("ERROR: mismatching size in get_output_tensor %d vs %d" % (length, length))
+            if not out.flags.c_contiguous or not out.flags.writeable:
+                raise GetTensorError("output array must be writeable and C-contiguous")
+            if out.nbytes != length:
+                raise GetTensorError(
+                    "mismatching size in get_output_tensor %d vs %d" % (out.nbytes, length)
+                )
+
+        data_ptr = out.ctypes.data_as(ctypes.c_void_p)
+        self._check_status(
+            lib.get_output_tensor(self._obj(model_index), count, data_ptr, length),
+            model_index,
+        )
+        return out
+
+    def set_capture(self, tensor_indices: Iterable[int], model_index: int = 0) -> None:
+        """! Choose the intermediate tensors to capture, for reading with get_intermediate.
+        The interpreter is recreated with the selected tensors as additional model outputs,
+        so they are kept in the arena until the end of each inference. This may grow the
+        arena and resets the state of the model. Only selected tensors are copied when read.
+        @param tensor_indices  Indices of the non-constant tensors to capture, an empty
+        iterable stops capturing.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        """
+        model = self.get_model(model_index)
+        model_tensors = model.index
+
+        indices: List[int] = []
+        for tensor_index in tensor_indices:
+            if not 0 <= tensor_index < len(model_tensors.tensors):
+                raise IndexError(f"No tensor at index {tensor_index} found.")
+            tensor_details = model_tensors.tensors[tensor_index]
+            if tensor_details.is_constant:
+                raise GetTensorError(
+                    "tensor %d is constant and cannot be captured" % tensor_index
+                )
+            self._tensor_size(tensor_details)
+            # Model outputs can be read already
+            if model_tensors.output_position(tensor_index) is not None:
+                continue
+            if tensor_index not in indices:
+                indices.append(tensor_index)
+
+        if len(model_tensors.outputs) + len(indices) > MAX_OUTPUT_TENSORS:
+            raise GetTensorError(
+                "unable to capture %d tensors, the interpreter supports %d outputs"
+                % (len(indices), MAX_OUTPUT_TENSORS)
+            )
+
+        if indices:
+            self._captures[model_index] = (
+                model,
+                tuple(indices),
+                add_outputs(model.model_content, indices),
+            )
+        else:
+            self._captures.pop(model_index, None)
+        self.initialise_interpreter(model_index)
+
+    def get_intermediate(
+        self, tensor_index: int, model_index: int = 0, out: ndarray = None
+    ) -> ndarray:
+        """! Read a captured intermediate tensor, or an output tensor, after inference.
+        @param tensor_index  The index of the tensor, selected with set_capture.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        @param out  C-contiguous array of the tensor size to write into (optional).
+        @return  The data that was stored in the tensor by the latest inference.
+        """
+        model_tensors = self.get_model(model_index).index
+        if model_tensors.output_position(tensor_index) is not None:
+            return self.get_tensor(tensor_index, model_index, out=out)
+
+        capture = self._captures.get(model_index)
+        if capture is None or tensor_index not in capture[1]:
+            raise GetTensorError(
+                "tensor %d is not captured, select it with set_capture" % tensor_index
+            )
+        # Captured tensors follow the model outputs
+        count = len(model_tensors.outputs) + capture[1].index(tensor_index)
+        return self._read_output(
+            count, model_tensors.tensors[tensor_index], model_index, out
+        )
 
-        data_ptr = tensor.ctypes.data_as(ctypes.c_void_p)
-        self._check_status(lib.get_output_tensor(self.obj, count, data_ptr, length))
-        return tensor
+    def tensor_view(self, tensor_index: int, model_index: int = 0) -> ndarray:
+        """! Get a numpy view onto the memory of an input or output tensor in the arena.
+        Writing to the view of an input sets the tensor in place, and the view of an output
+        holds the result of the latest inference. The view is only valid until the model is
+        replaced or the interpreter is closed.
+        @param tensor_index  The index of the input or output tensor to target.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        @return  An array sharing memory with the tensor.
+        """
+        model_tensors = self.get_model(model_index).index
+        count = model_tensors.input_position(tensor_index)
+        if count is not None:
+            data_ptr = lib.get_input_tensor_buffer(self._obj(model_index), count)
+        else:
+            count = model_tensors.output_position(tensor_index)
+            if count is None:
+                raise IndexError(f"No tensor at index {tensor_index} found.")
+            data_ptr = lib.get_output_tensor_buffer(self._obj(model_index), count)
+
+        tensor_details = model_tensors.tensors[tensor_index]
+        length = self._tensor_size(tensor_details)
+        buffer = (ctypes.c_uint8 * length).from_address(data_ptr)
+        return np.frombuffer(buffer, dtype=tensor_details.dtype).reshape(
+            tensor_details.shape
+        )
 
     def get_input_tensor(self, input_index: int = 0, model_index: int = 0) -> ndarray:
         """! Read the data in the input tensor of a model.
@@ -199,50 +509,312 @@ class xcore_tflm_host_interpreter(xcore_tflm_base_interpreter):
         running concurrently. Defaults to 0 for use with a single model.
         @return The data that was stored in the output tensor.
         """
-        tensor_details = self.get_input_details(model_index)[input_index]
-        tensor = np.zeros(tensor_details["shape"], dtype=tensor_details["dtype"])
+        tensor_details = self.get_model(model_index).index.inputs[input_index]
+        tensor = np.zeros(tensor_details.shape, dtype=tensor_details.dtype)
         data_ptr = tensor.ctypes.data_as(ctypes.c_void_p)
 
         l = len(tensor.tobytes())
-        self._check_status(lib.get_input_tensor(self.obj, input_index, data_ptr, l))
+        self._check_status(
+            lib.get_input_tensor(self._obj(model_index), input_index, data_ptr, l),
+            model_index,
+        )
         return tensor
 
     def reset(self, model_index: int = 0) -> None:
         """! Resets the model.
         """
-        self._check_status(lib.reset(self.obj))
+        self._check_status(lib.reset(self._obj(model_index)), model_index)
 
     def invoke(self, model_index: int = 0) -> None:
         """! Invoke the model and starting inference of the current
         state of the tensors.
         """
-        INVOKE_CALLBACK_FUNC = ctypes.CFUNCTYPE(ctypes.c_void_p, ctypes.c_int)
+        self._check_status(lib.invoke(self._obj(model_index)), model_index)
+
+        if model_index in self._profiles:
+            self._profiles[model_index] += self._read_times(model_index)
+
+    def _read_times(self, model_index: int = 0) -> ndarray:
+        """! Read the operator timings of the last inference into an array.
+        @param model_index  The model to target.
+        @return Array with one time per operator.
+        """
+        times = np.zeros(len(self.get_model(model_index).opList), dtype=np.uint32)
+        count = lib.get_op_times(self._obj(model_index), times.ctypes.data, len(times))
+        if count != len(times):
+            raise GetProfilerTimesError(
+                "read %d operator times for model %d, expected %d"
+                % (count, model_index, len(times))
+            )
+        return times
+
+    def read_times(self, model_index: int = 0) -> List[int]:
+        """! Read the operator timings from a completed inference.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        @return List with the time taken by each operator, in the order of the model's opList.
+        """
+        return self._read_times(model_index).tolist()
 
-        self._check_status(lib.invoke(self.obj))
+    def enable_profiling(self, enabled: bool = True, model_index: int = 0) -> None:
+        """! Enable or disable accumulating operator timings across calls to invoke.
+        Enabling profiling clears any previously accumulated timings.
+        @param enabled  Whether to accumulate operator timings.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        """
+        if enabled:
+            ops_length = len(self.get_model(model_index).opList)
+            self._profiles[model_index] = np.zeros(ops_length, dtype=np.uint64)
+        else:
+            self._profiles.pop(model_index, None)
+
+    def get_profile(self, model_index: int = 0) -> List[Tuple[str, int]]:
+        """! Read the operator timings accumulated since profiling was enabled.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        @return List of (operator name, total time) pairs, in the order of the model's opList.
+        """
+        if model_index not in self._profiles:
+            raise GetProfilerTimesError(
+                "profiling is not enabled for model %d, call enable_profiling first"
+                % model_index
+            )
+        totals = self._profiles[model_index]
+        return list(zip(self.get_model(model_index).opList, totals.tolist()))
+
+    def invoke_batch(
+        self,
+        inputs: Union[ndarray, Sequence[Any]],
+        model_index: int = 0,
+        reset: bool = False,
+    ) -> Union[ndarray, List[ndarray]]:
+        """! Run a batch of samples through the model in a single call to the interpreter.
+        With profiling enabled the samples are run one call each, so every sample's operator
+        times are accumulated.
+        @param inputs  For single input models, an array with the batch as its first dimension
+        or a sequence of input arrays. For multiple input models, a sequence of samples, each
+        a sequence with one array per model input.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        @param reset  Reset the variable tensors of the model before each sample.
+        @return  The outputs stacked along a new first dimension, as a list with one array per
+        output for models with multiple outputs.
+        """
+        model_tensors = self.get_model(model_index).index
+
+        batches: List[ndarray]
+        if len(model_tensors.inputs) == 1:
+            batches = [inputs if isinstance(inputs, ndarray) else np.stack(inputs)]
+        else:
+            batches = [
+                np.stack([sample[i] for sample in inputs])
+                for i in range(len(model_tensors.inputs))
+            ]
+        batch_size = len(batches[0])
+
+        input_arrays = []
+        input_sizes = []
+        for details, batch in zip(model_tensors.inputs, batches):
+            batch = np.ascontiguousarray(batch)
+            size = self._tensor_size(details)
+            if len(batch) != batch_size or batch.nbytes != batch_size * size:
+                raise SetTensorError(
+                    "mismatching size in invoke_batch for tensor %d" % details.index
+                )
+            input_arrays.append(batch)
+            input_sizes.append(size)
+
+        output_arrays = [
+            np.empty((batch_size, *details.shape), dtype=details.dtype)
+            for details in model_tensors.outputs
+        ]
+        output_sizes = [self._tensor_size(details) for details in model_tensors.outputs]
+
+        # The library only keeps the operator times of the last inference, so a profiled
+        # batch is run one sample per call to accumulate the times of every sample
+        profiling = model_index in self._profiles
+        step = 1 if profiling else max(batch_size, 1)
+        for start in range(0, batch_size, step):
+            self._check_status(
+                lib.invoke_batch(
+                    self._obj(model_index),
+                    step,
+                    (ctypes.c_void_p * len(input_arrays))(
+                        *[
+                            a.ctypes.data + start * size
+                            for a, size in zip(input_arrays, input_sizes)
+                        ]
+                    ),
+                    (ctypes.c_size_t * len(input_sizes))(*input_sizes),
+                    len(input_arrays),
+                    (ctypes.c_void_p * len(output_arrays))(
+                        *[
+                            a.ctypes.data + start * size
+                            for a, size in zip(output_arrays, output_sizes)
+                        ]
+                    ),
+                    (ctypes.c_size_t * len(output_sizes))(*output_sizes),
+                    len(output_arrays),
+                    int(reset),
+                ),
+                model_index,
+            )
+            if profiling:
+                self._profiles[model_index] += self._read_times(model_index)
+
+        if len(output_arrays) == 1:
+            return output_arrays[0]
+        return output_arrays
+
+    def stream(
+        self,
+        frames: Iterable[ndarray],
+        model_index: int = 0,
+        sliding_window: bool = False,
+        reset: bool = True,
+    ) -> Iterator[Union[ndarray, List[ndarray]]]:
+        """! Run a single input model over a stream of frames, e.g. audio for keyword spotting.
+        The variable tensors of the model are kept between frames, so recurrent state carries
+        over from one inference to the next. All buffers are allocated once when the stream
+        starts, the yielded output arrays are reused for every frame and must be copied by
+        the caller if they are kept past the next frame.
+        @param frames  Iterable of input frames. Without sliding_window each frame holds a
+        full input tensor, with it each frame is a hop of up to the input size in elements.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        @param sliding_window  Shift each frame into a window holding the latest input tensor's
+        worth of elements, starting from zeros, and run an inference per hop.
+        @param reset  Reset the variable tensors of the model before the first frame.
+        @return  Generator of the output array for each frame, or of a list of output arrays
+        for models with multiple outputs.
+        """
+        model_tensors = self.get_model(model_index).index
+        if len(model_tensors.inputs) != 1:
+            raise SetTensorError("stream requires a model with a single input")
+
+        input_details = model_tensors.inputs[0]
+        input_size = self._tensor_size(input_details)
+
+        # The sliding window is kept twice in a row in a buffer of twice the input size,
+        # so the latest input_elements elements are always contiguous from window_start
+        # and a hop is written without moving the rest of the window
+        input_elements = int(np.prod(input_details.shape))
+        mirror = np.zeros(
+            2 * input_elements if sliding_window else 0, dtype=input_details.dtype
+        )
+        mirror_address = mirror.ctypes.data
+        window_start = 0
+
+        outputs = [
+            np.empty(details.shape, dtype=details.dtype) for details in model_tensors.outputs
+        ]
+        output_ptrs = [out.ctypes.data_as(ctypes.c_void_p) for out in outputs]
+        output_sizes = [out.nbytes for out in outputs]
+        result: Union[ndarray, List[ndarray]] = outputs[0] if len(outputs) == 1 else outputs
+
+        if reset:
+            self.reset(model_index)
+
+        for frame in frames:
+            obj = self._obj(model_index)
+            if sliding_window:
+                hop = np.asarray(frame).reshape(-1)
+                n = hop.size
+                if n > input_elements:
+                    raise SetTensorError(
+                        "hop of %d elements larger than the input of %d elements"
+                        % (n, input_elements)
+                    )
+                # The hop replaces the oldest elements, in both copies of the window
+                head = min(n, input_elements - window_start)
+                for offset in (window_start, window_start + input_elements):
+                    mirror[offset : offset + head] = hop[:head]
+                for offset in (0, input_elements):
+                    mirror[offset : offset + n - head] = hop[head:]
+                window_start = (window_start + n) % input_elements
+                self._check_status(
+                    lib.set_input_tensor(
+                        obj,
+                        0,
+                        ctypes.c_void_p(mirror_address + window_start * mirror.itemsize),
+                        input_size,
+                    ),
+                    model_index,
+                )
+            else:
+                self.set_tensor(0, frame, model_index)
+
+            self.invoke(model_index)
+
+            for i, (data_ptr, length) in enumerate(zip(output_ptrs, output_sizes)):
+                self._check_status(
+                    lib.get_output_tensor(obj, i, data_ptr, length), model_index
+                )
+            yield result
 
     def close(self, model_index: int = 0) -> None:
         """! Delete the interpreter.
         @params model_index Defines which interpreter to target in systems with multiple.
         """
-        if self.obj:
-            lib.delete_interpreter(self.obj)
-            self.obj = None
-            print(self.obj)
+        obj = self._objs.pop(model_index, None)
+        if obj:
+            lib.delete_interpreter(obj)
 
-    def tensor_arena_size(self) -> int:
+    def tensor_arena_size(self, model_index: int = 0) -> int:
         """! Read the size of the tensor arena required.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
         @return size of the tensor arena as an integer.
         """
-        return lib.arena_used_bytes(self.obj)
+        return lib.arena_used_bytes(self._obj(model_index))
 
-    def _check_status(self, status) -> None:
+    def _check_status(self, status, model_index: int = 0) -> None:
         """! Read a status code and raise an exception.
         @param status Status code.
+        @param model_index  The model whose interpreter reported the status.
         """
         if XTFLMInterpreterStatus(status) is XTFLMInterpreterStatus.ERROR:
-            lib.get_error(self.obj, self._error_msg)
+            lib.get_error(self._objs.get(model_index), self._error_msg)
             raise RuntimeError(self._error_msg.value.decode("utf-8"))
 
-    def print_memory_plan(self) -> None:
-        """! Print a plan of memory allocation"""
-        lib.print_memory_plan(self.obj)
+    def print_memory_plan(self, model_index: int = 0) -> None:
+        """! Print a plan of memory allocation
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        """
+        lib.print_memory_plan(self._obj(model_index))
+
+    def get_memory_plan(self, model_index: int = 0) -> List[MemoryPlanEntry]:
+        """! Read the placement of the model's tensors in the tensor arena from the native
+        memory planner, including the kernel scratch buffers with tensor index
+        SCRATCH_BUFFER. If the library does not print its plan, or the plan does not match
+        the model's tensors, the plan is estimated by plan_memory with a warning.
+        @param model_index  The model to target, for interpreters that support multiple models
+        running concurrently. Defaults to 0 for use with a single model.
+        @return Offset, size, first use and last use of each buffer in the arena.
+        """
+        model = self.get_model(model_index)
+        estimate = plan_memory(model.model_content, model.index)
+        plan = match_planner_buffers(estimate, self._read_planner_buffers(model_index))
+        if plan is None:
+            warnings.warn(
+                "the native memory plan of model %d is not available, the plan is an "
+                "estimate without kernel scratch buffers" % model_index,
+                RuntimeWarning,
+            )
+            return estimate
+        return plan
+
+    def _read_planner_buffers(self, model_index: int = 0) -> List[Tuple[int, int, int, int]]:
+        """! Read the buffers of the native memory planner, which only prints its plan.
+        The process' stdout and stderr are redirected while the plan is printed.
+        @param model_index  The model to target.
+        @return The size, offset, first use and last use of each buffer, in planner order.
+        """
+        with tempfile.TemporaryFile() as output:
+            with _redirect_native_output(output.fileno()):
+                lib.print_memory_plan(self._obj(model_index))
+            output.seek(0)
+            text = output.read().decode("utf-8", errors="replace")
+        return parse_planner_output(text)
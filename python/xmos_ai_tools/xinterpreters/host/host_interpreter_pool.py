@@ -0,0 +1,181 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Union, Iterable, Iterator, Sequence
+
+from numpy import ndarray
+
+from xmos_ai_tools.xinterpreters.host.host_interpreter import (
+    xcore_tflm_host_interpreter,
+    MAX_TENSOR_ARENA_SIZE,
+)
+
+Outputs = Union[ndarray, List[ndarray]]
+
+# Interpreter owned by a worker process of a process pool
+_worker_interpreter: Optional[xcore_tflm_host_interpreter] = None
+
+
+def _init_worker(
+    model_content: bytes, params_content: bytes, max_tensor_arena_size: int
+) -> None:
+    """! Process pool initializer, loads the model into the worker's interpreter."""
+    global _worker_interpreter
+    _worker_interpreter = xcore_tflm_host_interpreter(max_tensor_arena_size)
+    _worker_interpreter.set_model(
+        model_content=model_content, params_content=params_content
+    )
+
+
+def _run_worker(inputs: Any) -> Outputs:
+    """! Process pool task, runs an inference on the worker's interpreter."""
+    assert _worker_interpreter is not None
+    return _worker_interpreter.run(inputs)
+
+
+class xcore_tflm_host_interpreter_pool:
+    """! A pool of host interpreters running the same model in parallel.
+    By default a thread pool is used, as the native library releases the GIL while
+    an inference runs. A process pool can be used instead, with one interpreter per process.
+    """
+
+    def __init__(
+        self,
+        model_path: Optional[str] = None,
+        model_content: Optional[bytes] = None,
+        params_path: Optional[str] = None,
+        params_content: Optional[bytes] = None,
+        num_interpreters: Optional[int] = None,
+        use_processes: bool = False,
+        max_tensor_arena_size: int = MAX_TENSOR_ARENA_SIZE,
+    ) -> None:
+        """! Interpreter pool initializer.
+        Loads the model into one interpreter per worker.
+        @param model_path The path to the model file (.tflite), alternative to model_content.
+        @param model_content The byte array representing a model, alternative to model_path.
+        @param params_path The path to the params file for the model,
+        alternative to params_content (optional).
+        @param params_content The byte array representing the model parameters,
+        alternative to params_path (optional).
+        @param num_interpreters  Number of interpreters, defaults to the number of CPUs.
+        @param use_processes  Run the interpreters in a process pool instead of a thread pool.
+        @param max_tensor_arena_size  Tensor arena size of each interpreter.
+        """
+        if num_interpreters is None:
+            num_interpreters = os.cpu_count() or 1
+        self._num_interpreters = num_interpreters
+        self._interpreters: List[xcore_tflm_host_interpreter] = []
+        self._free: "queue.Queue[xcore_tflm_host_interpreter]" = queue.Queue()
+        self._executor: Executor
+
+        self._lock = threading.Lock()
+        self._count = 0
+        self._start_time: Optional[float] = None
+        self._end_time: Optional[float] = None
+
+        if use_processes:
+            if model_content is None and model_path is not None:
+                with open(model_path, "rb") as input_fd:
+                    model_content = input_fd.read()
+            if params_content is None and params_path is not None:
+                with open(params_path, "rb") as input_fd:
+                    params_content = input_fd.read()
+            self._executor = ProcessPoolExecutor(
+                max_workers=num_interpreters,
+                initializer=_init_worker,
+                initargs=(model_content, params_content, max_tensor_arena_size),
+            )
+        else:
+            for _ in range(num_interpreters):
+                ie = xcore_tflm_host_interpreter(max_tensor_arena_size)
+                ie.set_model(
+                    model_path=model_path,
+                    model_content=model_content,
+                    params_path=params_path,
+                    params_content=params_content,
+                )
+                self._interpreters.append(ie)
+                self._free.put(ie)
+            self._executor = ThreadPoolExecutor(max_workers=num_interpreters)
+
+    def __enter__(self) -> "xcore_tflm_host_interpreter_pool":
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback) -> None:
+        """! Exit calls close function to delete the interpreters"""
+        self.close()
+
+    def _run(self, inputs: Any) -> Outputs:
+        """! Run an inference on the next free interpreter of the thread pool."""
+        ie = self._free.get()
+        try:
+            return ie.run(inputs)
+        finally:
+            self._free.put(ie)
+
+    def _done(self, future: Future) -> None:
+        """! Count a completed inference for the throughput statistics."""
+        if future.cancelled() or future.exception() is not None:
+            return
+        with self._lock:
+            self._count += 1
+            self._end_time = time.perf_counter()
+
+    def submit(self, inputs: Union[ndarray, Sequence[ndarray]]) -> Future:
+        """! Schedule an inference on the pool.
+        @param inputs  An array for single input models, or a sequence with one array per input.
+        @return  A future holding the output array, or a list of output arrays for models
+        with multiple outputs.
+        """
+        with self._lock:
+            if self._start_time is None:
+                self._start_time = time.perf_counter()
+        if self._interpreters:
+            future = self._executor.submit(self._run, inputs)
+        else:
+            future = self._executor.submit(_run_worker, inputs)
+        future.add_done_callback(self._done)
+        return future
+
+    def map(self, inputs: Iterable[Union[ndarray, Sequence[ndarray]]]) -> Iterator[Outputs]:
+        """! Run inferences on the pool for an iterable of inputs.
+        @param inputs  Iterable of inputs, as accepted by submit.
+        @return  Iterator over the outputs, in the order of the inputs.
+        """
+        futures = [self.submit(x) for x in inputs]
+        for future in futures:
+            yield future.result()
+
+    def stats(self) -> Dict[str, float]:
+        """! Read the throughput of the pool since the first submitted inference.
+        @return  The number of completed inferences, the elapsed time in seconds and the
+        throughput in inferences per second.
+        """
+        with self._lock:
+            count = self._count
+            elapsed = 0.0
+            if self._start_time is not None and self._end_time is not None:
+                elapsed = self._end_time - self._start_time
+        return {
+            "inferences": count,
+            "seconds": elapsed,
+            "inferences_per_second": count / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def reset_stats(self) -> None:
+        """! Reset the throughput statistics."""
+        with self._lock:
+            self._count = 0
+            self._start_time = None
+            self._end_time = None
+
+    def close(self) -> None:
+        """! Shut down the workers and delete the interpreters."""
+        self._executor.shutdown(wait=True)
+        for ie in self._interpreters:
+            ie.close()
+        self._interpreters = []
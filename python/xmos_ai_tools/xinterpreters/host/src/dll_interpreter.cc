@@ -4,6 +4,7 @@
 
 #include "inference_engine.h"
 #include <cstdio>
+#include <type_traits>
 //#include "tensorflow/lite/micro/kernels/xcore/xcore_ops.h"
 //#include "tensorflow/lite/micro/recording_micro_allocator.
 
@@ -106,11 +107,15 @@ DLLEXPORT int initialize(inference_engine *ie, const char *model_content,
   memcpy(ie->memory_primary, m, model_content_size);
   int r = inference_engine_load_model(ie, model_content_size, ie->memory_primary,
                                       (void *)param_content);
-  return kTfLiteOk;
+  // Report a failed load, for example when the tensor arena is too small
+  return r == 0 ? kTfLiteOk : kTfLiteError;
 }
 
 DLLEXPORT void print_memory_plan(inference_engine *ie) {
   ie->xtflm->interpreter->PrintMemoryPlan();
+  // The plan is read back by redirecting these streams, flush before they are restored
+  fflush(stdout);
+  fflush(stderr);
 }
 
 //Unused
@@ -133,6 +138,21 @@ DLLEXPORT size_t arena_used_bytes(inference_engine *ie) {
   return ie->arena_needed_bytes;
 }
 
+DLLEXPORT size_t get_op_times(inference_engine *ie, uint32_t *times,
+                              size_t max_count) {
+  // Per operator durations recorded by the profiler during the last invoke
+  static_assert(sizeof(*ie->output_times) == sizeof(uint32_t),
+                "inference_engine output_times must hold uint32_t times");
+  static_assert(std::is_integral<decltype(ie->output_times_size)>::value,
+                "inference_engine output_times_size must be a count");
+  size_t count = ie->output_times_size;
+  if (count > max_count) {
+    count = max_count;
+  }
+  memcpy(times, ie->output_times, count * sizeof(uint32_t));
+  return count;
+}
+
 DLLEXPORT int set_input_tensor(inference_engine *ie, size_t tensor_index,
                      const void *value, const int size) {
   memcpy(ie->input_buffers[tensor_index], value, size);
@@ -151,8 +171,47 @@ DLLEXPORT int get_output_tensor(inference_engine *ie, size_t tensor_index, void
   return 0;
 }
 
+DLLEXPORT void *get_input_tensor_buffer(inference_engine *ie,
+                                        size_t tensor_index) {
+  return ie->input_buffers[tensor_index];
+}
+
+DLLEXPORT void *get_output_tensor_buffer(inference_engine *ie,
+                                         size_t tensor_index) {
+  return ie->output_buffers[tensor_index];
+}
+
 DLLEXPORT int invoke(inference_engine *ie) { return interp_invoke_par_5(ie); }
 
+DLLEXPORT int invoke_batch(inference_engine *ie, size_t batch_size,
+                           const void **inputs, const size_t *input_sizes,
+                           size_t num_inputs, void **outputs,
+                           const size_t *output_sizes, size_t num_outputs,
+                           int reset_state) {
+  // Run the whole batch here so that the caller pays the FFI overhead once
+  for (size_t b = 0; b < batch_size; b++) {
+    if (reset_state) {
+      int r = interp_reset(ie);
+      if (r != 0) {
+        return r;
+      }
+    }
+    for (size_t i = 0; i < num_inputs; i++) {
+      memcpy(ie->input_buffers[i],
+             (const char *)inputs[i] + b * input_sizes[i], input_sizes[i]);
+    }
+    int r = interp_invoke_par_5(ie);
+    if (r != 0) {
+      return r;
+    }
+    for (size_t i = 0; i < num_outputs; i++) {
+      memcpy((char *)outputs[i] + b * output_sizes[i], ie->output_buffers[i],
+             output_sizes[i]);
+    }
+  }
+  return 0;
+}
+
 DLLEXPORT int reset(inference_engine *ie) { return interp_reset(ie); }
 
 //Unused
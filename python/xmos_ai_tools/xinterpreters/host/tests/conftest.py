@@ -0,0 +1,39 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from xmos_ai_tools.xinterpreters import xcore_tflm_host_interpreter
+
+SMOKE_MODEL = Path(__file__).parent / "test_smoke" / "smoke_model.tflite"
+
+# The smoke test is a script that needs tensorflow, it is run by its own Makefile
+collect_ignore = ["test_smoke"]
+
+
+@pytest.fixture
+def interpreter():
+    """! Host interpreter with the smoke model loaded."""
+    with xcore_tflm_host_interpreter() as ie:
+        ie.set_model(model_path=str(SMOKE_MODEL))
+        yield ie
+
+
+@pytest.fixture
+def batch(interpreter):
+    """! Create batches of random inputs of the smoke model."""
+
+    def _batch(size):
+        details = interpreter.get_input_details()[0]
+        info = np.iinfo(details["dtype"])
+        return np.random.default_rng(0).integers(
+            info.min,
+            info.max,
+            (size, *details["shape"]),
+            dtype=details["dtype"],
+            endpoint=True,
+        )
+
+    return _batch
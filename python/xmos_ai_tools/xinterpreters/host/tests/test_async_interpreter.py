@@ -0,0 +1,90 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import asyncio
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from xmos_ai_tools.xinterpreters import (
+    xcore_tflm_async_interpreter,
+    xcore_tflm_host_interpreter,
+)
+
+SMOKE_MODEL = Path(__file__).parent / "test_smoke" / "smoke_model.tflite"
+
+
+def _samples(ie, count):
+    details = ie.get_input_details()[0]
+    rng = np.random.default_rng(0)
+    return [
+        rng.integers(-128, 128, details["shape"], dtype=details["dtype"])
+        for _ in range(count)
+    ]
+
+
+def _host_interpreter():
+    ie = xcore_tflm_host_interpreter()
+    ie.set_model(model_path=str(SMOKE_MODEL))
+    return ie
+
+
+def test_invoke_and_get_tensor():
+    ie = _host_interpreter()
+    sample = _samples(ie, 1)[0]
+    expected = ie.run(sample).copy()
+    input_index = ie.get_input_details()[0]["index"]
+    output_index = ie.get_output_details()[0]["index"]
+
+    async def main():
+        async with xcore_tflm_async_interpreter(ie) as aie:
+            await aie.set_tensor(input_index, sample)
+            await aie.invoke()
+            return await aie.get_tensor(output_index), await aie.run(sample)
+
+    output, run_output = asyncio.run(main())
+
+    np.testing.assert_array_equal(output, expected)
+    np.testing.assert_array_equal(run_output, expected)
+
+
+def test_concurrent_runs_are_serialised():
+    ie = _host_interpreter()
+    samples = _samples(ie, 6)
+    expected = [ie.run(sample).copy() for sample in samples]
+    threads = set()
+
+    async def main():
+        async with xcore_tflm_async_interpreter(ie) as aie:
+            outputs = await asyncio.gather(*(aie.run(sample) for sample in samples))
+            await aie.call("reset")
+            threads.add(await aie._run(lambda: threading.current_thread().name))
+            return outputs
+
+    outputs = asyncio.run(main())
+
+    for output, expected_output in zip(outputs, expected):
+        np.testing.assert_array_equal(output, expected_output)
+    assert len(threads) == 1
+    assert threads.pop().startswith("xcore_tflm_async")
+
+
+def test_errors_are_raised_by_await():
+    ie = _host_interpreter()
+    sample = _samples(ie, 1)[0]
+    unknown_tensor = len(ie.get_model(0).index.tensors)
+
+    async def main():
+        async with xcore_tflm_async_interpreter(ie) as aie:
+            with pytest.raises(IndexError):
+                await aie.get_tensor(unknown_tensor)
+            with pytest.raises(ValueError):
+                await aie.run([sample, sample])
+            with pytest.raises(AttributeError):
+                await aie.call("no_such_method")
+            # The worker carries on after an error
+            return await aie.run(sample)
+
+    expected = ie.run(sample).copy()
+    np.testing.assert_array_equal(asyncio.run(main()), expected)
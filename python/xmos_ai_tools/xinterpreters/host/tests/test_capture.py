@@ -0,0 +1,69 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import numpy as np
+import pytest
+from tflite.Model import Model
+
+from xmos_ai_tools.xinterpreters import xcore_tflm_host_interpreter
+from xmos_ai_tools.xinterpreters.base.model_patch import add_outputs
+from xmos_ai_tools.xinterpreters.host.exceptions import GetTensorError
+
+
+def _operator_outputs(interpreter, count):
+    """! The output tensors of the first operators of the model."""
+    subgraph = Model.GetRootAsModel(interpreter.get_model(0).model_content, 0).Subgraphs(0)
+    return [subgraph.Operators(i).Outputs(0) for i in range(count)]
+
+
+def test_capture_matches_added_outputs(interpreter, batch):
+    sample = batch(1)[0]
+    captured = _operator_outputs(interpreter, 2)
+    # The same tensors read as outputs of a patched model
+    with xcore_tflm_host_interpreter() as reference:
+        reference.set_model(
+            model_content=add_outputs(interpreter.get_model(0).model_content, captured)
+        )
+        expected = reference.run(sample)
+
+    interpreter.set_capture(captured)
+    output = interpreter.run(sample)
+
+    np.testing.assert_array_equal(output, expected[0])
+    for tensor_index, expected_tensor in zip(captured, expected[1:]):
+        tensor = interpreter.get_intermediate(tensor_index)
+        np.testing.assert_array_equal(tensor, expected_tensor)
+        out = np.empty_like(tensor)
+        assert interpreter.get_intermediate(tensor_index, out=out) is out
+        np.testing.assert_array_equal(out, expected_tensor)
+
+
+def test_capture_model_output(interpreter, batch):
+    output_index = interpreter.get_output_details()[0]["index"]
+    interpreter.set_capture([output_index])
+    output = interpreter.run(batch(1)[0])
+
+    np.testing.assert_array_equal(interpreter.get_intermediate(output_index), output)
+
+
+def test_stop_capture(interpreter, batch):
+    sample = batch(1)[0]
+    expected = interpreter.run(sample).copy()
+    captured = _operator_outputs(interpreter, 1)
+    interpreter.set_capture(captured)
+    interpreter.set_capture([])
+
+    np.testing.assert_array_equal(interpreter.run(sample), expected)
+    with pytest.raises(GetTensorError):
+        interpreter.get_intermediate(captured[0])
+
+
+def test_capture_errors(interpreter):
+    model_tensors = interpreter.get_model(0).index
+    constant = next(t.index for t in model_tensors.tensors if t.is_constant)
+
+    with pytest.raises(GetTensorError):
+        interpreter.set_capture([constant])
+    with pytest.raises(IndexError):
+        interpreter.set_capture([len(model_tensors.tensors)])
+    with pytest.raises(GetTensorError):
+        interpreter.get_intermediate(_operator_outputs(interpreter, 1)[0])
@@ -0,0 +1,94 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from xmos_ai_tools.xinterpreters import xcore_tflm_host_interpreter
+from xmos_ai_tools.xinterpreters.host.host_interpreter_pool import (
+    xcore_tflm_host_interpreter_pool,
+)
+
+SMOKE_MODEL = Path(__file__).parent / "test_smoke" / "smoke_model.tflite"
+
+
+@pytest.fixture(scope="module")
+def samples():
+    """! Random samples of the smoke model and their outputs on a single interpreter."""
+    with xcore_tflm_host_interpreter() as ie:
+        ie.set_model(model_path=str(SMOKE_MODEL))
+        details = ie.get_input_details()[0]
+        rng = np.random.default_rng(0)
+        inputs = [
+            rng.integers(-128, 128, details["shape"], dtype=details["dtype"])
+            for _ in range(8)
+        ]
+        outputs = [ie.run(sample).copy() for sample in inputs]
+    return inputs, outputs
+
+
+def _workers(pool):
+    """! The threads or processes of the pool's executor."""
+    if pool._interpreters:
+        return list(pool._executor._threads)
+    return list(pool._executor._processes.values())
+
+
+@pytest.mark.parametrize("use_processes", [False, True])
+def test_map_matches_single_interpreter(samples, use_processes):
+    inputs, expected = samples
+    with xcore_tflm_host_interpreter_pool(
+        model_path=str(SMOKE_MODEL), num_interpreters=2, use_processes=use_processes
+    ) as pool:
+        outputs = list(pool.map(inputs))
+        stats = pool.stats()
+
+    assert len(outputs) == len(expected)
+    for output, expected_output in zip(outputs, expected):
+        np.testing.assert_array_equal(output, expected_output)
+    assert stats["inferences"] == len(inputs)
+
+
+@pytest.mark.parametrize("use_processes", [False, True])
+def test_submit_matches_single_interpreter(samples, use_processes):
+    inputs, expected = samples
+    with xcore_tflm_host_interpreter_pool(
+        model_content=SMOKE_MODEL.read_bytes(),
+        num_interpreters=3,
+        use_processes=use_processes,
+    ) as pool:
+        futures = [pool.submit(sample) for sample in inputs]
+        for future, expected_output in zip(futures, expected):
+            np.testing.assert_array_equal(future.result(), expected_output)
+
+
+@pytest.mark.parametrize("use_processes", [False, True])
+def test_close_releases_workers(samples, use_processes):
+    inputs, _ = samples
+    pool = xcore_tflm_host_interpreter_pool(
+        model_path=str(SMOKE_MODEL), num_interpreters=2, use_processes=use_processes
+    )
+    list(pool.map(inputs))
+    workers = _workers(pool)
+    assert workers
+
+    pool.close()
+
+    assert not any(worker.is_alive() for worker in workers)
+    assert pool._interpreters == []
+    with pytest.raises(RuntimeError):
+        pool.submit(inputs[0])
+
+
+def test_failed_inference_is_not_counted(samples):
+    inputs, expected = samples
+    with xcore_tflm_host_interpreter_pool(
+        model_path=str(SMOKE_MODEL), num_interpreters=1
+    ) as pool:
+        bad = pool.submit([inputs[0], inputs[0]])
+        with pytest.raises(ValueError):
+            bad.result()
+        # The interpreter goes back to the pool after a failed inference
+        np.testing.assert_array_equal(pool.submit(inputs[0]).result(), expected[0])
+        assert pool.stats()["inferences"] == 1
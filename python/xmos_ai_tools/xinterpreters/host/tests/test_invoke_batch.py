@@ -0,0 +1,30 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("profiling", [False, True])
+def test_invoke_batch(interpreter, batch, profiling):
+    samples = batch(3)
+    if profiling:
+        interpreter.enable_profiling()
+
+    outputs = interpreter.invoke_batch(samples)
+
+    assert len(outputs) == len(samples)
+    for sample, output in zip(samples, outputs):
+        np.testing.assert_array_equal(output, interpreter.run(sample))
+
+
+def test_invoke_batch_profile(interpreter, batch, monkeypatch):
+    op_count = len(interpreter.get_model(0).opList)
+    monkeypatch.setattr(
+        interpreter, "_read_times", lambda model_index=0: np.ones(op_count, np.uint32)
+    )
+    interpreter.enable_profiling()
+    interpreter.invoke_batch(batch(3))
+    interpreter.invoke()
+
+    # Every sample of the batch is accumulated, and the single invoke after it
+    assert [total for _, total in interpreter.get_profile()] == [4] * op_count
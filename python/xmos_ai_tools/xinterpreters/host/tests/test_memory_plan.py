@@ -0,0 +1,40 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import itertools
+import warnings
+from pathlib import Path
+
+import pytest
+
+from xmos_ai_tools.xinterpreters import xcore_tflm_host_interpreter
+from xmos_ai_tools.xinterpreters.base.memory_plan import SCRATCH_BUFFER, plan_memory
+
+SMOKE_MODEL = Path(__file__).parent / "test_smoke" / "smoke_model.tflite"
+
+
+@pytest.fixture
+def interpreter():
+    with xcore_tflm_host_interpreter() as ie:
+        ie.set_model(model_path=str(SMOKE_MODEL))
+        yield ie
+
+
+def test_native_memory_plan(interpreter):
+    with warnings.catch_warnings():
+        # The plan is read from the native planner, not estimated
+        warnings.simplefilter("error")
+        plan = interpreter.get_memory_plan()
+
+    model = interpreter.get_model(0)
+    estimate = plan_memory(model.model_content, model.index)
+    tensors = [entry for entry in plan if entry.tensor_index != SCRATCH_BUFFER]
+    assert [(e.tensor_index, e.size, e.first_use, e.last_use) for e in tensors] == [
+        (e.tensor_index, e.size, e.first_use, e.last_use) for e in estimate
+    ]
+    # Without kernel scratch buffers the estimate reproduces the native plan
+    if len(plan) == len(estimate):
+        assert [e.offset for e in tensors] == [e.offset for e in estimate]
+
+    for a, b in itertools.combinations(plan, 2):
+        if a.first_use <= b.last_use and b.first_use <= a.last_use:
+            assert a.offset + a.size <= b.offset or b.offset + b.size <= a.offset
@@ -0,0 +1,38 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import pytest
+
+import xmos_ai_tools.xinterpreters.host.host_interpreter as host_interpreter
+from xmos_ai_tools.xinterpreters.host.exceptions import GetProfilerTimesError
+
+
+def test_profile_not_enabled(interpreter):
+    with pytest.raises(GetProfilerTimesError):
+        interpreter.get_profile()
+
+    interpreter.enable_profiling()
+    interpreter.enable_profiling(False)
+    with pytest.raises(GetProfilerTimesError):
+        interpreter.get_profile()
+
+
+def test_one_time_per_operator(interpreter, batch):
+    op_list = interpreter.get_model(0).opList
+    interpreter.enable_profiling()
+    interpreter.run(batch(1)[0])
+
+    assert len(interpreter.read_times()) == len(op_list)
+    assert [name for name, _ in interpreter.get_profile()] == op_list
+
+
+def test_operator_time_count_mismatch(interpreter, monkeypatch):
+    get_op_times = host_interpreter.lib.get_op_times
+    monkeypatch.setattr(
+        host_interpreter.lib,
+        "get_op_times",
+        lambda obj, times, max_count: get_op_times(obj, times, max_count) - 1,
+    )
+    interpreter.invoke()
+
+    with pytest.raises(GetProfilerTimesError, match="operator times"):
+        interpreter.read_times()
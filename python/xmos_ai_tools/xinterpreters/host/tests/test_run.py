@@ -0,0 +1,20 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import numpy as np
+import pytest
+
+
+def test_run_matches_invoke(interpreter, batch):
+    sample = batch(1)[0]
+    interpreter.set_tensor(interpreter.get_input_details()[0]["index"], sample)
+    interpreter.invoke()
+    expected = interpreter.get_tensor(interpreter.get_output_details()[0]["index"])
+
+    np.testing.assert_array_equal(interpreter.run(sample), expected)
+    np.testing.assert_array_equal(interpreter.run([sample]), expected)
+
+
+def test_run_input_count(interpreter, batch):
+    sample = batch(1)[0]
+    with pytest.raises(ValueError):
+        interpreter.run([sample, sample])
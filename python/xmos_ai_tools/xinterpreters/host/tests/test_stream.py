@@ -0,0 +1,53 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import ctypes
+
+import numpy as np
+import pytest
+
+import xmos_ai_tools.xinterpreters.host.host_interpreter as host_interpreter
+from xmos_ai_tools.xinterpreters.host.exceptions import SetTensorError
+
+
+@pytest.fixture
+def inputs(interpreter, monkeypatch):
+    """! Record a copy of every input tensor set on the native interpreter."""
+    details = interpreter.get_input_details()[0]
+    recorded = []
+    set_input_tensor = host_interpreter.lib.set_input_tensor
+
+    def record(obj, index, data_ptr, length):
+        address = data_ptr.value if isinstance(data_ptr, ctypes.c_void_p) else data_ptr
+        recorded.append(
+            np.frombuffer(ctypes.string_at(address, length), dtype=details["dtype"])
+        )
+        return set_input_tensor(obj, index, data_ptr, length)
+
+    monkeypatch.setattr(host_interpreter.lib, "set_input_tensor", record)
+    return recorded
+
+
+def test_sliding_window(interpreter, inputs):
+    details = interpreter.get_input_details()[0]
+    size = int(np.prod(details["shape"]))
+    rng = np.random.default_rng(0)
+    # Hops that wrap around the window at different offsets, a whole window and no hop
+    hop_sizes = [size // 3, size // 2 + 5, 7, size, 0, size - 1, size // 4, 3]
+    hops = [rng.integers(-128, 128, n, dtype=details["dtype"]) for n in hop_sizes]
+
+    for _ in interpreter.stream(iter(hops), sliding_window=True):
+        pass
+
+    assert len(inputs) == len(hops)
+    expected = np.zeros(size, dtype=details["dtype"])
+    for hop, window in zip(hops, inputs):
+        expected = np.concatenate([expected, hop])[-size:]
+        np.testing.assert_array_equal(window, expected)
+
+
+def test_sliding_window_hop_too_large(interpreter):
+    details = interpreter.get_input_details()[0]
+    hop = np.zeros(int(np.prod(details["shape"])) + 1, dtype=details["dtype"])
+
+    with pytest.raises(SetTensorError):
+        next(interpreter.stream(iter([hop]), sliding_window=True))
@@ -0,0 +1,40 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import numpy as np
+import pytest
+
+
+def test_input_view_sets_tensor(interpreter, batch):
+    sample = batch(1)[0]
+    details = interpreter.get_input_details()[0]
+    view = interpreter.tensor_view(details["index"])
+    assert view.shape == tuple(details["shape"])
+    assert view.dtype == details["dtype"]
+
+    view[...] = sample
+    interpreter.invoke()
+    output = interpreter.get_tensor(interpreter.get_output_details()[0]["index"])
+
+    np.testing.assert_array_equal(output, interpreter.run(sample))
+
+
+def test_output_view_follows_inferences(interpreter, batch):
+    samples = batch(2)
+    details = interpreter.get_output_details()[0]
+    view = interpreter.tensor_view(details["index"])
+    assert view.shape == tuple(details["shape"])
+    assert view.dtype == details["dtype"]
+
+    # The view shares memory with the tensor, so it holds the latest inference
+    for sample in samples:
+        expected = interpreter.run(sample).copy()
+        np.testing.assert_array_equal(view, expected)
+
+
+def test_view_of_intermediate_tensor(interpreter):
+    model_tensors = interpreter.get_model(0).index
+    io = {details.index for details in model_tensors.inputs + model_tensors.outputs}
+    intermediate = next(i for i in range(len(model_tensors.tensors)) if i not in io)
+
+    with pytest.raises(IndexError):
+        interpreter.tensor_view(intermediate)
@@ -0,0 +1,13 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import pytest
+
+
+def test_unknown_tensor(interpreter):
+    with pytest.raises(IndexError, match="No tensor at index"):
+        interpreter.get_tensor(len(interpreter.get_model(0).index.tensors))
+
+
+def test_unknown_model_index(interpreter):
+    with pytest.raises(IndexError, match="model at index 1"):
+        interpreter.invoke(model_index=1)
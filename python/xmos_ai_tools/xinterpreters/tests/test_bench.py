@@ -0,0 +1,115 @@
+# Copyright 2023 XMOS LIMITED. This Software is subject to the terms of the
+# XMOS Public License: Version 1
+import json
+
+import pytest
+
+from xmos_ai_tools.xinterpreters import bench
+
+
+def _result(invoke_us, arena_bytes=1000):
+    """! Measurements of a model with the given median invoke time."""
+    timing = {key: invoke_us for key in ("mean_us", "p50_us", "p95_us", "p99_us")}
+    return {
+        "model_bytes": 100,
+        "xformed_model_bytes": 90,
+        "params_bytes": 0,
+        "convert_seconds": 0.1,
+        "xformer_arena_bytes": arena_bytes,
+        "arena_bytes": arena_bytes,
+        "invoke": dict(timing),
+        "set_tensor": dict(timing, p50_us=2.0),
+        "get_tensor": dict(timing, p50_us=1.0),
+    }
+
+
+@pytest.fixture
+def models(tmp_path, monkeypatch):
+    """! A directory of models with canned measurements, and a failing model."""
+    directory = tmp_path / "models"
+    (directory / "sub").mkdir(parents=True)
+    measurements = {"a.tflite": _result(100.0), "sub/b.tflite": _result(50.0, 2000)}
+    for name in list(measurements) + ["broken.tflite"]:
+        (directory / name).write_bytes(b"")
+
+    def benchmark_model(model_path, *args):
+        name = model_path.relative_to(directory).as_posix()
+        if name not in measurements:
+            raise ValueError("cannot convert")
+        return measurements[name]
+
+    monkeypatch.setattr(bench, "benchmark_model", benchmark_model)
+    return directory
+
+
+def test_summarise():
+    # 1 to 100 microseconds
+    summary = bench._summarise(list(range(1000, 100001, 1000)))
+
+    assert summary["mean_us"] == pytest.approx(50.5)
+    assert summary["p50_us"] == pytest.approx(50.5)
+    assert summary["p95_us"] == pytest.approx(95.05)
+    assert summary["p99_us"] == pytest.approx(99.01)
+
+
+def test_summarise_single_sample():
+    summary = bench._summarise([2500])
+
+    assert summary == {"mean_us": 2.5, "p50_us": 2.5, "p95_us": 2.5, "p99_us": 2.5}
+
+
+def test_compare():
+    baseline = {"models": {"a": _result(100.0), "b": _result(10.0), "c": _result(1.0)}}
+    results = {
+        "models": {
+            "a": _result(110.0, arena_bytes=1200),
+            "b": {"error": "ValueError: cannot convert"},
+            "new": _result(5.0),
+        }
+    }
+
+    lines = bench.compare(results, baseline)
+
+    # Models missing from either run or failing in either run are skipped
+    assert lines == [
+        "a: invoke p50 100.0us -> 110.0us (+10.0%), "
+        "set_tensor p50 2.0us -> 2.0us (+0.0%), "
+        "get_tensor p50 1.0us -> 1.0us (+0.0%), arena +200 bytes"
+    ]
+
+
+def test_compare_zero_baseline():
+    baseline = {"models": {"a": _result(0.0)}}
+    results = {"models": {"a": _result(5.0)}}
+
+    assert "invoke p50 0.0us -> 5.0us (+0.0%)" in bench.compare(results, baseline)[0]
+
+
+def test_json_output(models, tmp_path):
+    output = tmp_path / "bench.json"
+
+    status = bench.main([str(models), "-o", str(output), "-n", "3", "--warmup", "1"])
+
+    results = json.loads(output.read_text())
+    assert status == 1
+    assert results["config"]["iterations"] == 3
+    assert results["config"]["warmup"] == 1
+    assert results["models"]["a.tflite"] == _result(100.0)
+    assert results["models"]["sub/b.tflite"]["arena_bytes"] == 2000
+    assert results["models"]["broken.tflite"] == {"error": "ValueError: cannot convert"}
+
+
+def test_baseline(models, tmp_path, capsys):
+    baseline = {"models": {"a.tflite": _result(80.0), "sub/b.tflite": _result(50.0)}}
+    baseline_path = tmp_path / "baseline.json"
+    baseline_path.write_text(json.dumps(baseline))
+
+    bench.main([str(models), "--baseline", str(baseline_path)])
+
+    lines = capsys.readouterr().out.splitlines()
+    assert "a.tflite: invoke p50 80.0us -> 100.0us (+25.0%)" in " ".join(lines)
+    assert any(
+        line.startswith("sub/b.tflite:") and line.endswith("arena +1000 bytes")
+        for line in lines
+    )
+    assert not any(line.startswith("broken.tflite:") for line in lines)